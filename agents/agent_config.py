@@ -121,7 +121,10 @@ TOOL_CONFIGS = {
     "extraction": {
         "apify_api_key": APIFY_API_KEY,
         "max_retries": 5,
-        "timeout": 600
+        "timeout": 600,
+        # Actor output formats, tried in order: timestamped captions first, then
+        # plain caption strings if the timestamped items arrive without timings
+        "output_formats": ("textWithTimestamps", "captions")
     },
     "content_limits": {
         "blog": 500,      # words
@@ -132,7 +135,8 @@ TOOL_CONFIGS = {
         "extraction": 600,   # 10 minutes
         "refinement": 300,   # 5 minutes
         "generation": 300,   # 5 minutes
-        "editing": 300      # 5 minutes
+        "editing": 300,     # 5 minutes
+        "run": 1800         # 30 minutes end to end; the pipeline degrades to stay inside it
     }
 }
 
@@ -152,11 +156,278 @@ content_config = {
         "linkedin": 2,
         "twitter": 5
     },
+    "topic_similarity_threshold": 0.45,  # Shingle Jaccard at which two topics count as duplicates
+    "topic_mode": "llm",        # "seeded": one call given local keyphrases; "fast": keyphrase topics, no LLM
+    "streaming_handoff": True,  # Start topics once enough refined text exists, while refinement continues
+    "refinement_mode": "full",  # "lazy" refines only the transcript sections the generators use
+    "lazy_span_chars": 1500,    # Size of the spans lazy refinement refines and memoizes
+    "stitch_refined_chunks": True,  # Drop the overlap each refined chunk repeats from the previous one
     "delay_between_calls": 3  # Seconds between API calls
 }
 
+# Local checks run on every draft before the LLM edit pass. Drafts that pass
+# skip the editor; failing drafts are edited with the failures listed.
+quality_gate_config = {
+    "enabled": True,
+    "rules": {
+        "blog": {"min_words": 200, "hashtags": (0, 5), "headings": True},
+        "linkedin": {"min_words": 30, "hashtags": (2, 4)},
+        "twitter": {"hashtags": (1, 3)}
+    }
+}
+
+# Transcript regions whose local quality score (tools/transcript_quality.py)
+# is at or above the threshold are already clean and skip LLM refinement
+transcript_quality_config = {
+    "enabled": True,
+    "clean_threshold": 0.8
+}
+
+# Edit-operation output: refinement and editing ask for find/replace
+# operations against the input (tools/text_patch.py) instead of the whole
+# text, so output length scales with the number of fixes. If the operations
+# don't apply, the call is repeated as a full rewrite.
+edit_ops_config = {
+    "enabled": True,
+    # Transcript chunks scoring below this (tools/transcript_quality.py) need
+    # fixes throughout, so they are rewritten directly
+    "refinement_min_score": 0.4,
+    "platforms": ("blog", "linkedin"),  # Tweets are shorter than their edit list
+    "max_ops": 40,                      # Longer lists are treated as a rewrite
+    "min_length_ratio": 0.6             # Patched text shorter than this share of the input is rejected
+}
+
+# Extractive compression of transcript context (tools/extractive.py): keeps
+# the most central, least repetitive sentences within a token target
+compression_config = {
+    "enabled": True,
+    "novelty": 0.3,          # Weight of the repetition penalty against centrality
+    "summary_tokens": 600,   # Transcript opening sent to the blog summary call
+    "topic_tokens": 350      # Each transcript chunk sent to a topic call (~450 uncompressed)
+}
+
 # Output settings
 output_config = {
     "output_dir": "output",
     "output_file": "repurposed_content.txt"
-}
\ No newline at end of file
+}
+
+# HTTP service settings (see server.py)
+server_config = {
+    "host": "127.0.0.1",
+    "port": 8000,
+    "workers": 4,          # Pipelines processed concurrently
+    "max_queue_size": 100,  # Jobs waiting for a worker before new ones are rejected
+    # Finished jobs (with their results) are kept this long, and at most this many, for polling
+    "job_retention": {
+        "ttl_seconds": 3600,
+        "max_finished": 200
+    }
+}
+
+# Durable multi-node job queue settings (see worker.py)
+queue_config = {
+    "db_path": os.path.join("output", "jobs.db"),  # Put on a shared filesystem for multi-node runs
+    "lease_seconds": 120,      # A job is reclaimed if its worker misses heartbeats for this long
+    "heartbeat_interval": 30,  # Seconds between lease renewals
+    "max_attempts": 3,         # Claims per job before it is dead-lettered
+    "retry_backoff": 60,       # Base seconds before retrying a failed job (doubles per attempt)
+    "poll_interval": 5         # Seconds an idle worker waits before polling again
+}
+
+# Stage outputs saved with fingerprints of their inputs, prompt and config,
+# so re-runs only recompute what changed
+artifact_config = {
+    "enabled": True,
+    "root": os.path.join("output", "artifacts")
+}
+
+# Per-stage profiling (main.py --profile)
+profile_config = {
+    "output_dir": os.path.join("output", "profiles"),  # One sub-directory per run
+    "cpu": True,              # cProfile per stage
+    "memory": True,           # tracemalloc per stage
+    "sample_interval": 0.005  # Seconds between stack samples for the flame graph
+}
+
+# Dry-run planning (main.py --plan), calibrated on the history of finished runs
+planner_config = {
+    "history_path": os.path.join("output", "run_history.jsonl"),
+    "history_runs": 50,                 # Most recent runs used for calibration
+    "default_transcript_chars": 60000,  # Assumed when a video's transcript isn't cached (~1 hour of speech)
+    "default_extraction_seconds": 90,   # Apify actor run, until the history says otherwise
+    "default_output_ratio": 0.5         # Share of a stage's max_tokens assumed used, without history
+}
+
+# USD per million tokens, for cost estimates
+pricing_config = {
+    "input_cache_hit": 0.07,
+    "input_cache_miss": 0.27,
+    "output": 1.10
+}
+
+# Persistent full-text index of processed videos (refined transcripts and posts)
+corpus_config = {
+    "enabled": True,
+    "db_path": os.path.join("output", "corpus.db"),
+    "chunk_size": 1000,                 # Characters per indexed transcript chunk
+    "overlap": 100,
+    "mmap_bytes": 256 * 1024 * 1024     # Portion of the index SQLite may memory-map
+}
+
+# Opt-in request hedging for DeepSeek calls
+hedging_config = {
+    "enabled": False,
+    "percentile": 95,     # Hedge once a call runs past this percentile of recent latencies for its stage:platform
+    "min_samples": 20,    # Latency samples per stage:platform required before hedging kicks in
+    "min_delay": 2.0,     # Never hedge sooner than this many seconds
+    "budget_ratio": 0.05, # Long-run cap on extra requests, as a fraction of calls
+    "budget_burst": 5,    # Hedges allowed in a burst
+    "max_workers": 16     # Threads for in-flight requests
+}
+
+# LLM provider routing (see agents/llm_router.py). Point base_url_env at a
+# local OpenAI-compatible stand-in server to test routing without real vendors.
+router_config = {
+    "providers": {
+        "deepseek": {
+            "type": "openai",
+            "base_url": "https://api.deepseek.com/v1",
+            "base_url_env": "DEEPSEEK_BASE_URL",
+            "api_key_env": "DEEPSEEK_API_KEY",
+            "model": "deepseek-chat",
+            "timeout": 120  # Seconds per request
+        },
+        "gemini": {
+            "type": "gemini",
+            "model": "gemini-2.0-flash",
+            "timeout": 120
+        }
+    },
+    # "priority" tries providers in order; "fastest" ranks them by live latency and error rate,
+    # measured per stage (stage:platform for generation and editing)
+    "stage_policies": {
+        "default": {"providers": ["deepseek", "gemini"], "strategy": "priority"},
+        "refinement": {"providers": ["deepseek", "gemini"], "strategy": "priority"},
+        "topics": {"providers": ["deepseek", "gemini"], "strategy": "priority"},
+        "summary": {"providers": ["deepseek", "gemini"], "strategy": "fastest"},
+        "generation": {"providers": ["deepseek", "gemini"], "strategy": "fastest"},
+        "editing": {"providers": ["deepseek", "gemini"], "strategy": "fastest"}
+    },
+    "circuit_breaker": {
+        "failure_threshold": 5,  # Consecutive failures before a provider is skipped
+        "reset_timeout": 30      # Seconds before a skipped provider is probed again
+    },
+    # A provider measured at or below this error rate for a stage is never ranked
+    # behind one that has not served that stage yet
+    "healthy_error_rate": 0.25
+}
+
+# Per-stage LLM settings. Resolution order: default -> stage -> stage[platform].
+# "models" maps router provider names to the model used for that provider.
+# max_tokens is sized to each stage's expected output so short-form stages
+# don't reserve (or wait on) long completions.
+stage_llm_config = {
+    "default": {
+        "temperature": 0.7,
+        "max_tokens": 2048,
+        "models": {"deepseek": "deepseek-chat", "gemini": "gemini-2.0-flash"}
+    },
+    "refinement": {
+        "temperature": 0.3,  # Faithful cleanup, not rewriting
+        "max_tokens": 1200   # ~3000-char chunk in, similar length out
+    },
+    "topics": {
+        "max_tokens": 1500   # Up to 8 topics of JSON per chunk
+    },
+    "summary": {
+        "temperature": 0.5,
+        "max_tokens": 400,   # 150-200 word summary
+        "models": {"gemini": "gemini-2.0-flash-lite"}
+    },
+    "generation": {
+        "blog": {"max_tokens": 1100},      # 500 words plus markdown
+        "linkedin": {"max_tokens": 300,    # 100 words
+                     "models": {"gemini": "gemini-2.0-flash-lite"}},
+        "twitter": {"max_tokens": 150,     # 280 characters
+                    "models": {"gemini": "gemini-2.0-flash-lite"}}
+    },
+    "editing": {
+        "temperature": 0.4,
+        "blog": {"max_tokens": 1100},
+        "linkedin": {"max_tokens": 300,
+                     "models": {"gemini": "gemini-2.0-flash-lite"}},
+        "twitter": {"max_tokens": 150,
+                    "models": {"gemini": "gemini-2.0-flash-lite"}}
+    }
+}
+
+PLATFORMS = ("blog", "linkedin", "twitter")
+
+def get_stage_llm_config(stage=None, platform=None):
+    """
+    Resolve model, temperature and max_tokens for a pipeline stage.
+    
+    Args:
+        stage (str): Pipeline stage (refinement, topics, summary, generation, editing)
+        platform (str): Target platform for generation/editing stages
+        
+    Returns:
+        dict: {"temperature": float, "max_tokens": int, "models": {provider: model}}
+    """
+    default = stage_llm_config["default"]
+    config = {
+        "temperature": default["temperature"],
+        "max_tokens": default["max_tokens"],
+        "models": dict(default["models"])
+    }
+    
+    stage_config = stage_llm_config.get(stage, {})
+    layers = [stage_config]
+    if platform in stage_config:
+        layers.append(stage_config[platform])
+    
+    for layer in layers:
+        for key, value in layer.items():
+            if key == "models":
+                config["models"].update(value)
+            elif key not in PLATFORMS:
+                config[key] = value
+    
+    return config
+
+# Input token budgets per prompt, by stage and platform. Context sections
+# (retrieved transcript passages, summaries) are packed into whatever the
+# instructions, topic and other required sections leave free.
+prompt_budget_config = {
+    "default": 2000,
+    "refinement": 1200,   # Instructions plus one ~3000-char chunk
+    "topics": 1200,
+    "summary": 1600,      # Instructions, transcript excerpt and topic
+    "generation": {
+        "blog": 1500,
+        "linkedin": 700,
+        "twitter": 400
+    },
+    "editing": {
+        "blog": 1200,
+        "linkedin": 400,
+        "twitter": 250
+    }
+}
+
+def get_prompt_budget(stage=None, platform=None):
+    """
+    Resolve the input token budget for a pipeline stage.
+    
+    Args:
+        stage (str): Pipeline stage
+        platform (str): Target platform for generation/editing stages
+        
+    Returns:
+        int: Maximum prompt tokens
+    """
+    budget = prompt_budget_config.get(stage, prompt_budget_config["default"])
+    if isinstance(budget, dict):
+        budget = budget.get(platform, prompt_budget_config["default"])
+    return budget
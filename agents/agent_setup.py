@@ -5,7 +5,12 @@ to address Pydantic validation errors in AutoGen.
 
 import os
 import json
+import time
+import asyncio
 import logging
+import threading
+import contextvars
+from concurrent.futures import Future
 from autogen import AssistantAgent, UserProxyAgent, GroupChat, GroupChatManager
 from .agent_config import (
     get_base_config,
@@ -16,7 +21,19 @@ from .agent_config import (
     get_editor_agent_config,
     get_user_proxy_config,
     get_group_chat_config,
-    TOOL_CONFIGS
+    TOOL_CONFIGS,
+    output_config,
+    corpus_config,
+    artifact_config,
+    profile_config,
+    planner_config,
+    content_config,
+    quality_gate_config,
+    transcript_quality_config,
+    edit_ops_config,
+    compression_config,
+    get_stage_llm_config,
+    get_prompt_budget
 )
 from .agent_prompts import (
     EXTRACTION_AGENT_PROMPT,
@@ -31,6 +48,35 @@ from .agent_prompts import (
     USER_PROXY_PROMPT
 )
 from .agent_tools import *  # Import all tools
+from .run_context import RunContext, RunBudget
+from utils.corpus_index import CorpusIndex, index_content
+from utils.artifact_store import ArtifactStore, fingerprint
+from utils.profiler import RunProfiler
+from utils.run_history import RunHistory
+from utils.text_stream import TextPrefixStream
+from .lazy_refiner import LazyRefiner
+from tools.transcript_store import SegmentedTranscript
+from tools.quality_gate import check_post, fit_tweet
+from tools.caption_files import is_caption_file
+
+# DeepSeek calls needed to generate one post (the blog post also builds a summary)
+GENERATION_CALLS = {
+    "blog": 2,
+    "linkedin": 1,
+    "twitter": 1
+}
+
+# Prompt templates each platform's posts depend on, for artifact fingerprints
+GENERATION_PROMPTS = {
+    "blog": [SUMMARY_INSTRUCTIONS, BLOG_INSTRUCTIONS],
+    "linkedin": [LINKEDIN_INSTRUCTIONS],
+    "twitter": [TWITTER_INSTRUCTIONS]
+}
+EDIT_PROMPTS = {
+    "blog": BLOG_EDIT_INSTRUCTIONS,
+    "linkedin": LINKEDIN_EDIT_INSTRUCTIONS,
+    "twitter": TWITTER_EDIT_INSTRUCTIONS
+}
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -39,19 +85,29 @@ class RepurposerAgentSystem:
     """Main class for setting up and orchestrating the Content Repurposer agent system."""
     
     def __init__(self):
-        """Initialize the agent system."""
+        """
+        Initialize the agent system.
+        
+        The system only holds shared, read-only resources (agents and clients).
+        All per-video state lives in a RunContext, so one instance can run many
+        pipelines concurrently.
+        """
         self.agents = {}
         self.group_chats = {}
-        self.content_data = {
-            "video_url": None,
-            "video_info": None,
-            "transcript": None,
-            "refined_transcript": None,
-            "topics": None,
-            "blog_posts": [],
-            "linkedin_posts": [],
-            "twitter_posts": []
-        }
+        
+        # Stage outputs from earlier runs, reused when their inputs are unchanged
+        self.artifact_store = ArtifactStore(artifact_config["root"]) if artifact_config["enabled"] else None
+        self.run_history = RunHistory(planner_config["history_path"])
+        
+        # Shared across runs; every finished video is added to it
+        self.corpus_index = None
+        if corpus_config["enabled"]:
+            self.corpus_index = CorpusIndex(
+                corpus_config["db_path"],
+                chunk_size=corpus_config["chunk_size"],
+                overlap=corpus_config["overlap"],
+                mmap_bytes=corpus_config["mmap_bytes"]
+            )
         
         # Set up agents
         self._setup_agents()
@@ -64,15 +120,9 @@ class RepurposerAgentSystem:
             "extract_youtube_transcript": lambda url: extract_youtube_transcript(url),
             "refine_transcript": refine_transcript,
             "generate_content_topics": generate_content_topics,
-            "generate_blog_post": lambda topic, transcript: generate_blog_post(
-                topic, transcript, TOOL_CONFIGS["content_limits"]["blog"]
-            ),
-            "generate_linkedin_post": lambda topic, transcript: generate_linkedin_post(
-                topic, transcript, TOOL_CONFIGS["content_limits"]["linkedin"]
-            ),
-            "generate_twitter_post": lambda topic, transcript: generate_twitter_post(
-                topic, transcript, TOOL_CONFIGS["content_limits"]["twitter"]
-            ),
+            "generate_blog_post": lambda topic, transcript: generate_blog_post(topic, transcript),
+            "generate_linkedin_post": lambda topic, transcript: generate_linkedin_post(topic, transcript),
+            "generate_twitter_post": lambda topic, transcript: generate_twitter_post(topic, transcript),
             "edit_blog_post": edit_blog_post,
             "edit_linkedin_post": edit_linkedin_post,
             "edit_twitter_post": edit_twitter_post,
@@ -191,75 +241,294 @@ class RepurposerAgentSystem:
             function_map={"edit_twitter_post": function_map["edit_twitter_post"]}
         )
     
-    def process_youtube_url(self, youtube_url):
+    def process_youtube_url(self, youtube_url, output_file=None, deadline_seconds=None, profile=False, on_event=None):
         """
         Process a YouTube URL through the complete pipeline.
         
         Args:
-            youtube_url (str): The YouTube URL to process
+            youtube_url (str): The YouTube URL to process, or the path of a
+                local VTT/SRT/JSON caption file (read directly, without Apify)
+            output_file (str): Where to save the compiled content
+                (defaults to output_config["output_file"])
+            deadline_seconds (float): End-to-end time budget for the run
+                (defaults to TOOL_CONFIGS["timeouts"]["run"]). When time runs
+                short the pipeline degrades instead of overrunning; applied
+                degradations are listed in content_data["degradations"].
+            profile (bool): Profile each stage (CPU, wall-clock, allocations);
+                reports are written under profile_config["output_dir"] and
+                summarized in the result's "profile" entry
+            on_event (callable): Called from the pipeline thread with each
+                progress event (see run_context for the event types)
             
         Returns:
             dict: The final content data with all generated content
         """
+        timeouts = TOOL_CONFIGS["timeouts"]
+        budget = RunBudget(deadline_seconds or timeouts.get("run"), timeouts)
+        ctx = RunContext(youtube_url, budget, on_event=on_event)
+        if profile:
+            ctx.profiler = RunProfiler(
+                os.path.join(profile_config["output_dir"], ctx.run_id),
+                cpu=profile_config["cpu"],
+                memory=profile_config["memory"],
+                sample_interval=profile_config["sample_interval"]
+            )
+        
+        ctx.emit("run_started", video_url=youtube_url)
+        result = {"success": False, "error": "Run did not complete"}
         try:
-            # Store the URL
-            self.content_data["video_url"] = youtube_url
+            with ctx.activate():
+                result = self._run_pipeline(ctx, youtube_url, output_file)
             
+            if ctx.profiler:
+                result["profile"] = ctx.profiler.finish()
+                logging.info(f"Profile written to {result['profile']['output_dir']}")
+            if result.get("success"):
+                self._record_history(ctx, youtube_url)
+            return result
+        finally:
+            ctx.emit("run_finished", success=result.get("success", False), error=result.get("error"), result=result)
+    
+    async def aprocess_youtube_url(self, youtube_url, output_file=None, deadline_seconds=None, profile=False, on_event=None):
+        """
+        Asyncio wrapper around process_youtube_url.
+        
+        Runs the (blocking) pipeline in a worker thread so many videos can be
+        awaited concurrently against one shared system. on_event is called
+        from that worker thread, as with process_youtube_url; use
+        astream_events to receive events on the event loop instead.
+        """
+        return await asyncio.to_thread(
+            self.process_youtube_url, youtube_url, output_file, deadline_seconds, profile, on_event
+        )
+    
+    async def astream_events(self, youtube_url, output_file=None, deadline_seconds=None):
+        """
+        Run the pipeline and yield its progress events as they happen.
+        
+        Usage:
+            async for event in system.astream_events(url):
+                if event["type"] == "post_completed":
+                    publish(event["post"])
+        
+        The last event is always run_finished, which carries the full result.
+        """
+        loop = asyncio.get_running_loop()
+        events = asyncio.Queue()
+        
+        def on_event(event):
+            loop.call_soon_threadsafe(events.put_nowait, event)
+        
+        task = asyncio.ensure_future(asyncio.to_thread(
+            self.process_youtube_url, youtube_url, output_file, deadline_seconds, False, on_event
+        ))
+        try:
+            while True:
+                event = await events.get()
+                yield event
+                if event["type"] == "run_finished":
+                    break
+        finally:
+            await task
+    
+    def _run_pipeline(self, ctx, youtube_url, output_file):
+        """Run every stage for one video inside the given run context."""
+        content_data = ctx.content_data
+        budget = ctx.budget
+        
+        try:
             # Step 1: Extract transcript
             logging.info("Step 1: Extracting transcript from YouTube URL")
-            extraction_agent = self.agents["extraction"]
+            
+            # Local caption files are parsed directly; URLs go through Apify
+            local_captions = os.path.isfile(youtube_url) and is_caption_file(youtube_url)
             
             # Call function directly to avoid relying on chat
-            validation = validate_youtube_url(youtube_url)
+            validation = {"valid": True, "video_id": None} if local_captions else validate_youtube_url(youtube_url)
             if not validation["valid"]:
                 return {"success": False, "error": validation["error"]}
                 
-            extraction_result = extract_youtube_transcript(youtube_url)
-
-            # Log the result received from extraction
-            logging.warning(f"Received extraction_result: {json.dumps(extraction_result, indent=2)}")
-            
-            if not extraction_result["success"]:
-                logging.error(f"Extraction failed. Result: {extraction_result.get('error')}")
-                return extraction_result
+            content_data["video_id"] = validation["video_id"]
             
-            self.content_data["video_info"] = extraction_result["video_info"]
-            self.content_data["transcript"] = extraction_result["transcript"]
+            with ctx.stage("extraction"):
+                if local_captions:
+                    # Parsing is cheaper than an artifact lookup, so nothing is cached
+                    extraction_result = extract_caption_file(youtube_url)
+                    if not extraction_result["success"]:
+                        logging.error(f"Extraction failed. Result: {extraction_result.get('error')}")
+                        return extraction_result
+                    content_data["video_id"] = extraction_result["video_id"]
+                    transcript_inputs = None
+                else:
+                    # The transcript only depends on the video
+                    transcript_inputs = {"video_id": validation["video_id"]}
+                    extraction_result = self._load_artifact(ctx, "transcript", transcript_inputs)
+                if extraction_result is None:
+                    extraction_result = extract_youtube_transcript(
+                        youtube_url,
+                        deadline=budget.stage_deadline("extraction", reserve=self._downstream_reserve("extraction"))
+                    )
+
+                    # Log the result received from extraction
+                    # (without the per-caption segments, which would dump the whole transcript again)
+                    logged_result = {key: value for key, value in extraction_result.items() if key != "segments"}
+                    logging.warning(f"Received extraction_result: {json.dumps(logged_result, indent=2)}")
+                
+                    if not extraction_result["success"]:
+                        logging.error(f"Extraction failed. Result: {extraction_result.get('error')}")
+                        return extraction_result
+                
+                    self._store_artifact(ctx, "transcript", transcript_inputs, {
+                        "success": True,
+                        "video_info": extraction_result["video_info"],
+                        "transcript": extraction_result["transcript"],
+                        "segments": extraction_result.get("segments")
+                    })
+
+            content_data["video_info"] = extraction_result["video_info"]
+            content_data["transcript"] = extraction_result["transcript"]
+            if extraction_result.get("segments"):
+                ctx.segments = SegmentedTranscript.from_dict(extraction_result["segments"])
             
             # Log the transcript being passed to refinement
-            logging.warning(f"Transcript word count: {len(self.content_data['transcript'].split())} words, character count: {len(self.content_data['transcript'])}")
+            logging.warning(f"Transcript word count: {len(content_data['transcript'].split())} words, character count: {len(content_data['transcript'])}")
             
             # Step 2: Refine transcript
             logging.info("Step 2: Refining the transcript")
-            refinement_result = refine_transcript(self.content_data["transcript"])
-            
-            if not refinement_result["success"]:
-                return refinement_result
-            
-            self.content_data["refined_transcript"] = refinement_result["refined_transcript"]
+            streamed_topics = None
+            with ctx.stage("refinement"):
+                refinement_inputs = {
+                    "transcript": content_data["transcript"],
+                    "prompt": REFINE_INSTRUCTIONS,
+                    "config": get_stage_llm_config("refinement"),
+                    "budget": get_prompt_budget("refinement"),
+                    "quality": transcript_quality_config,
+                    "edit_ops": edit_ops_config,
+                    "stitch": content_config["stitch_refined_chunks"]
+                }
+                if content_config["refinement_mode"] == "lazy":
+                    # Only the opening topics read is refined now; generators refine what they use
+                    ctx.refiner = self._lazy_refiner(ctx, refinement_inputs)
+                    refinement_result = {
+                        "success": True,
+                        "refined_transcript": ctx.refiner.refined_prefix(topic_prefix_chars(MAX_TOPIC_CHUNKS))
+                    }
+                else:
+                    refinement_result = self._load_artifact(ctx, "refined_transcript", refinement_inputs)
+                if refinement_result is None:
+                    # Topics only read a prefix of the refined transcript, so they can
+                    # start as soon as that prefix exists. Skipped when profiling, to
+                    # keep per-stage profiles separate.
+                    stream = None
+                    if content_config["streaming_handoff"] and content_config["topic_mode"] == "llm" and not ctx.profiler:
+                        stream = TextPrefixStream()
+                        streamed_topics = self._start_background(self._stream_topics, ctx, stream)
+                    
+                    refinement_result = {"success": False, "error": "Refinement did not complete"}
+                    try:
+                        refinement_result = refine_transcript(
+                            content_data["transcript"],
+                            deadline=budget.stage_deadline("refinement", reserve=self._downstream_reserve("refinement")),
+                            on_chunk=stream.append if stream else None
+                        )
+                    finally:
+                        if stream and refinement_result["success"]:
+                            stream.finish()
+                        elif stream:
+                            stream.abort()
+                
+                    if not refinement_result["success"]:
+                        if streamed_topics:
+                            # The topics thread may already be calling the LLM; don't leave it running past the run
+                            streamed_topics.result()
+                        return refinement_result
+                
+                    if refinement_result.get("unrefined_chunks"):
+                        budget.degrade(
+                            "partial_refinement",
+                            "Not enough time to refine every transcript chunk",
+                            unrefined_chunks=refinement_result["unrefined_chunks"]
+                        )
+                    else:
+                        # Partially refined transcripts are not kept, so the next run finishes the job
+                        self._store_artifact(ctx, "refined_transcript", refinement_inputs, refinement_result)
+
+            content_data["refined_transcript"] = refinement_result["refined_transcript"]
+            if refinement_result.get("quality"):
+                content_data["transcript_quality"] = refinement_result["quality"]
+            if refinement_result.get("stitching"):
+                content_data["refinement_stitching"] = refinement_result["stitching"]
             
             # Step 3: Generate topics
             logging.info("Step 3: Generating content topics")
-            topic_result = generate_content_topics(self.content_data["refined_transcript"])
+            if streamed_topics:
+                # Freshly refined text has no cached topics; wait for the ones already underway
+                topic_result, max_topic_chunks, degradations = streamed_topics.result()
+                if not topic_result["success"]:
+                    return topic_result
+                if len(budget.degradations) == degradations:
+                    topic_inputs = self._topic_inputs(content_data["refined_transcript"], max_topic_chunks)
+                    self._store_artifact(ctx, "topics", topic_inputs, topic_result)
+            else:
+                with ctx.stage("topics"):
+                    max_topic_chunks = self._topic_chunk_allowance(ctx)
+                    topic_inputs = self._topic_inputs(content_data["refined_transcript"], max_topic_chunks)
+                    topic_result = self._load_artifact(ctx, "topics", topic_inputs)
+                    if topic_result is None:
+                        degradations = len(budget.degradations)
+                        topic_result = generate_content_topics(
+                            content_data["refined_transcript"],
+                            max_chunks=max_topic_chunks,
+                            deadline=budget.stage_deadline("generation", reserve=self._downstream_reserve("topics"))
+                        )
+                    
+                        if not topic_result["success"]:
+                            return topic_result
+                    
+                        if len(budget.degradations) == degradations:
+                            self._store_artifact(ctx, "topics", topic_inputs, topic_result)
+
+            content_data["topics"] = topic_result["topics"]
+            content_data["duplicate_topics"] = topic_result.get("duplicates_removed", [])
             
-            if not topic_result["success"]:
-                return topic_result
+            # Step 4: Generate and edit content for each platform
+            platforms = ["blog", "linkedin", "twitter"]
+            plan = self._plan_generation(ctx, platforms)
+            for platform in platforms:
+                with ctx.stage(f"generation:{platform}"):
+                    self._generate_platform_content(ctx, platform, plan)
             
-            self.content_data["topics"] = topic_result["topics"]
+            if ctx.refiner:
+                # Refined where the generators looked, raw elsewhere
+                content_data["refined_transcript"] = ctx.refiner.assembled_text()
+                content_data["lazy_refinement"] = ctx.refiner.stats()
+                self._store_artifact(ctx, "refined_spans", ctx.refiner.artifact_inputs, ctx.refiner.memo())
             
-            # Step 4: Generate and edit content for each platform
-            for platform in ["blog", "linkedin", "twitter"]:
-                self._generate_platform_content(platform)
+            # Record token usage, prompt-cache hit ratio and prompt size per section for this run
+            content_data["llm_usage"] = ctx.usage.snapshot()
+            content_data["prompt_tokens"] = ctx.prompt_stats.snapshot()
             
             # Step 5: Save all content
-            output_result = save_output(self.content_data)
+            with ctx.stage("save"):
+                output_result = save_output(
+                    content_data,
+                    output_file or output_config["output_file"]
+                )
             
-            if not output_result["success"]:
-                return output_result
+                if not output_result["success"]:
+                    return output_result
+
+            # Add the refined transcript and posts to the cross-video index
+            if self.corpus_index:
+                try:
+                    with ctx.stage("index"):
+                        index_content(self.corpus_index, content_data, content_data["video_id"])
+                except Exception as e:
+                    logging.warning(f"Failed to update corpus index: {str(e)}")
             
             return {
                 "success": True,
-                "content_data": self.content_data,
+                "content_data": content_data,
                 "output_file": output_result["file_path"]
             }
         
@@ -270,45 +539,355 @@ class RepurposerAgentSystem:
                 "error": f"Processing error: {str(e)}"
             }
     
-    def _generate_platform_content(self, platform):
-        """Generate content for a specific platform."""
+    def _record_history(self, ctx, source):
+        """Append this run's sizes, stage timings and LLM usage to the planner's history."""
+        content_data = ctx.content_data
+        try:
+            self.run_history.append({
+                "time": time.time(),
+                "video_id": content_data.get("video_id"),
+                "local_captions": os.path.isfile(source) and is_caption_file(source),
+                "transcript_reused": "transcript" in content_data["artifacts"]["reused"],
+                "transcript_chars": len(content_data.get("transcript") or ""),
+                "refined_chars": len(content_data.get("refined_transcript") or ""),
+                "topics": len(content_data.get("topics") or []),
+                "stage_seconds": ctx.stage_seconds,
+                "usage": content_data.get("llm_usage") or ctx.usage.snapshot(),
+                "degraded": bool(ctx.budget.degradations)
+            })
+        except Exception as e:
+            logging.warning(f"Failed to record run history: {str(e)}")
+    
+    def _lazy_refiner(self, ctx, refinement_inputs):
+        """Create the run's lazy refiner, seeded with spans refined by earlier runs."""
+        inputs = dict(refinement_inputs, span_chars=content_config["lazy_span_chars"])
+        refiner = LazyRefiner(
+            ctx.content_data["transcript"],
+            span_chars=content_config["lazy_span_chars"],
+            refined_spans=self._load_artifact(ctx, "refined_spans", inputs)
+        )
+        refiner.artifact_inputs = inputs
+        logging.info(f"Lazy refinement: {len(refiner.spans)} spans, {refiner.reused} already refined")
+        return refiner
+    
+    def _topic_chunk_allowance(self, ctx):
+        """Topic chunks the remaining run budget can afford (degrading the run if fewer than the mode uses)."""
+        if content_config["topic_mode"] == "fast":
+            return 0  # Topics are built locally
+        max_topic_chunks = 1 if content_config["topic_mode"] == "seeded" else MAX_TOPIC_CHUNKS
+        affordable = int((ctx.budget.remaining() - self._downstream_reserve("topics")) // estimate_call_seconds())
+        if affordable < max_topic_chunks:
+            max_topic_chunks = max(1, affordable)
+            ctx.budget.degrade(
+                "fewer_topic_chunks",
+                "Not enough time to generate topics from every chunk",
+                topic_chunks=max_topic_chunks
+            )
+        return max_topic_chunks
+    
+    @staticmethod
+    def _topic_inputs(refined_transcript, max_topic_chunks):
+        """Everything the topics artifact depends on."""
+        return {
+            "refined_transcript": refined_transcript,
+            "prompt": TOPIC_INSTRUCTIONS,
+            "config": get_stage_llm_config("topics"),
+            "budget": get_prompt_budget("topics"),
+            "max_chunks": max_topic_chunks,
+            "mode": content_config["topic_mode"],
+            "compression": compression_config,
+            "selection": [content_config["posts_per_platform"], content_config["topic_similarity_threshold"]]
+        }
+    
+    def _stream_topics(self, ctx, stream):
+        """
+        Generate topics from the refined transcript's prefix while refinement continues.
+        
+        The prefix read is exactly what generate_content_topics would read
+        from the finished transcript, so the topics are unchanged.
+        
+        Returns:
+            tuple: (topic result, max_topic_chunks used, degradation count before the call)
+        """
+        with ctx.stage("topics"):
+            prefix = stream.wait_for(topic_prefix_chars(MAX_TOPIC_CHUNKS))
+            if prefix is None:
+                return {"success": False, "error": "Refinement failed before topics could start"}, 0, 0
+            if stream.aborted:
+                # Refinement failed after the prefix was ready; the run is ending
+                return {"success": False, "error": "Refinement failed before topics could start"}, 0, 0
+            logging.info(f"Starting topics from {len(prefix)} refined characters while refinement continues")
+            max_topic_chunks = self._topic_chunk_allowance(ctx)
+            degradations = len(ctx.budget.degradations)
+            topic_result = generate_content_topics(
+                prefix,
+                max_chunks=max_topic_chunks,
+                deadline=ctx.budget.stage_deadline("generation", reserve=self._downstream_reserve("topics"))
+            )
+            return topic_result, max_topic_chunks, degradations
+    
+    @staticmethod
+    def _start_background(func, *args):
+        """Run func(*args) on a new thread inside the current run's context; returns a Future."""
+        future = Future()
+        context = contextvars.copy_context()
+        
+        def run():
+            try:
+                future.set_result(context.run(func, *args))
+            except BaseException as e:
+                future.set_exception(e)
+        
+        threading.Thread(target=run, daemon=True).start()
+        return future
+    
+    def _downstream_reserve(self, stage):
+        """
+        Seconds to hold back for the stages after `stage`, so an early stage
+        can't use up the whole run budget. Covers the minimum useful output:
+        one topic call plus one post per platform.
+        """
+        calls_after = {
+            "extraction": 1 + 1 + sum(GENERATION_CALLS.values()),  # refine + topics + posts
+            "refinement": 1 + sum(GENERATION_CALLS.values()),
+            "topics": sum(GENERATION_CALLS.values())
+        }
+        return calls_after.get(stage, 0) * estimate_call_seconds()
+    
+    def _plan_generation(self, ctx, platforms):
+        """
+        Decide how many posts per platform to write and whether to edit them,
+        given the time left in the run and the generation/editing stage caps.
+        
+        Returns:
+            dict: {"quotas": {platform: max posts}, "edit": bool, "deadline": float}
+        """
+        budget = ctx.budget
+        timeouts = budget.stage_timeouts
+        topics = ctx.content_data["topics"] or []
+        quotas = {platform: len(topics) for platform in platforms}
+        
+        # Generation and editing are interleaved per post, so they share one phase deadline
+        deadline = budget.stage_deadline("generation")
+        if deadline is not None:
+            deadline += timeouts.get("editing", 0)
+            if budget.deadline is not None:
+                deadline = min(deadline, budget.deadline)
+        plan = {"quotas": quotas, "edit": True, "deadline": deadline}
+        
+        if deadline is None:
+            return plan
+        
+        remaining = deadline - time.time()
+        call_seconds = estimate_call_seconds()
+        def needed(edit):
+            return sum(quotas[p] * (GENERATION_CALLS[p] + (1 if edit else 0)) for p in platforms) * call_seconds
+        
+        if needed(True) <= remaining:
+            return plan
+        
+        # First drop the edit pass, then shrink per-platform quotas to fit
+        plan["edit"] = False
+        budget.degrade("skip_edit", "Not enough time to edit every post")
+        
+        if needed(False) > remaining:
+            ratio = max(0, remaining) / needed(False)
+            for platform in platforms:
+                quotas[platform] = max(1, int(quotas[platform] * ratio))
+            budget.degrade(
+                "shrink_quota",
+                "Not enough time to generate every post",
+                quotas=dict(quotas)
+            )
+        
+        return plan
+    
+    @staticmethod
+    def _has_time_for(plan, seconds):
+        """Whether the generation phase has at least `seconds` left."""
+        return plan["deadline"] is None or plan["deadline"] - time.time() >= seconds
+    
+    def _load_artifact(self, ctx, name, inputs):
+        """Return a stored stage output if it was computed from the same inputs, else None."""
+        if not self.artifact_store:
+            return None
+        value = self.artifact_store.get(ctx.content_data["video_id"], name, inputs)
+        if value is not None:
+            ctx.content_data["artifacts"]["reused"].append(name)
+        return value
+    
+    def _store_artifact(self, ctx, name, inputs, value):
+        """Save a freshly computed stage output with the fingerprint of its inputs."""
+        if not self.artifact_store:
+            return
+        try:
+            self.artifact_store.put(ctx.content_data["video_id"], name, inputs, value)
+            ctx.content_data["artifacts"]["computed"].append(name)
+        except (OSError, TypeError, ValueError) as e:
+            logging.warning(f"Failed to store artifact {name}: {str(e)}")
+    
+    @staticmethod
+    def _add_post(ctx, platform, post, edited, reused=False):
+        """Store a finished post and announce it, so consumers can publish it right away."""
+        posts = ctx.content_data[f"{platform}_posts"]
+        if platform == "twitter" and "content" in post:
+            # Unedited drafts are never truncated earlier, so enforce the hard limit here
+            post["content"] = fit_tweet(post["content"], TOOL_CONFIGS["content_limits"]["twitter"])
+        # Link the post back to the video moments its context came from. Spans
+        # are in refined-transcript coordinates, mapped by relative position.
+        refined_length = len(ctx.content_data["refined_transcript"] or "")
+        if ctx.segments and ctx.segments.has_timestamps and ctx.refiner and post.get("source_spans"):
+            # Lazily refined runs search the raw transcript, so spans map exactly
+            post["source_times"] = [
+                round(ctx.segments.time_at(start, interpolate=True), 1)
+                for start, _ in post["source_spans"]
+            ]
+        elif ctx.segments and ctx.segments.has_timestamps and refined_length and post.get("source_spans"):
+            post["source_times"] = [
+                round(ctx.segments.time_at_fraction(start / refined_length), 1)
+                for start, _ in post["source_spans"]
+            ]
+        posts.append(post)
+        ctx.emit("post_completed", platform=platform, index=len(posts) - 1, post=post, edited=edited, reused=reused)
+    
+    @staticmethod
+    def _edit_inputs(platform, draft):
+        """Everything an edited post depends on."""
+        return {
+            "draft": draft.get("content"),
+            "prompt": EDIT_PROMPTS[platform],
+            "config": get_stage_llm_config("editing", platform),
+            "budget": get_prompt_budget("editing", platform),
+            "quality_gate": quality_gate_config,
+            "edit_ops": edit_ops_config
+        }
+    
+    @staticmethod
+    def _quality_check(platform, draft):
+        """
+        Run the local quality gate on a draft.
+        
+        Returns:
+            list: Failures for the editor to fix (empty if the draft can skip editing),
+                  or None if the gate is disabled and every draft is edited
+        """
+        if not quality_gate_config["enabled"]:
+            return None
+        failures = check_post(platform, draft.get("content", ""), TOOL_CONFIGS["content_limits"], quality_gate_config["rules"])
+        draft["quality_gate"] = {"passed": not failures, "failures": failures}
+        if failures:
+            logging.info(f"{platform} draft needs editing: {'; '.join(failures)}")
+        return failures
+    
+    def _generate_platform_content(self, ctx, platform, plan=None):
+        """Generate content for a specific platform into the run's content data."""
         logging.info(f"Generating {platform} content")
+        content_data = ctx.content_data
+        budget = ctx.budget
+        plan = plan or {"quotas": {}, "edit": True, "deadline": None}
+        quota = plan["quotas"].get(platform, len(content_data["topics"]))
+        
+        # Lazily refined runs search the raw transcript and refine only the sections used
+        if ctx.refiner:
+            transcript, refine = content_data["transcript"], ctx.refiner.refine_range
+            transcript_input = {"lazy": ctx.refiner.artifact_inputs}
+        else:
+            transcript, refine = content_data["refined_transcript"], None
+            transcript_input = content_data["refined_transcript"]
         
         # Use all topics for each platform since we're not separating them by platform anymore
-        for topic in self.content_data["topics"]:
-            # Generate content
-            generation_func = f"generate_{platform}_post"
+        for index, topic in enumerate(content_data["topics"][:quota]):
+            topic_key = fingerprint(topic)[:16]
+            draft_name = f"{platform}_draft_{topic_key}"
+            draft_inputs = {
+                "topic": topic,
+                "refined_transcript": transcript_input,
+                "prompt": GENERATION_PROMPTS[platform],
+                "config": [get_stage_llm_config("generation", platform), get_stage_llm_config("summary")],
+                "budget": get_prompt_budget("generation", platform),
+                "limits": TOOL_CONFIGS["content_limits"][platform]
+            }
+            edit_name = f"{platform}_edit_{topic_key}"
             
-            # Call the appropriate function directly
-            if platform == "blog":
-                result = generate_blog_post(topic, self.content_data["refined_transcript"])
-            elif platform == "linkedin":
-                result = generate_linkedin_post(topic, self.content_data["refined_transcript"])
-            elif platform == "twitter":
-                result = generate_twitter_post(topic, self.content_data["refined_transcript"])
-            else:
+            # Reuse the draft and its edit if neither is stale (a draft that
+            # passes the quality gate needs no edit)
+            result = self._load_artifact(ctx, draft_name, draft_inputs)
+            edited = None
+            failures = None
+            if result is not None and plan["edit"]:
+                failures = self._quality_check(platform, result)
+                if failures != []:
+                    edited = self._load_artifact(ctx, edit_name, self._edit_inputs(platform, result))
+            if result is not None and (edited or not plan["edit"] or failures == []):
+                self._add_post(ctx, platform, edited or result, edited=edited is not None, reused=True)
+                continue
+            
+            # Stop early rather than start a post we can't finish
+            needed_calls = GENERATION_CALLS[platform] if result is None else 1
+            if not self._has_time_for(plan, needed_calls * estimate_call_seconds()):
+                budget.degrade(
+                    "quota_cut",
+                    f"Ran out of time while generating {platform} posts",
+                    platform=platform,
+                    posts_generated=index
+                )
+                break
+            
+            if result is None:
+                # Generate content
+                generation_func = f"generate_{platform}_post"
+                
+                # Call the appropriate function directly
+                if platform == "blog":
+                    result = generate_blog_post(topic, transcript, refine=refine)
+                elif platform == "linkedin":
+                    result = generate_linkedin_post(topic, transcript, refine=refine)
+                elif platform == "twitter":
+                    result = generate_twitter_post(topic, transcript, refine=refine)
+                else:
+                    continue
+                
+                if not result.get("success", False):
+                    logging.warning(f"Failed to generate {platform} content for topic: {topic.get('title', 'Unknown')}")
+                    continue
+                
+                self._store_artifact(ctx, draft_name, draft_inputs, result)
+                
+                if plan["edit"]:
+                    failures = self._quality_check(platform, result)
+            
+            # Drafts that pass the local checks skip the edit round trip
+            if plan["edit"] and failures == []:
+                self._add_post(ctx, platform, result, edited=False)
                 continue
             
-            if not result.get("success", False):
-                logging.warning(f"Failed to generate {platform} content for topic: {topic.get('title', 'Unknown')}")
+            # Edit content, unless the plan or the remaining time rules it out
+            if not plan["edit"] or not self._has_time_for(plan, estimate_call_seconds()):
+                if plan["edit"]:
+                    plan["edit"] = False
+                    budget.degrade("skip_edit", "Not enough time left to edit remaining posts")
+                self._add_post(ctx, platform, result, edited=False)
                 continue
             
-            # Edit content
             edit_func = f"edit_{platform}_post"
             
             # Call the appropriate editing function directly
             if platform == "blog":
-                edit_result = edit_blog_post(result["content"])
+                edit_result = edit_blog_post(result["content"], issues=failures)
             elif platform == "linkedin":
-                edit_result = edit_linkedin_post(result["content"])
+                edit_result = edit_linkedin_post(result["content"], issues=failures)
             elif platform == "twitter":
-                edit_result = edit_twitter_post(result["content"])
+                edit_result = edit_twitter_post(result["content"], issues=failures)
             else:
                 edit_result = result
             
             if not edit_result.get("success", False):
                 logging.warning(f"Failed to edit {platform} content for topic: {topic.get('title', 'Unknown')}")
                 edit_result = result
+            else:
+                edit_result.setdefault("topic", result.get("topic"))
+                edit_result.setdefault("source_spans", result.get("source_spans"))
+                self._store_artifact(ctx, edit_name, self._edit_inputs(platform, result), edit_result)
             
             # Store the content
-            self.content_data[f"{platform}_posts"].append(edit_result)
\ No newline at end of file
+            self._add_post(ctx, platform, edit_result, edited=edit_result is not result)
\ No newline at end of file
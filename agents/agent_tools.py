@@ -7,6 +7,20 @@ from apify_client import ApifyClient
 import google.generativeai as genai
 from dotenv import load_dotenv
 from openai import OpenAI
+from utils.hedging import RequestHedger
+from utils.llm_stats import LatencyTracker, UsageStats
+from tools.topic_dedup import select_distinct_topics
+from tools.keyphrases import extract_keyphrases, topic_skeletons
+from tools.quality_gate import strip_wrapper, fit_tweet
+from tools.transcript_quality import is_clean, score_transcript
+from tools.text_patch import parse_edit_ops, apply_edit_ops
+from tools.chunk_stitch import stitch_overlap
+from tools.transcript_store import SegmentedTranscript, format_timestamp
+from tools.caption_files import open_caption_file, caption_video_id
+from .agent_config import hedging_config, router_config, get_stage_llm_config, content_config, transcript_quality_config, edit_ops_config, compression_config, TOOL_CONFIGS
+from .llm_router import build_router
+from .prompt_builder import PromptBuilder, compact_json, compress_to_tokens
+from .run_context import get_current_run, emit_event, DeadlineExceeded
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -17,7 +31,7 @@ load_dotenv()
 # Initialize DeepSeek client
 deepseek_client = OpenAI(
     api_key=os.getenv('DEEPSEEK_API_KEY'),
-    base_url="https://api.deepseek.com/v1"
+    base_url=os.getenv('DEEPSEEK_BASE_URL', "https://api.deepseek.com/v1")
 )
 
 # Initialize Apify client
@@ -32,6 +46,164 @@ if not gemini_api_key:
 apify_client = ApifyClient(apify_api_key)
 genai.configure(api_key=gemini_api_key)
 
+# Route LLM calls across DeepSeek and Gemini (reusing the DeepSeek client above)
+llm_router = build_router(router_config, clients={"deepseek": deepseek_client})
+
+# Shared hedger for DeepSeek calls (only used when hedging_config["enabled"])
+deepseek_hedger = RequestHedger(
+    percentile=hedging_config["percentile"],
+    min_samples=hedging_config["min_samples"],
+    min_delay=hedging_config["min_delay"],
+    budget_ratio=hedging_config["budget_ratio"],
+    budget_burst=hedging_config["budget_burst"],
+    max_workers=hedging_config["max_workers"]
+)
+
+# Latencies of successful DeepSeek calls, used to plan around run deadlines
+deepseek_latencies = LatencyTracker()
+
+# Process-wide token usage and prompt-cache hits per stage (each run also keeps its own)
+llm_usage = UsageStats()
+
+def estimate_call_seconds(default=15.0):
+    """
+    Estimate how long one DeepSeek call takes, from recent calls.
+    
+    Uses the 75th percentile so budget decisions err on the side of caution.
+    """
+    if deepseek_latencies.count() < 5:
+        return default
+    return deepseek_latencies.percentile(75)
+
+# Transcript chunking, in characters (also used by the dry-run planner)
+REFINE_CHUNK_SIZE = 3000
+REFINE_CHUNK_OVERLAP = 300
+TOPIC_CHUNK_SIZE = 2000
+TOPIC_CHUNK_OVERLAP = 200
+MAX_TOPIC_CHUNKS = 3  # Topic chunks per video (fewer when the run budget is short)
+
+# Prompt instructions. These are the stable, cacheable prefix of each prompt;
+# the per-call content (transcript chunk, topic, post) is appended after them.
+
+REFINE_INSTRUCTIONS = """
+Please refine this transcript to improve readability and clarity.
+Fix any grammar, punctuation, or formatting issues while preserving the original meaning.
+Return only the refined text without any additional comments.
+"""
+
+TOPIC_INSTRUCTIONS = """
+Based on this part of the transcript, generate content topics according to these requirements:
+- 1 blog post topic (informative, detailed content up to 500 words)
+- 2 LinkedIn post topics (professional, insightful content up to 100 words)
+- 5 Twitter post topics (concise, engaging content up to 280 characters)
+
+Return your response in this exact JSON format:
+[
+    {
+        "title": "Catchy Title Here",
+        "description": "Brief description of the topic",
+        "key_points": ["Point 1", "Point 2", "Point 3"],
+        "target_audience": "Description of target audience",
+        "platform": "blog|linkedin|twitter"
+    }
+]
+
+Make sure to:
+1. Use proper JSON formatting with double quotes for strings
+2. Include exactly these fields: title, description, key_points (as array), target_audience, platform
+3. Return only the JSON array, no other text
+4. Focus on unique topics not covered in previous chunks
+5. Ensure each topic is appropriate for its target platform
+"""
+
+KEYPHRASE_HEADER = "Key phrases ranked by prominence across the whole transcript (base the topics on these):"
+
+SUMMARY_INSTRUCTIONS = """
+Provide a brief summary (150-200 words) of this transcript focused on the core ideas and insights
+relevant to the topic given after it. Return only the summary text.
+"""
+
+BLOG_INSTRUCTIONS = """
+Create a blog post (max 500 words) based on the topic and transcript information below.
+
+Guidelines:
+- Start with a clear title using markdown heading (# Title)
+- Engaging introduction
+- Clear structure with subheadings
+- Professional tone
+- Actionable insights
+- Strong conclusion
+
+Return the blog post with proper markdown formatting.
+"""
+
+LINKEDIN_INSTRUCTIONS = """
+Create a professional LinkedIn post (max 100 words) based on the topic and transcript below.
+
+Guidelines:
+- Professional tone
+- Provide value or insight
+- Clear structure (intro, key point, conclusion)
+- Include 2-3 relevant hashtags
+- End with a question or call-to-action
+
+Return only the LinkedIn post text.
+"""
+
+TWITTER_INSTRUCTIONS = """
+Create an engaging tweet (max 280 characters) based on the topic and transcript below.
+
+Guidelines:
+- Attention-grabbing
+- Clear message
+- Include hashtags
+- Encourage engagement
+
+Return only the tweet text.
+"""
+
+BLOG_EDIT_INSTRUCTIONS = """
+Edit and improve the blog post below while maintaining its core message.
+Focus on:
+- Clarity and flow
+- Grammar and style
+- Engagement
+- Professional tone
+
+Return the edited post only.
+"""
+
+LINKEDIN_EDIT_INSTRUCTIONS = """
+Edit and improve the LinkedIn post below while maintaining its core message.
+Focus on:
+- Professional tone
+- Clear value proposition
+- Engagement
+- Appropriate hashtags
+
+Return the edited post only.
+"""
+
+TWITTER_EDIT_INSTRUCTIONS = """
+Edit and improve the tweet below while maintaining its core message.
+Ensure it's within 280 characters.
+Focus on:
+- Impact and clarity
+- Engagement
+- Appropriate hashtags
+
+Return the edited tweet only.
+"""
+
+EDIT_OPS_FORMAT = """
+Do not return the full text. Return only your changes, as a JSON array of edit operations:
+[{"find": "exact text copied from the input", "replace": "new text"}]
+- Each "find" must appear exactly once in the input; include enough neighbouring words to make it unique
+- Operations must not overlap; use an empty "replace" to delete text
+- Return [] if nothing needs to change
+Return only the JSON array.
+"""
+
 # Tool functions for agents
 
 def validate_youtube_url(url):
@@ -69,12 +241,108 @@ def validate_youtube_url(url):
             "error": "Invalid YouTube URL format. Please provide a valid YouTube URL."
         }
 
-def extract_youtube_transcript(url):
+def _run_transcript_actor(url, output_format, deadline):
+    """
+    Run the Apify YouTube transcript actor for one video.
+    
+    Args:
+        url (str): The YouTube URL
+        output_format (str): The actor's outputFormat ("textWithTimestamps" or "captions")
+        deadline (float): Absolute time.time() by which the run must finish
+        
+    Returns:
+        dict: {"success": True, "video_data": the dataset item} or {"success": False, "error"}
+    """
+    # Prepare the Actor input
+    run_input = {
+        "outputFormat": output_format,
+        "urls": [url],
+        "maxRetries": 8,
+        "channelHandleBoolean": True,
+        "channelNameBoolean": True,
+        "channelIDBoolean": False,
+        "subscriberCountBoolean": False,
+        "dateTextBoolean": False,
+        "relativeDateTextBoolean": True,
+        "datePublishedBoolean": True,
+        "uploadDateBoolean": False,
+        "viewCountBoolean": False,
+        "likesBoolean": False,
+        "commentsBoolean": False,
+        "keywordsBoolean": False,
+        "thumbnailBoolean": False,
+        "descriptionBoolean": False,
+        "proxyOptions": {
+            "useApifyProxy": True,
+            "apifyProxyGroups": [
+                "RESIDENTIAL"
+            ],
+            "apifyProxyCountry": "LK"
+        },
+    }
+    
+    # Run the YouTube transcript Actor and wait for it to finish (at most until the deadline)
+    logging.info(f"Starting YouTube Actor run (outputFormat={output_format})...")
+    run = apify_client.actor("1s7eXiaukVuOr4Ueg").call(
+        run_input=run_input,
+        wait_secs=max(1, int(deadline - time.time()))
+    )
+    
+    # Check the run status
+    run_info = apify_client.run(run["id"]).get()
+    
+    while run_info['status'] in ['RUNNING', 'READY']:
+        if time.time() > deadline:
+            return {
+                "success": False,
+                "error": "Extraction timeout. The operation took too long to complete."
+            }
+        
+        logging.info(f"Current status: {run_info['status']}. Waiting...")
+        time.sleep(5)
+        run_info = apify_client.run(run["id"]).get()
+    
+    if run_info['status'] != 'SUCCEEDED':
+        error_message = run_info.get('errorMessage', 'Unknown error occurred')
+        return {
+            "success": False,
+            "error": f"Actor run failed: {error_message}"
+        }
+    
+    logging.info(f"Actor run completed successfully. Dataset ID: {run['defaultDatasetId']}")
+    
+    # Fetch results from the dataset
+    items = list(apify_client.dataset(run["defaultDatasetId"]).iterate_items())
+    
+    if not items:
+        return {
+            "success": False,
+            "error": "No transcript data found. The video might not have captions available."
+        }
+    
+    # Extract transcript data from items
+    video_data = items[0]  # Assuming we're only processing one video
+    
+    # Check if captions exist
+    if 'captions' not in video_data or not video_data['captions']:
+        return {
+            "success": False,
+            "error": "No captions found in the video data."
+        }
+    return {"success": True, "video_data": video_data}
+
+def extract_youtube_transcript(url, deadline=None):
     """
     Extracts transcript from a YouTube video using Apify.
     
+    The actor is asked for timestamped captions first, so posts can cite
+    source times; if its items come back without timings, the run is repeated
+    with the plain caption format (see TOOL_CONFIGS["extraction"]["output_formats"]).
+    
     Args:
         url (str): The YouTube URL to extract transcript from
+        deadline (float): Absolute time.time() by which extraction must finish
+            (defaults to TOOL_CONFIGS["timeouts"]["extraction"] from now)
         
     Returns:
         dict: A dictionary with extraction result and transcript if successful
@@ -87,125 +355,70 @@ def extract_youtube_transcript(url):
     logging.info(f"Extracting transcript from YouTube URL: {url}")
     
     try:
-        # Prepare the Actor input
-        run_input = {
-            "outputFormat": "captions",
-            "urls": [url],
-            "maxRetries": 8,
-            "channelHandleBoolean": True,
-            "channelNameBoolean": True,
-            "channelIDBoolean": False,
-            "subscriberCountBoolean": False,
-            "dateTextBoolean": False,
-            "relativeDateTextBoolean": True,
-            "datePublishedBoolean": True,
-            "uploadDateBoolean": False,
-            "viewCountBoolean": False,
-            "likesBoolean": False,
-            "commentsBoolean": False,
-            "keywordsBoolean": False,
-            "thumbnailBoolean": False,
-            "descriptionBoolean": False,
-            "proxyOptions": {
-                "useApifyProxy": True,
-                "apifyProxyGroups": [
-                    "RESIDENTIAL"
-                ],
-                "apifyProxyCountry": "LK"
-            },
-        }
-
-        # Run the YouTube transcript Actor and wait for it to finish
-        logging.info("Starting YouTube Actor run...")
-        run = apify_client.actor("1s7eXiaukVuOr4Ueg").call(run_input=run_input)
+        if deadline is None:
+            deadline = time.time() + TOOL_CONFIGS["timeouts"]["extraction"]
+        
+        output_formats = TOOL_CONFIGS["extraction"]["output_formats"]
+        video_data = None
+        segments = None
+        for index, output_format in enumerate(output_formats):
+            if video_data is not None and time.time() >= deadline:
+                logging.warning("No time left to rerun the actor; keeping the captions without timings")
+                break
+            actor_result = _run_transcript_actor(url, output_format, deadline)
+            if not actor_result["success"]:
+                if video_data is not None:
+                    logging.warning(f"Fallback actor run failed ({actor_result['error']}); keeping the earlier captions")
+                    break
+                return actor_result
+            
+            captions_list = actor_result["video_data"].get('captions', [])
+            logging.info(f"Attempting to join {len(captions_list)} caption items.")
+            try:
+                # Join and clean up the captions, keeping segment boundaries
+                # (and timestamps, when the captions carry them)
+                joined = SegmentedTranscript.from_captions(captions_list)
+                logging.info("Successfully joined captions.")
+            except Exception as join_err:
+                logging.error(f"Error joining captions list: {join_err}")
+                joined = None
+            
+            # A fallback run only replaces captions that produced no text
+            if segments is None or not segments.text.strip() or (joined is not None and joined.text.strip()):
+                video_data, segments = actor_result["video_data"], joined
+            if segments is not None and segments.text.strip() and segments.has_timestamps:
+                break
+            if index + 1 < len(output_formats):
+                logging.warning(
+                    f"Actor output '{output_format}' has no caption timings; "
+                    f"retrying with '{output_formats[index + 1]}'"
+                )
         
-        # Check the run status
-        run_info = apify_client.run(run["id"]).get()
+        transcript_text = segments.text if segments is not None else ""
         
-        # Wait for completion with a timeout
-        max_wait_time = 600  # 10 minutes timeout for longer videos
-        start_time = time.time()
+        # Log final text using WARNING level BEFORE the check
+        logging.warning(f"Transcript extracted successfully (first 500 chars for log only): '{transcript_text[:500]}...'")
         
-        while run_info['status'] in ['RUNNING', 'READY']:
-            if time.time() - start_time > max_wait_time:
-                return {
-                    "success": False,
-                    "error": "Extraction timeout. The operation took too long to complete."
-                }
-            
-            logging.info(f"Current status: {run_info['status']}. Waiting...")
-            time.sleep(5)
-            run_info = apify_client.run(run["id"]).get()
-        
-        if run_info['status'] == 'SUCCEEDED':
-            logging.info(f"Actor run completed successfully. Dataset ID: {run['defaultDatasetId']}")
-            
-            # Fetch results from the dataset
-            items = list(apify_client.dataset(run["defaultDatasetId"]).iterate_items())
-            
-            if not items:
-                return {
-                    "success": False,
-                    "error": "No transcript data found. The video might not have captions available."
-                }
-            
-            # Extract transcript data from items
-            video_data = items[0]  # Assuming we're only processing one video
-            
-            # Check if captions exist
-            if 'captions' not in video_data or not video_data['captions']:
-                return {
-                    "success": False,
-                    "error": "No captions found in the video data."
-                }
-            
-            # Process the transcript into a cleaner format
-            transcript_text = ""
-            captions_list = video_data.get('captions', [])
-            
-            if captions_list:
-                logging.info(f"Attempting to join {len(captions_list)} caption items.")
-                try:
-                    # Join captions and clean up
-                    transcript_text = " ".join(captions_list)
-                    # Clean up any HTML entities and extra spaces
-                    transcript_text = transcript_text.replace('&#39;', "'")
-                    transcript_text = re.sub(r'\s+', ' ', transcript_text).strip()
-                    logging.info("Successfully joined captions.")
-                except Exception as join_err:
-                    logging.error(f"Error joining captions list: {join_err}")
-                    transcript_text = ""
-            else:
-                logging.warning("Captions list is empty after retrieving from video_data.")
-
-            # Log final text using WARNING level BEFORE the check
-            logging.warning(f"Transcript extracted successfully (first 500 chars for log only): '{transcript_text[:500]}...'")
-            
-            # Check if transcript is empty OR whitespace only
-            if not transcript_text or not transcript_text.strip():
-                logging.error("Failed to process captions into non-empty transcript text.")
-                return {
-                    "success": False,
-                    "error": "Failed to process captions into transcript (empty or whitespace only)"
-                }
-            
-            # Return successful result with transcript and video info
-            return {
-                "success": True,
-                "video_info": {
-                    "title": video_data.get('title', 'Unknown Title'),
-                    "channel": video_data.get('channelName', 'Unknown Channel'),
-                    "published_date": video_data.get('datePublished', 'Unknown Date')
-                },
-                "transcript": transcript_text,
-                "raw_data": video_data  # Keep raw data for debugging if needed
-            }
-        else:
-            error_message = run_info.get('errorMessage', 'Unknown error occurred')
+        # Check if transcript is empty OR whitespace only
+        if not transcript_text or not transcript_text.strip():
+            logging.error("Failed to process captions into non-empty transcript text.")
             return {
                 "success": False,
-                "error": f"Actor run failed: {error_message}"
+                "error": "Failed to process captions into transcript (empty or whitespace only)"
             }
+        
+        # Return successful result with transcript and video info
+        return {
+            "success": True,
+            "video_info": {
+                "title": video_data.get('title', 'Unknown Title'),
+                "channel": video_data.get('channelName', 'Unknown Channel'),
+                "published_date": video_data.get('datePublished', 'Unknown Date')
+            },
+            "transcript": transcript_text,
+            "segments": segments.to_dict(),
+            "raw_data": video_data  # Keep raw data for debugging if needed
+        }
     
     except Exception as e:
         logging.error(f"Error during transcript extraction: {str(e)}")
@@ -214,31 +427,269 @@ def extract_youtube_transcript(url):
             "error": f"Extraction error: {str(e)}"
         }
 
-def call_deepseek_with_retry(prompt, max_retries=3, initial_wait=2):
+def extract_caption_file(path):
     """
-    Call DeepSeek API with retry logic for rate limits.
+    Reads a transcript from a local VTT, SRT or JSON caption file.
+    
+    Produces the same shape as extract_youtube_transcript, so the rest of the
+    pipeline runs unchanged, without an Apify actor run.
+    
+    Args:
+        path (str): The caption file
+        
+    Returns:
+        dict: A dictionary with extraction result and transcript if successful
     """
+    logging.info(f"Reading transcript from caption file: {path}")
+    
+    try:
+        captions, metadata = open_caption_file(path)
+        segments = SegmentedTranscript.from_captions(captions)
+        
+        if not segments.text.strip():
+            return {
+                "success": False,
+                "error": f"No caption text found in {path}"
+            }
+        
+        logging.info(f"Read {len(segments)} caption segments ({len(segments.text)} characters) from {path}")
+        return {
+            "success": True,
+            "video_id": caption_video_id(path, metadata),
+            "video_info": {
+                "title": metadata["title"],
+                "channel": metadata["channel"],
+                "published_date": metadata["published_date"]
+            },
+            "transcript": segments.text,
+            "segments": segments.to_dict(),
+            "raw_data": {"source_file": path}
+        }
+    
+    except Exception as e:
+        logging.error(f"Error reading caption file {path}: {str(e)}")
+        return {
+            "success": False,
+            "error": f"Caption file error: {str(e)}"
+        }
+
+def _is_rate_limit(error):
+    """Whether an LLM error (from any provider, possibly wrapped by the router) is a rate limit."""
+    message = str(error).lower()
+    return "429" in message or "rate limit" in message or "resource exhausted" in message
+
+def call_deepseek_with_retry(prompt, max_retries=3, initial_wait=2, stage=None, platform=None):
+    """
+    Call the LLM with retry logic for rate limits.
+    
+    Requests go through llm_router, which prefers DeepSeek but fails over to
+    other configured providers (Gemini) according to the stage's routing policy.
+    
+    When hedging_config["enabled"] is set, slow attempts are hedged with a
+    duplicate request (see utils/hedging.py).
+    
+    Inside a run with a deadline, each request's timeout is capped at the time
+    remaining and retries that cannot finish in time are not attempted.
+    
+    Model, temperature and max_tokens come from stage_llm_config for the
+    stage/platform. If a right-sized completion is cut off at max_tokens, the
+    call is repeated once with the default limit.
+    
+    Args:
+        prompt (str): The user prompt
+        max_retries (int): Attempts before giving up
+        initial_wait (float): Seconds before the first retry (doubles each time)
+        stage (str): Pipeline stage, used for routing policy and model settings
+        platform (str): Target platform for generation/editing stages
+    
+    Raises:
+        DeadlineExceeded: If the current run has no time left
+    """
+    params = get_stage_llm_config(stage, platform)
+    default_max_tokens = get_stage_llm_config()["max_tokens"]
+    run = get_current_run()
+    
     for attempt in range(1, max_retries + 1):
+        if run:
+            remaining = run.budget.remaining()
+            if remaining <= 0:
+                raise DeadlineExceeded("Run deadline reached before LLM call")
+            if remaining != float("inf"):
+                params["timeout"] = remaining
+        
+        # Usage and hedging latencies are kept per platform for generation/editing, whose outputs differ most
+        usage_key = f"{stage}:{platform}" if stage and platform else stage
+        start_time = time.time()
         try:
-            response = deepseek_client.chat.completions.create(
-                model="deepseek-chat",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.7,
-                max_tokens=2048
-            )
-            return response.choices[0].message.content
+            if hedging_config["enabled"]:
+                text, usage, provider = deepseek_hedger.call(
+                    llm_router.complete, prompt, stage=stage, platform=platform, latency_key=usage_key, **params
+                )
+            else:
+                text, usage, provider = llm_router.complete(prompt, stage=stage, platform=platform, **params)
+            deepseek_latencies.record(time.time() - start_time)
+            
+            if usage.get("finish_reason") == "length" and params["max_tokens"] < default_max_tokens:
+                logging.warning(f"{stage} output hit max_tokens={params['max_tokens']}; retrying with {default_max_tokens}")
+                params["max_tokens"] = default_max_tokens
+                text, usage, provider = llm_router.complete(prompt, stage=stage, platform=platform, **params)
+            
+            seconds = time.time() - start_time
+            llm_usage.record(usage_key, usage, seconds=seconds)
+            if run:
+                run.usage.record(usage_key, usage, seconds=seconds)
+            return text
         except Exception as e:
             if attempt == max_retries:
                 logging.error(f"Failed after {max_retries} attempts: {str(e)}")
                 raise
             wait_time = initial_wait * (2 ** (attempt - 1))
+            if run and run.budget.remaining() < wait_time + estimate_call_seconds():
+                logging.error(f"No time left in run budget to retry: {str(e)}")
+                raise
             logging.info(f"Retry attempt {attempt}/{max_retries}. Waiting {wait_time} seconds...")
+            emit_event(
+                "throttled" if _is_rate_limit(e) else "retry",
+                stage=stage, attempt=attempt, wait_seconds=wait_time, error=str(e)
+            )
             time.sleep(wait_time)
 
-def refine_transcript(transcript):
+def _edit_ops_call(text, instructions, sections, stage, platform=None):
+    """
+    Ask for edit operations against a text instead of a full rewrite, and apply them.
+    
+    Args:
+        text (str): The text being edited (included verbatim in one of the sections)
+        instructions (str): The stage's usual instructions
+        sections (list): (name, text) variable prompt sections
+        stage (str): Pipeline stage
+        platform (str): Target platform for editing
+        
+    Returns:
+        str: The patched text, or None if the operations were rejected (the caller rewrites)
+    """
+    builder = (
+        PromptBuilder(stage, platform=platform)
+        .add_stable("instructions", instructions)
+        .add_stable("output_format", EDIT_OPS_FORMAT)
+    )
+    for name, section in sections:
+        builder.add_variable(name, section)
+    response = call_deepseek_with_retry(builder.build(), stage=stage, platform=platform)
+    
+    ops = parse_edit_ops(response)
+    if ops is None:
+        patched, reason = None, "response is not an operation list"
+    elif len(ops) > edit_ops_config["max_ops"]:
+        patched, reason = None, f"{len(ops)} operations"
+    else:
+        patched, reason = apply_edit_ops(text, ops)
+    if patched is not None and len(patched.strip()) < edit_ops_config["min_length_ratio"] * len(text.strip()):
+        patched, reason = None, "patched text is too short"
+    
+    emit_event(
+        "edit_ops", stage=stage, platform=platform,
+        ops=len(ops) if ops is not None else None, applied=patched is not None, reason=reason
+    )
+    if patched is None:
+        logging.info(f"Edit operations for {stage} rejected ({reason}); falling back to a full rewrite")
+        return None
+    return patched.strip()
+
+def _refine_text(text, label, context="", quality=None):
+    """
+    Refine one piece of transcript text, as edit operations when it is nearly clean.
+    
+    Args:
+        text (str): Raw transcript text
+        label (str): Heading for the text in the prompt ("Transcript chunk")
+        context (str): Optional note about where the text sits in the transcript
+        quality (dict): The text's score_transcript result, if already computed
+        
+    Returns:
+        str: The refined text, or None if the model returned nothing
+    """
+    if edit_ops_config["enabled"]:
+        score = (quality or score_transcript(text))["score"]
+        if score >= edit_ops_config["refinement_min_score"]:
+            refined = _edit_ops_call(
+                text, REFINE_INSTRUCTIONS,
+                [("chunk_index", context), ("transcript", f"{label}:\n{text}")],
+                "refinement"
+            )
+            if refined is not None:
+                return refined
+    
+    # Shared instructions first; the chunk index and text vary per call
+    prompt = (
+        PromptBuilder("refinement")
+        .add_stable("instructions", REFINE_INSTRUCTIONS)
+        .add_variable("chunk_index", context)
+        .add_variable("transcript", f"{label}:\n{text}")
+        .build()
+    )
+    refined = call_deepseek_with_retry(prompt, stage="refinement")
+    return refined.strip() if refined else None
+
+def is_clean_region(text):
+    """
+    Whether a transcript region is clean enough to skip LLM refinement.
+    
+    Returns:
+        tuple: (bool, score dict from score_transcript)
+    """
+    if not transcript_quality_config["enabled"]:
+        return False, None
+    return is_clean(text, transcript_quality_config["clean_threshold"])
+
+def refine_span(text, quality=None):
+    """
+    Refine one transcript excerpt on its own (used by lazy refinement).
+    
+    Args:
+        text (str): Raw transcript excerpt
+        quality (dict): The excerpt's score_transcript result, if already computed
+        
+    Returns:
+        str: The refined excerpt, or None if the model returned nothing
+    """
+    return _refine_text(text, "Transcript excerpt", quality=quality)
+
+def _source_text(transcript, start, end, refine=None):
+    """transcript[start:end], refined on demand when a lazy refiner is given."""
+    return refine(start, end) if refine else transcript[start:end]
+
+def _stitch(previous, piece, stats):
+    """piece without the chunk overlap it repeats from previous; stats counts what was removed."""
+    if not content_config["stitch_refined_chunks"]:
+        return piece
+    stitched, removed = stitch_overlap(previous, piece, window_chars=2 * REFINE_CHUNK_OVERLAP)
+    stats["boundaries"] += 1
+    if removed:
+        stats["aligned"] += 1
+        stats["removed_chars"] += removed
+    return stitched
+
+def refine_transcript(transcript, deadline=None, on_chunk=None):
     """
     Refines a transcript using DeepSeek to fix errors and improve quality.
     Handles longer transcripts by processing them in chunks and joining results.
+    
+    If a deadline is given, chunks are refined in order until there is no time
+    left for another call; the rest of the transcript is passed through raw and
+    reported as "unrefined_chunks".
+    
+    If on_chunk is given, it is called with each piece of the result as soon
+    as it is ready, in order; joining the pieces with single spaces gives the
+    final refined transcript.
+    
+    Chunks that already score as clean (see is_clean_region) are passed
+    through without an LLM call; the scores are returned under "quality".
+    Nearly clean chunks are refined as edit operations (see _refine_text).
+    
+    Consecutive chunks overlap; the repeated start of each chunk is removed
+    before it is appended (see tools/chunk_stitch.py), and the characters
+    removed are reported under "stitching".
     """
     if not transcript:
         return {
@@ -250,65 +701,120 @@ def refine_transcript(transcript):
         logging.info("Refining transcript with DeepSeek...")
         
         # Process transcript in chunks if it's long
-        max_chunk_size = 3000
+        max_chunk_size = REFINE_CHUNK_SIZE
         results = []
-        
-        if len(transcript) <= max_chunk_size:
+        unrefined_chunks = 0
+        chunk_scores = []
+        stitching = {"boundaries": 0, "aligned": 0, "removed_chars": 0}
+        clean, overall = is_clean_region(transcript)
+        
+        if clean:
+            # Already clean (e.g. manually authored captions); nothing to refine
+            logging.info(f"Transcript scores {overall['score']} for cleanliness; skipping refinement")
+            results.append(transcript.strip())
+            chunk_scores.append({"chunk": 1, "score": overall["score"], "refined": False})
+            if on_chunk:
+                on_chunk(results[-1])
+        elif len(transcript) <= max_chunk_size and deadline and time.time() + estimate_call_seconds() > deadline:
+            # No time to refine at all; downstream stages use the raw transcript
+            logging.warning("Refinement deadline reached; using raw transcript")
+            results.append(transcript.strip())
+            unrefined_chunks = 1
+            if on_chunk:
+                on_chunk(results[-1])
+        elif len(transcript) <= max_chunk_size:
             # For small transcripts, process in one go
-            prompt = f"""
-            Please refine this transcript to improve readability and clarity.
-            Fix any grammar, punctuation, or formatting issues while preserving the original meaning.
-            
-            Transcript:
-            {transcript}
-            
-            Return only the refined text without any additional comments.
-            """
-            
-            refined_chunk = call_deepseek_with_retry(prompt)
+            if overall:
+                chunk_scores.append({"chunk": 1, "score": overall["score"], "refined": True})
+            refined_chunk = _refine_text(transcript, "Transcript", quality=overall)
             if refined_chunk:
-                results.append(refined_chunk.strip())
+                results.append(refined_chunk)
+                if on_chunk:
+                    on_chunk(results[-1])
         else:
             # For longer transcripts, process in overlapping chunks
             chunks = []
-            overlap = 300  # Overlap to maintain context between chunks
+            chunk_ends = []
+            overlap = REFINE_CHUNK_OVERLAP  # Overlap to maintain context between chunks
             
             for i in range(0, len(transcript), max_chunk_size - overlap):
+                # Chunks hold whole words, so the overlap can be aligned word by word
+                start_idx = transcript.rfind(" ", 0, i) + 1 if i > 0 else 0
                 end_idx = min(i + max_chunk_size, len(transcript))
-                chunk = transcript[i:end_idx]
-                chunks.append(chunk)
+                if end_idx < len(transcript):
+                    space = transcript.find(" ", end_idx)
+                    end_idx = space if space != -1 else len(transcript)
+                chunks.append(transcript[start_idx:end_idx])
+                chunk_ends.append(end_idx)
+                if end_idx == len(transcript):
+                    break
             
             logging.info(f"Processing transcript in {len(chunks)} chunks")
             
+            previous_chunk = None  # Index of the chunk results[-1] came from
             for i, chunk in enumerate(chunks):
+                if deadline and time.time() + estimate_call_seconds() > deadline:
+                    # Out of time: keep what we refined and append the rest raw,
+                    # skipping the part the last refined chunk already covered
+                    raw_start = chunk_ends[i - 1] if i > 0 else 0
+                    results.append(transcript[raw_start:].strip())
+                    if on_chunk:
+                        on_chunk(results[-1])
+                    unrefined_chunks = len(chunks) - i
+                    logging.warning(f"Refinement deadline reached; {unrefined_chunks} of {len(chunks)} chunks left unrefined")
+                    break
+                
+                chunk_clean, quality = is_clean_region(chunk)
+                if quality:
+                    chunk_scores.append({"chunk": i + 1, "score": quality["score"], "refined": not chunk_clean})
+                if chunk_clean:
+                    piece = chunk.strip()
+                    if previous_chunk == i - 1:
+                        piece = _stitch(results[-1], piece, stitching)
+                    if piece:
+                        results.append(piece)
+                        previous_chunk = i
+                        if on_chunk:
+                            on_chunk(results[-1])
+                    logging.info(f"Chunk {i+1}/{len(chunks)} is already clean; skipped refinement")
+                    emit_event("chunk_progress", stage="refinement", chunk=i + 1, total=len(chunks))
+                    continue
+                
                 context = ""
                 if i > 0:
                     context = f"This is continuation of a longer transcript (chunk {i+1} of {len(chunks)})."
                 
-                prompt = f"""
-                Please refine this transcript chunk to improve readability and clarity.
-                Fix any grammar, punctuation, or formatting issues while preserving the original meaning.
-                {context}
-                
-                Transcript chunk:
-                {chunk}
-                
-                Return only the refined text without any additional comments.
-                """
-                
-                refined_chunk = call_deepseek_with_retry(prompt)
+                refined_chunk = _refine_text(chunk, "Transcript chunk", context, quality=quality)
                 if refined_chunk:
-                    results.append(refined_chunk.strip())
+                    if previous_chunk == i - 1:
+                        refined_chunk = _stitch(results[-1], refined_chunk, stitching)
+                    if refined_chunk:
+                        results.append(refined_chunk)
+                        previous_chunk = i
+                        if on_chunk:
+                            on_chunk(results[-1])
                     logging.info(f"Processed chunk {i+1}/{len(chunks)}")
                 else:
                     logging.warning(f"Failed to refine chunk {i+1}/{len(chunks)}")
+                emit_event("chunk_progress", stage="refinement", chunk=i + 1, total=len(chunks))
+        
+        if stitching["removed_chars"]:
+            logging.info(f"Stitching removed {stitching['removed_chars']} repeated characters at {stitching['aligned']} chunk boundaries")
         
         # Combine all refined chunks
         if results:
             refined_transcript = " ".join(results)
             return {
                 "success": True,
-                "refined_transcript": refined_transcript
+                "refined_transcript": refined_transcript,
+                "unrefined_chunks": unrefined_chunks,
+                "quality": {
+                    "score": overall["score"] if overall else None,
+                    "signals": overall["signals"] if overall else None,
+                    "skipped_chunks": sum(1 for entry in chunk_scores if not entry["refined"]),
+                    "chunks": chunk_scores
+                },
+                "stitching": stitching
             }
         else:
             return {
@@ -323,56 +829,108 @@ def refine_transcript(transcript):
             "error": f"Refinement error: {str(e)}"
         }
 
-def generate_content_topics(transcript, content_type="all"):
+def topic_prefix_chars(max_chunks=MAX_TOPIC_CHUNKS):
+    """Characters of the refined transcript generate_content_topics reads with max_chunks chunks."""
+    return TOPIC_CHUNK_SIZE + (max_chunks - 1) * (TOPIC_CHUNK_SIZE - TOPIC_CHUNK_OVERLAP)
+
+def _keyphrase_candidates(transcript, limit=12):
+    """The transcript's top keyphrases as prompt lines, best first, each with an example sentence."""
+    return [
+        f"- {phrase['phrase']} ({phrase['count']} mentions): {phrase['sentences'][0][1].strip()[:160]}"
+        for phrase in extract_keyphrases(transcript, limit=limit)
+    ]
+
+def generate_keyphrase_topics(transcript):
+    """
+    Build topics locally from the transcript's keyphrases, without DeepSeek.
+    
+    Args:
+        transcript (str): The (refined) transcript
+        
+    Returns:
+        dict: Same shape as generate_content_topics
+    """
+    candidates = topic_skeletons(transcript, content_config["posts_per_platform"])
+    if not candidates:
+        return {
+            "success": False,
+            "error": "No keyphrases found in the transcript."
+        }
+    filtered_topics, duplicates = select_distinct_topics(
+        candidates,
+        content_config["posts_per_platform"],
+        threshold=content_config["topic_similarity_threshold"]
+    )
+    return {
+        "success": True,
+        "topics": filtered_topics,
+        "duplicates_removed": duplicates
+    }
+
+def generate_content_topics(transcript, content_type="all", max_chunks=3, deadline=None):
     """
     Generate content topics based on the transcript.
     Handles longer transcripts by processing them in chunks.
+    
+    content_config["topic_mode"] selects how:
+        "llm"     one DeepSeek call per chunk (up to max_chunks)
+        "seeded"  a single call on the first chunk, given the keyphrases of the whole transcript
+        "fast"    topics built locally from keyphrases (generate_keyphrase_topics), no LLM call
+    
+    Args:
+        transcript (str): The (refined) transcript
+        content_type (str): Unused, kept for the agent function map
+        max_chunks (int): Maximum transcript chunks (and DeepSeek calls) to use
+        deadline (float): Stop starting new chunk calls after this time once
+            at least one chunk produced topics
     """
+    mode = content_config["topic_mode"]
+    if mode == "fast":
+        result = generate_keyphrase_topics(transcript)
+        if result["success"]:
+            logging.info(f"Built {len(result['topics'])} topics from keyphrases")
+            return result
+        logging.warning(f"{result['error']} Falling back to DeepSeek topics")
+        mode = "llm"
+    
     try:
         logging.info("Generating content topics with DeepSeek...")
         
-        # Split transcript into chunks of 2000 characters with 200 char overlap
-        chunk_size = 2000
-        overlap = 200
+        candidates = []
+        if mode == "seeded":
+            candidates = _keyphrase_candidates(transcript)
+            if candidates:
+                max_chunks = 1
+        
+        # Split transcript into overlapping chunks
+        chunk_size = TOPIC_CHUNK_SIZE
+        overlap = TOPIC_CHUNK_OVERLAP
         chunks = []
         
         for i in range(0, len(transcript), chunk_size - overlap):
             chunk = transcript[i:i + chunk_size]
             chunks.append(chunk)
-            if len(chunks) >= 3:  # Limit to first 3 chunks (6000 chars) to avoid too many API calls
+            if len(chunks) >= max_chunks:  # Limit to first chunks (3 = 6000 chars) to avoid too many API calls
                 break
         
+        if compression_config["enabled"]:
+            chunks = [compress_to_tokens(chunk, compression_config["topic_tokens"]) for chunk in chunks]
+        
         all_topics = []
-        for chunk in chunks:
-            prompt = f"""
-            Based on this part of the transcript, generate content topics according to these requirements:
-            - 1 blog post topic (informative, detailed content up to 500 words)
-            - 2 LinkedIn post topics (professional, insightful content up to 100 words)
-            - 5 Twitter post topics (concise, engaging content up to 280 characters)
-            
-            Return your response in this exact JSON format:
-            [
-                {{
-                    "title": "Catchy Title Here",
-                    "description": "Brief description of the topic",
-                    "key_points": ["Point 1", "Point 2", "Point 3"],
-                    "target_audience": "Description of target audience",
-                    "platform": "blog|linkedin|twitter"
-                }}
-            ]
-            
-            Make sure to:
-            1. Use proper JSON formatting with double quotes for strings
-            2. Include exactly these fields: title, description, key_points (as array), target_audience, platform
-            3. Return only the JSON array, no other text
-            4. Focus on unique topics not covered in previous chunks
-            5. Ensure each topic is appropriate for its target platform
-            
-            Transcript chunk:
-            {chunk}
-            """
-            
-            response = call_deepseek_with_retry(prompt)
+        for index, chunk in enumerate(chunks):
+            if all_topics and deadline and time.time() + estimate_call_seconds() > deadline:
+                logging.warning("Topic generation deadline reached; using topics generated so far")
+                break
+            
+            prompt = (
+                PromptBuilder("topics")
+                .add_stable("instructions", TOPIC_INSTRUCTIONS)
+                .add_context("candidates", candidates, header=KEYPHRASE_HEADER if candidates else None)
+                .add_variable("transcript", f"Transcript chunk:\n{chunk}")
+                .build()
+            )
+            
+            response = call_deepseek_with_retry(prompt, stage="topics")
             
             if response:
                 try:
@@ -386,20 +944,21 @@ def generate_content_topics(transcript, content_type="all"):
                 except json.JSONDecodeError as e:
                     logging.error(f"JSON Parse Error for chunk: {str(e)}")
                     logging.error(f"Raw Response: {response}")
-                    continue
+            emit_event("chunk_progress", stage="topics", chunk=index + 1, total=len(chunks))
         
         if all_topics:
-            # Filter and limit topics by platform
-            blog_topics = [t for t in all_topics if t.get("platform") == "blog"][:1]
-            linkedin_topics = [t for t in all_topics if t.get("platform") == "linkedin"][:2]
-            twitter_topics = [t for t in all_topics if t.get("platform") == "twitter"][:5]
-            
-            # Combine filtered topics
-            filtered_topics = blog_topics + linkedin_topics + twitter_topics
+            # Filter and limit topics by platform, collapsing near-duplicates
+            # and backfilling from the remaining candidates
+            filtered_topics, duplicates = select_distinct_topics(
+                [t for t in all_topics if isinstance(t, dict)],
+                content_config["posts_per_platform"],
+                threshold=content_config["topic_similarity_threshold"]
+            )
             
             return {
                 "success": True,
-                "topics": filtered_topics
+                "topics": filtered_topics,
+                "duplicates_removed": duplicates
             }
         else:
             return {
@@ -414,26 +973,29 @@ def generate_content_topics(transcript, content_type="all"):
             "error": f"Topic generation error: {str(e)}"
         }
 
-def generate_blog_post(topic, transcript):
+def generate_blog_post(topic, transcript, refine=None):
     """
     Generate a blog post based on the topic and transcript.
     Uses a topic-aware search approach to find the most relevant sections of the transcript.
+    
+    With refine (a lazy refiner's refine_range), sections are found in the raw
+    transcript and only the ones used are refined.
     """
     try:
         # Create a summary of the transcript to use for context
-        summary_prompt = f"""
-        Provide a brief summary (150-200 words) of this transcript focused on the core ideas and insights:
-        
-        Topic:
-        {json.dumps(topic, indent=2)}
-        
-        Transcript (first part):
-        {transcript[:min(5000, len(transcript))]}
-        
-        Return only the summary text.
-        """
-        
-        transcript_summary = call_deepseek_with_retry(prompt=summary_prompt)
+        # The transcript excerpt is the same for every topic, so it goes before the topic
+        opening = _source_text(transcript, 0, min(5000, len(transcript)), refine)[:5000]
+        if compression_config["enabled"]:
+            opening = compress_to_tokens(opening, compression_config["summary_tokens"])
+        summary_prompt = (
+            PromptBuilder("summary")
+            .add_stable("instructions", SUMMARY_INSTRUCTIONS)
+            .add_stable("transcript", f"Transcript (first part):\n{opening}")
+            .add_variable("topic", f"Topic:\n{compact_json(topic)}")
+            .build()
+        )
+        
+        transcript_summary = call_deepseek_with_retry(prompt=summary_prompt, stage="summary")
         
         # Find relevant sections based on keyword matching
         key_terms = topic["key_points"] + [topic["title"], topic["description"]]
@@ -460,59 +1022,41 @@ def generate_blog_post(topic, transcript):
                     score += 1
                     
             if score > 0:
-                transcript_chunks.append({"text": chunk, "score": score})
+                transcript_chunks.append({"text": chunk, "score": score, "start": i})
         
         # Sort chunks by relevance score
         transcript_chunks.sort(key=lambda x: x["score"], reverse=True)
         
         # Take top 3 most relevant chunks
-        relevant_chunks = [chunk["text"] for chunk in transcript_chunks[:3]]
+        source_spans = [(chunk["start"], chunk["start"] + len(chunk["text"])) for chunk in transcript_chunks[:3]]
         
         # If no relevant chunks found, use the beginning, middle and end sections
-        if not relevant_chunks and len(transcript) > 3000:
-            start_chunk = transcript[:1000]
+        if not source_spans and len(transcript) > 3000:
             mid_point = len(transcript) // 2
-            mid_chunk = transcript[mid_point-500:mid_point+500]
-            end_chunk = transcript[-1000:]
-            relevant_chunks = [start_chunk, mid_chunk, end_chunk]
-        elif not relevant_chunks:
+            source_spans = [(0, 1000), (mid_point - 500, mid_point + 500), (len(transcript) - 1000, len(transcript))]
+        elif not source_spans:
             # For short transcripts, use the whole thing
-            relevant_chunks = [transcript]
+            source_spans = [(0, len(transcript))]
+        relevant_chunks = [_source_text(transcript, start, end, refine) for start, end in source_spans]
             
-        # Combine chunks and summary for context
-        context = "\n\n".join([
-            f"SUMMARY: {transcript_summary}",
-            "RELEVANT SECTIONS:",
-            *relevant_chunks
-        ])
-        
-        prompt = f"""
-        Create a blog post (max 500 words) based on this topic and transcript information.
-        
-        Topic:
-        {json.dumps(topic, indent=2)}
-        
-        Context from transcript:
-        {context}
-        
-        Guidelines:
-        - Start with a clear title using markdown heading (# Title)
-        - Engaging introduction
-        - Clear structure with subheadings
-        - Professional tone
-        - Actionable insights
-        - Strong conclusion
-        
-        Return the blog post with proper markdown formatting.
-        """
-        
-        blog_content = call_deepseek_with_retry(prompt)
+        # The summary and the most relevant chunks are packed into the prompt budget in that order
+        prompt = (
+            PromptBuilder("generation", platform="blog")
+            .add_stable("instructions", BLOG_INSTRUCTIONS)
+            .add_variable("topic", f"Topic:\n{compact_json(topic)}")
+            .add_context("summary", [transcript_summary], header="Context from transcript:\nSUMMARY:")
+            .add_context("relevant_sections", relevant_chunks, header="RELEVANT SECTIONS:")
+            .build()
+        )
+        
+        blog_content = call_deepseek_with_retry(prompt, stage="generation", platform="blog")
         
         if blog_content:
             return {
                 "success": True,
                 "content": blog_content.strip(),
-                "topic": topic["title"]
+                "topic": topic["title"],
+                "source_spans": source_spans
             }
         else:
             return {
@@ -527,9 +1071,11 @@ def generate_blog_post(topic, transcript):
             "error": f"Blog generation error: {str(e)}"
         }
 
-def generate_twitter_post(topic, transcript):
+def generate_twitter_post(topic, transcript, refine=None):
     """
     Generate a Twitter post based on the topic and transcript.
+    
+    With refine, the best section is found in the raw transcript and only it is refined.
     """
     try:
         # Find relevant section for this specific topic
@@ -540,6 +1086,7 @@ def generate_twitter_post(topic, transcript):
         # Find most relevant part of transcript for this topic
         best_chunk = ""
         best_score = 0
+        best_start = 0
         
         # Scan transcript in smaller chunks for relevance
         chunk_size = 500
@@ -562,43 +1109,34 @@ def generate_twitter_post(topic, transcript):
             if score > best_score:
                 best_score = score
                 best_chunk = chunk
+                best_start = i
         
         # If no high-scoring chunk found, use first 500 chars
         if best_score == 0:
             reference_text = transcript[:min(500, len(transcript))]
         else:
             reference_text = best_chunk
+        source_spans = [(best_start, best_start + len(reference_text))]
+        reference_text = _source_text(transcript, best_start, best_start + len(reference_text), refine)
             
-        prompt = f"""
-        Create an engaging tweet (max 280 characters) based on this topic and transcript.
+        prompt = (
+            PromptBuilder("generation", platform="twitter")
+            .add_stable("instructions", TWITTER_INSTRUCTIONS)
+            .add_variable("topic", f"Topic:\n{compact_json(topic)}")
+            .add_context("context", [reference_text], header="Reference material:")
+            .build()
+        )
         
-        Topic:
-        {json.dumps(topic, indent=2)}
-        
-        Reference material:
-        {reference_text}
-        
-        Guidelines:
-        - Attention-grabbing
-        - Clear message
-        - Include hashtags
-        - Encourage engagement
-        
-        Return only the tweet text.
-        """
-        
-        tweet_content = call_deepseek_with_retry(prompt)
+        tweet_content = call_deepseek_with_retry(prompt, stage="generation", platform="twitter")
         
         if tweet_content:
-            # Ensure tweet length
-            tweet = tweet_content.strip()
-            if len(tweet) > 280:
-                tweet = tweet[:277] + "..."
-                
+            # Length is enforced by the quality gate / editor rather than by
+            # cutting the draft mid-sentence here
             return {
                 "success": True,
-                "content": tweet,
-                "topic": topic["title"]
+                "content": strip_wrapper(tweet_content),
+                "topic": topic["title"],
+                "source_spans": source_spans
             }
         else:
             return {
@@ -613,31 +1151,43 @@ def generate_twitter_post(topic, transcript):
             "error": f"Twitter generation error: {str(e)}"
         }
 
-def edit_blog_post(post_content):
+def _format_issues(issues):
+    """Edit prompt section listing the quality gate failures (empty if none)."""
+    if not issues:
+        return ""
+    return "Problems found in this draft (fix all of them):\n" + "\n".join(f"- {issue}" for issue in issues)
+
+def edit_blog_post(post_content, issues=None):
     """
     Edit and improve a blog post.
+    
+    Args:
+        post_content (str): The draft
+        issues (list): Quality gate failures the edit must fix
     """
     try:
-        prompt = f"""
-        Edit and improve this blog post while maintaining its core message.
-        Focus on:
-        - Clarity and flow
-        - Grammar and style
-        - Engagement
-        - Professional tone
-        
-        Blog post:
-        {post_content}
-        
-        Return the edited post only.
-        """
+        edited_content = None
+        if edit_ops_config["enabled"] and "blog" in edit_ops_config["platforms"]:
+            edited_content = _edit_ops_call(
+                post_content, BLOG_EDIT_INSTRUCTIONS,
+                [("issues", _format_issues(issues)), ("post", f"Blog post:\n{post_content}")],
+                "editing", platform="blog"
+            )
         
-        edited_content = call_deepseek_with_retry(prompt)
+        if edited_content is None:
+            prompt = (
+                PromptBuilder("editing", platform="blog")
+                .add_stable("instructions", BLOG_EDIT_INSTRUCTIONS)
+                .add_variable("issues", _format_issues(issues))
+                .add_variable("post", f"Blog post:\n{post_content}")
+                .build()
+            )
+            edited_content = call_deepseek_with_retry(prompt, stage="editing", platform="blog")
         
         if edited_content:
             return {
                 "success": True,
-                "edited_content": edited_content.strip()
+                "edited_content": strip_wrapper(edited_content)
             }
         else:
             return {
@@ -652,31 +1202,37 @@ def edit_blog_post(post_content):
             "error": f"Blog editing error: {str(e)}"
         }
 
-def edit_linkedin_post(post_content):
+def edit_linkedin_post(post_content, issues=None):
     """
     Edit and improve a LinkedIn post.
+    
+    Args:
+        post_content (str): The draft
+        issues (list): Quality gate failures the edit must fix
     """
     try:
-        prompt = f"""
-        Edit and improve this LinkedIn post while maintaining its core message.
-        Focus on:
-        - Professional tone
-        - Clear value proposition
-        - Engagement
-        - Appropriate hashtags
-        
-        Post:
-        {post_content}
-        
-        Return the edited post only.
-        """
+        edited_content = None
+        if edit_ops_config["enabled"] and "linkedin" in edit_ops_config["platforms"]:
+            edited_content = _edit_ops_call(
+                post_content, LINKEDIN_EDIT_INSTRUCTIONS,
+                [("issues", _format_issues(issues)), ("post", f"Post:\n{post_content}")],
+                "editing", platform="linkedin"
+            )
         
-        edited_content = call_deepseek_with_retry(prompt)
+        if edited_content is None:
+            prompt = (
+                PromptBuilder("editing", platform="linkedin")
+                .add_stable("instructions", LINKEDIN_EDIT_INSTRUCTIONS)
+                .add_variable("issues", _format_issues(issues))
+                .add_variable("post", f"Post:\n{post_content}")
+                .build()
+            )
+            edited_content = call_deepseek_with_retry(prompt, stage="editing", platform="linkedin")
         
         if edited_content:
             return {
                 "success": True,
-                "edited_content": edited_content.strip()
+                "edited_content": strip_wrapper(edited_content)
             }
         else:
             return {
@@ -691,35 +1247,37 @@ def edit_linkedin_post(post_content):
             "error": f"LinkedIn editing error: {str(e)}"
         }
 
-def edit_twitter_post(post_content):
+def edit_twitter_post(post_content, issues=None):
     """
     Edit and improve a Twitter post.
+    
+    Args:
+        post_content (str): The draft
+        issues (list): Quality gate failures the edit must fix
     """
     try:
-        prompt = f"""
-        Edit and improve this tweet while maintaining its core message.
-        Ensure it's within 280 characters.
-        Focus on:
-        - Impact and clarity
-        - Engagement
-        - Appropriate hashtags
-        
-        Tweet:
-        {post_content}
-        
-        Return the edited tweet only.
-        """
+        edited_content = None
+        if edit_ops_config["enabled"] and "twitter" in edit_ops_config["platforms"]:
+            edited_content = _edit_ops_call(
+                post_content, TWITTER_EDIT_INSTRUCTIONS,
+                [("issues", _format_issues(issues)), ("post", f"Tweet:\n{post_content}")],
+                "editing", platform="twitter"
+            )
         
-        edited_content = call_deepseek_with_retry(prompt)
+        if edited_content is None:
+            prompt = (
+                PromptBuilder("editing", platform="twitter")
+                .add_stable("instructions", TWITTER_EDIT_INSTRUCTIONS)
+                .add_variable("issues", _format_issues(issues))
+                .add_variable("post", f"Tweet:\n{post_content}")
+                .build()
+            )
+            edited_content = call_deepseek_with_retry(prompt, stage="editing", platform="twitter")
         
         if edited_content:
-            tweet = edited_content.strip()
-            if len(tweet) > 280:
-                tweet = tweet[:277] + "..."
-                
             return {
                 "success": True,
-                "edited_content": tweet
+                "edited_content": fit_tweet(strip_wrapper(edited_content), TOOL_CONFIGS["content_limits"]["twitter"])
             }
         else:
             return {
@@ -734,9 +1292,11 @@ def edit_twitter_post(post_content):
             "error": f"Twitter editing error: {str(e)}"
         }
 
-def generate_linkedin_post(topic, transcript):
+def generate_linkedin_post(topic, transcript, refine=None):
     """
     Generate a LinkedIn post based on the topic and transcript.
+    
+    With refine, the best section is found in the raw transcript and only it is refined.
     """
     try:
         # Find most relevant section based on topic keywords
@@ -766,41 +1326,35 @@ def generate_linkedin_post(topic, transcript):
                     score += 1
                     
             if score > 0:
-                relevant_chunks.append({"text": chunk, "score": score})
+                relevant_chunks.append({"text": chunk, "score": score, "start": i})
         
         # Sort and take top chunk
         if relevant_chunks:
             relevant_chunks.sort(key=lambda x: x["score"], reverse=True)
             context = relevant_chunks[0]["text"]
+            context_start = relevant_chunks[0]["start"]
         else:
             context = transcript[:min(1500, len(transcript))]
+            context_start = 0
+        context_end = context_start + len(context)
+        context = _source_text(transcript, context_start, context_end, refine)
             
-        prompt = f"""
-        Create a professional LinkedIn post (max 100 words) based on this topic and transcript.
-        
-        Topic:
-        {json.dumps(topic, indent=2)}
-        
-        Reference material:
-        {context}
+        prompt = (
+            PromptBuilder("generation", platform="linkedin")
+            .add_stable("instructions", LINKEDIN_INSTRUCTIONS)
+            .add_variable("topic", f"Topic:\n{compact_json(topic)}")
+            .add_context("context", [context], header="Reference material:")
+            .build()
+        )
         
-        Guidelines:
-        - Professional tone
-        - Provide value or insight
-        - Clear structure (intro, key point, conclusion)
-        - Include 2-3 relevant hashtags
-        - End with a question or call-to-action
-        
-        Return only the LinkedIn post text.
-        """
-        
-        post_content = call_deepseek_with_retry(prompt)
+        post_content = call_deepseek_with_retry(prompt, stage="generation", platform="linkedin")
         
         if post_content:
             return {
                 "success": True,
                 "content": post_content.strip(),
-                "topic": topic["title"]
+                "topic": topic["title"],
+                "source_spans": [(context_start, context_end)]
             }
         else:
             return {
@@ -815,6 +1369,12 @@ def generate_linkedin_post(topic, transcript):
             "error": f"LinkedIn generation error: {str(e)}"
         }
 
+def _write_sources(f, post):
+    """Write the video moments a post was based on, if they are known."""
+    times = [format_timestamp(seconds) for seconds in post.get("source_times") or []]
+    if any(times):
+        f.write(f"Source: {', '.join(time_text for time_text in times if time_text)}\n\n")
+
 def save_output(content_data, output_file="repurposed_content.txt"):
     """
     Saves all repurposed content to a text file.
@@ -870,6 +1430,7 @@ def save_output(content_data, output_file="repurposed_content.txt"):
                     # Calculate word count
                     word_count = len(content.split())
                     f.write(f"Word count: {word_count}\n\n")
+                    _write_sources(f, post)
                     f.write("----------\n\n")
             
             # Write LinkedIn posts
@@ -893,6 +1454,7 @@ def save_output(content_data, output_file="repurposed_content.txt"):
                     f.write(f"{content}\n\n")
                     word_count = len(content.split())
                     f.write(f"Word count: {word_count}\n\n")
+                    _write_sources(f, post)
                     f.write("----------\n\n")
             
             # Write Twitter posts
@@ -915,6 +1477,7 @@ def save_output(content_data, output_file="repurposed_content.txt"):
                     f.write(f"{content}\n\n")
                     char_count = len(content)
                     f.write(f"Character count: {char_count}\n\n")
+                    _write_sources(f, post)
                     f.write("----------\n\n")
         
         return {
@@ -0,0 +1,151 @@
+"""
+Lazy, on-demand transcript refinement.
+
+Full refinement rewrites the whole transcript, but the generators only read a
+few sections per topic plus the opening used for the blog summary. In lazy
+mode (content_config["refinement_mode"] = "lazy") the generators search the
+raw transcript and ask for refined text only for the sections they use.
+
+The raw transcript is divided into fixed spans of about
+content_config["lazy_span_chars"] characters, cut at whitespace. A span is
+refined the first time any request overlaps it and memoized, so each span is
+refined at most once per video. The memo is saved as an artifact, so later
+runs reuse it too. Spans that already score as clean are used as they are.
+"""
+
+import math
+import logging
+import threading
+from bisect import bisect_right
+from .agent_tools import refine_span, is_clean_region
+from .run_context import emit_event
+
+
+class LazyRefiner:
+    """Refines spans of a raw transcript on first use and memoizes them by span."""
+
+    def __init__(self, transcript, span_chars=1500, refined_spans=None):
+        """
+        Args:
+            transcript (str): The raw transcript
+            span_chars (int): Approximate characters per refinement span
+            refined_spans (dict): Previously refined spans by index (from an artifact)
+        """
+        self.transcript = transcript
+        self.spans = self._split(transcript, span_chars)
+        self.starts = [start for start, _ in self.spans]
+        self.refined = {int(index): text for index, text in (refined_spans or {}).items() if int(index) < len(self.spans)}
+        self.reused = len(self.refined)
+        self.unrefined = set()  # Spans whose refinement failed; their raw text is used
+        self.clean = set()  # Spans clean enough to use without refinement
+        self.locks = {}
+        self.lock = threading.Lock()
+        self.artifact_inputs = None  # What the memo artifact is keyed on (set by the pipeline)
+
+    @staticmethod
+    def _split(transcript, span_chars):
+        spans = []
+        start = 0
+        while start < len(transcript):
+            end = min(start + span_chars, len(transcript))
+            if end < len(transcript):
+                space = transcript.find(" ", end)
+                end = space if space != -1 else len(transcript)
+            spans.append((start, end))
+            start = end
+        return spans
+
+    def _span_text(self, index):
+        """Refined text of one span, refining it on first use."""
+        with self.lock:
+            if index in self.refined:
+                return self.refined[index]
+            span_lock = self.locks.setdefault(index, threading.Lock())
+        with span_lock:
+            if index in self.refined:
+                return self.refined[index]
+            start, end = self.spans[index]
+            raw = self.transcript[start:end].strip()
+            clean, quality = is_clean_region(raw)
+            if clean:
+                text = raw
+                self.clean.add(index)
+            else:
+                try:
+                    text = refine_span(raw, quality=quality)
+                except Exception as e:
+                    logging.warning(f"Lazy refinement of span {index} failed, using raw text: {str(e)}")
+                    text = None
+            if text:
+                self.unrefined.discard(index)
+            else:
+                self.unrefined.add(index)
+            with self.lock:
+                self.refined[index] = text or raw
+            emit_event("chunk_progress", stage="refinement", chunk=len(self.refined), total=len(self.spans))
+            return self.refined[index]
+
+    def refine_range(self, start, end):
+        """
+        Refined text for the raw range [start, end).
+
+        Every span the range touches is refined (once); the result keeps the
+        share of each span's refined text that corresponds to the range,
+        widened to whole words.
+
+        Args:
+            start (int): Raw transcript offset
+            end (int): Raw transcript offset
+
+        Returns:
+            str: The refined text for the range
+        """
+        if not self.spans or end <= start:
+            return ""
+        first = max(bisect_right(self.starts, start) - 1, 0)
+        last = max(bisect_right(self.starts, end - 1) - 1, first)
+        pieces = []
+        for index in range(first, last + 1):
+            span_start, span_end = self.spans[index]
+            text = self._span_text(index)
+            length = span_end - span_start
+            low = int((max(start, span_start) - span_start) / length * len(text))
+            high = math.ceil((min(end, span_end) - span_start) / length * len(text))
+            if low > 0:
+                low = text.rfind(" ", 0, low) + 1
+            if high < len(text):
+                space = text.find(" ", high)
+                high = space if space != -1 else len(text)
+            pieces.append(text[low:high].strip())
+        return " ".join(piece for piece in pieces if piece)
+
+    def refined_prefix(self, chars):
+        """Refine leading spans until at least `chars` refined characters exist; return that text."""
+        pieces = []
+        length = 0
+        for index in range(len(self.spans)):
+            if length >= chars:
+                break
+            pieces.append(self._span_text(index))
+            length += len(pieces[-1]) + 1
+        return " ".join(pieces)
+
+    def assembled_text(self):
+        """The whole transcript with refined spans where available and raw text elsewhere."""
+        return " ".join(
+            self.refined.get(index) or self.transcript[start:end].strip()
+            for index, (start, end) in enumerate(self.spans)
+        )
+
+    def memo(self):
+        """Successfully refined spans by index, for saving as an artifact."""
+        return {str(index): text for index, text in self.refined.items() if index not in self.unrefined}
+
+    def stats(self):
+        return {
+            "spans": len(self.spans),
+            "refined": len(self.refined) - len(self.unrefined) - len(self.clean),
+            "reused": self.reused,
+            "unrefined": len(self.unrefined),
+            "clean": len(self.clean)
+        }
@@ -0,0 +1,353 @@
+"""
+Multi-provider LLM routing.
+
+The router sits behind call_deepseek_with_retry. It tracks live latency and
+error rates for every configured provider, trips a circuit breaker on a
+provider that keeps failing, and sends each request to the healthiest backend
+allowed by the stage's policy, failing over to the next one on error.
+
+Latency and error rates are kept per stage (stage:platform for generation
+and editing), since a 20s refinement call says nothing about how fast the
+same provider writes a tweet. Circuit breakers stay per provider: an outage
+is not stage-specific.
+
+Any OpenAI-compatible endpoint can be a provider, which is also how the router
+is pointed at local stand-in servers for testing (set the provider's
+base_url, or its base_url_env variable, to e.g. http://127.0.0.1:8001/v1).
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import deque
+import google.generativeai as genai
+from openai import OpenAI
+
+
+class CircuitBreaker:
+    """Classic closed/open/half-open circuit breaker."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30):
+        """
+        Args:
+            name (str): Name of the protected provider, for logging
+            failure_threshold (int): Consecutive failures that open the circuit
+            reset_timeout (float): Seconds before an open circuit allows a probe request
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.probe_in_flight = False
+        self.lock = threading.Lock()
+
+    def allow(self):
+        """Whether a request may be sent right now."""
+        with self.lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.time() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self.probe_in_flight = False
+            if self.state == self.HALF_OPEN and not self.probe_in_flight:
+                # Let exactly one probe through to test the provider
+                self.probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self.probe_in_flight = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logging.warning(f"Circuit for {self.name} opened after {self.failures} consecutive failures")
+                self.state = self.OPEN
+                self.opened_at = time.time()
+                self.probe_in_flight = False
+
+
+class ProviderHealth:
+    """Live latency and error-rate statistics for one provider."""
+
+    def __init__(self, window=50, alpha=0.2, prior_latency=10.0):
+        """
+        Args:
+            window (int): Number of recent outcomes used for the error rate
+            alpha (float): Smoothing factor for the latency moving average
+            prior_latency (float): Assumed latency before any samples arrive
+        """
+        self.outcomes = deque(maxlen=window)
+        self.alpha = alpha
+        self.latency = None
+        self.prior_latency = prior_latency
+        self.lock = threading.Lock()
+
+    def record(self, success, seconds=None):
+        with self.lock:
+            self.outcomes.append(success)
+            if success and seconds is not None:
+                self.latency = seconds if self.latency is None else (
+                    self.alpha * seconds + (1 - self.alpha) * self.latency
+                )
+
+    def error_rate(self):
+        with self.lock:
+            if not self.outcomes:
+                return 0.0
+            return 1 - sum(self.outcomes) / len(self.outcomes)
+
+    def sampled(self):
+        """Whether any request has completed, so the latency is measured rather than assumed."""
+        return self.latency is not None
+
+    def score(self):
+        """Lower is healthier: expected latency penalized by the recent error rate."""
+        latency = self.latency if self.latency is not None else self.prior_latency
+        return latency * (1 + 4 * self.error_rate())
+
+    def snapshot(self):
+        return {
+            "latency_ewma": round(self.latency, 3) if self.latency is not None else None,
+            "error_rate": round(self.error_rate(), 3),
+            "samples": len(self.outcomes)
+        }
+
+
+def _health_key(stage, platform):
+    """Key health is tracked under: stage:platform when a platform is given, like the usage and hedging keys."""
+    stage = stage or "default"
+    return f"{stage}:{platform}" if platform else stage
+
+
+def _min_timeout(*timeouts):
+    """The tightest of the given timeouts, ignoring unset ones."""
+    values = [timeout for timeout in timeouts if timeout is not None]
+    return min(values) if values else None
+
+
+class OpenAICompatibleProvider:
+    """Provider for DeepSeek or any other OpenAI-compatible chat completions endpoint."""
+
+    def __init__(self, name, client, model, timeout=None):
+        self.name = name
+        self.client = client
+        self.model = model
+        self.timeout = timeout
+
+    def complete(self, prompt, temperature=0.7, max_tokens=2048, timeout=None, model=None):
+        """
+        Returns:
+            tuple: (text, usage dict)
+        """
+        request = {
+            "model": model or self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": temperature,
+            "max_tokens": max_tokens
+        }
+        timeout = _min_timeout(timeout, self.timeout)
+        if timeout is not None:
+            request["timeout"] = timeout
+
+        response = self.client.chat.completions.create(**request)
+        usage = {"finish_reason": response.choices[0].finish_reason}
+        if getattr(response, "usage", None) is not None:
+            for field in ("prompt_tokens", "completion_tokens", "prompt_cache_hit_tokens", "prompt_cache_miss_tokens"):
+                value = getattr(response.usage, field, None)
+                if value is not None:
+                    usage[field] = value
+        return response.choices[0].message.content, usage
+
+
+class GeminiProvider:
+    """Provider backed by the Google Gemini API (configured via genai.configure)."""
+
+    def __init__(self, name, model, timeout=None):
+        self.name = name
+        self.model = model
+        self.timeout = timeout
+        self.models = {}
+
+    def complete(self, prompt, temperature=0.7, max_tokens=2048, timeout=None, model=None):
+        """
+        Returns:
+            tuple: (text, usage dict)
+        """
+        model_name = model or self.model
+        if model_name not in self.models:
+            self.models[model_name] = genai.GenerativeModel(model_name)
+
+        # Retries and failover are handled by the router and its caller,
+        # so disable the client library's own (very long) retry loop
+        request_options = {"retry": None}
+        timeout = _min_timeout(timeout, self.timeout)
+        if timeout is not None:
+            request_options["timeout"] = timeout
+        response = self.models[model_name].generate_content(
+            prompt,
+            generation_config={"temperature": temperature, "max_output_tokens": max_tokens},
+            request_options=request_options
+        )
+        usage = {}
+        if response.candidates and getattr(response.candidates[0].finish_reason, "name", None) == "MAX_TOKENS":
+            usage["finish_reason"] = "length"
+        metadata = getattr(response, "usage_metadata", None)
+        if metadata is not None:
+            usage["prompt_tokens"] = getattr(metadata, "prompt_token_count", 0)
+            usage["completion_tokens"] = getattr(metadata, "candidates_token_count", 0)
+        return response.text, usage
+
+
+class AllProvidersFailed(Exception):
+    """Raised when every provider allowed for a request failed or was unavailable."""
+
+
+class LLMRouter:
+    """Routes completions across providers by stage policy and live health."""
+
+    def __init__(self, providers, stage_policies, failure_threshold=5, reset_timeout=30, healthy_error_rate=0.25):
+        """
+        Args:
+            providers (list): Provider instances, in default priority order
+            stage_policies (dict): stage name -> {"providers": [names], "strategy": "priority"|"fastest"};
+                the "default" entry applies to stages without their own policy
+            failure_threshold (int): Consecutive failures before a provider's circuit opens
+            reset_timeout (float): Seconds an open circuit waits before probing again
+            healthy_error_rate (float): Error rate up to which a measured provider is
+                never ranked behind one that has not been tried yet
+        """
+        self.providers = {provider.name: provider for provider in providers}
+        self.order = [provider.name for provider in providers]
+        self.stage_policies = stage_policies
+        self.health = {}  # (provider name, stage key) -> ProviderHealth
+        self.health_lock = threading.Lock()
+        self.healthy_error_rate = healthy_error_rate
+        self.breakers = {name: CircuitBreaker(name, failure_threshold, reset_timeout) for name in self.providers}
+
+    def _health(self, name, key):
+        """The ProviderHealth of a provider for one stage key, created on first use."""
+        with self.health_lock:
+            if (name, key) not in self.health:
+                self.health[(name, key)] = ProviderHealth()
+            return self.health[(name, key)]
+
+    def candidates(self, stage=None, platform=None):
+        """Provider names to try for a stage (and platform), best first."""
+        policy = self.stage_policies.get(stage) or self.stage_policies.get("default", {})
+        names = [name for name in policy.get("providers", self.order) if name in self.providers]
+        if policy.get("strategy") == "fastest":
+            key = _health_key(stage, platform)
+
+            def rank(name):
+                health = self._health(name, key)
+                # Measured, healthy providers come first; the prior latency only orders the rest
+                trusted = health.sampled() and health.error_rate() <= self.healthy_error_rate
+                return (0 if trusted else 1, health.score())
+
+            # Stable sort keeps the configured order as the tie-breaker
+            names.sort(key=rank)
+        return names
+
+    def complete(self, prompt, stage=None, platform=None, **params):
+        """
+        Send a completion to the healthiest available provider for the stage.
+
+        Args:
+            prompt (str): The user prompt
+            stage (str): Pipeline stage, used to pick the routing policy
+            platform (str): Target platform; generation/editing health is kept per platform
+            **params: temperature, max_tokens, timeout, and optionally a
+                per-provider "models" dict ({provider name: model})
+
+        Returns:
+            tuple: (text, usage dict, provider name)
+
+        Raises:
+            AllProvidersFailed: If no provider could serve the request
+        """
+        models = params.pop("models", None) or {}
+        key = _health_key(stage, platform)
+        errors = []
+
+        for name in self.candidates(stage, platform):
+            if not self.breakers[name].allow():
+                errors.append(f"{name}: circuit open")
+                continue
+
+            start = time.time()
+            try:
+                text, usage = self.providers[name].complete(prompt, model=models.get(name), **params)
+            except Exception as e:
+                self._health(name, key).record(False)
+                self.breakers[name].record_failure()
+                errors.append(f"{name}: {str(e)}")
+                logging.warning(f"Provider {name} failed for stage {stage or 'default'}: {str(e)}")
+                continue
+
+            self._health(name, key).record(True, time.time() - start)
+            self.breakers[name].record_success()
+            return text, usage, name
+
+        raise AllProvidersFailed("; ".join(errors) or "No providers configured")
+
+    def snapshot(self):
+        """Circuit state for every provider, with its health per stage key."""
+        with self.health_lock:
+            health = dict(self.health)
+        return {
+            name: {
+                "circuit": self.breakers[name].state,
+                "stages": {key: stats.snapshot() for (provider, key), stats in sorted(health.items()) if provider == name}
+            }
+            for name in self.order
+        }
+
+
+def build_router(config, clients=None):
+    """
+    Create an LLMRouter from router_config.
+
+    Args:
+        config (dict): See router_config in agent_config.py
+        clients (dict): Already-initialized OpenAI clients to reuse, by provider name
+
+    Returns:
+        LLMRouter: The configured router
+    """
+    clients = clients or {}
+    providers = []
+
+    for name, spec in config["providers"].items():
+        if spec["type"] == "openai":
+            client = clients.get(name)
+            if client is None:
+                api_key = os.getenv(spec.get("api_key_env", ""), "") or "not-needed"
+                base_url = os.getenv(spec.get("base_url_env", ""), "") or spec["base_url"]
+                client = OpenAI(api_key=api_key, base_url=base_url)
+            providers.append(OpenAICompatibleProvider(name, client, spec["model"], spec.get("timeout")))
+        elif spec["type"] == "gemini":
+            providers.append(GeminiProvider(name, spec["model"], spec.get("timeout")))
+        else:
+            raise ValueError(f"Unknown provider type for {name}: {spec['type']}")
+
+    breaker = config.get("circuit_breaker", {})
+    return LLMRouter(
+        providers,
+        config.get("stage_policies", {}),
+        failure_threshold=breaker.get("failure_threshold", 5),
+        reset_timeout=breaker.get("reset_timeout", 30),
+        healthy_error_rate=config.get("healthy_error_rate", 0.25)
+    )
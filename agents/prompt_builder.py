@@ -0,0 +1,218 @@
+"""
+Prompt assembly for the tool functions.
+
+Providers such as DeepSeek cache prompt prefixes: a request whose opening
+tokens match an earlier request is billed at the cached rate and starts
+generating sooner. To get those hits, every prompt is built from named
+sections with the content that is shared across calls (instructions, the
+transcript context reused for every topic) first and the per-call content
+(topic JSON, chunk text, chunk index) last.
+
+Input tokens drive both latency and cost, so the builder also keeps each
+prompt inside the stage's input budget (prompt_budget_config). Sections are
+stripped of formatting whitespace, token counts are estimated offline, and
+context sections (retrieved passages, summaries) are packed in priority order
+into whatever the required sections leave free. A context piece that does not
+fit is compressed extractively (tools/extractive.py) into the space left,
+rather than cut off or dropped. Every built prompt produces a per-section
+token report.
+"""
+
+import re
+import json
+import logging
+import textwrap
+from utils.llm_stats import PromptSectionStats
+from tools.extractive import compress_text
+from .agent_config import get_prompt_budget, compression_config
+from .run_context import get_current_run
+
+# Approximates a BPE tokenizer: words, single punctuation marks and runs of
+# whitespace longer than one character each cost at least one token
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]|\s{2,}")
+
+# Context pieces smaller than this are dropped rather than truncated
+MIN_PIECE_TOKENS = 40
+
+# Process-wide prompt size per stage and section (each run also keeps its own)
+prompt_stats = PromptSectionStats()
+
+
+def count_tokens(text):
+    """
+    Estimate the number of tokens in a text without calling a tokenizer.
+
+    Long words are split roughly the way BPE vocabularies split them (about
+    six characters per token). The result is an estimate, close enough for
+    budgeting English prompts; the provider's usage figures stay authoritative.
+
+    Args:
+        text (str): The text to measure
+
+    Returns:
+        int: Estimated token count
+    """
+    if not text:
+        return 0
+    tokens = 0
+    for match in _TOKEN_PATTERN.finditer(text):
+        piece = match.group()
+        tokens += 1 + (len(piece) - 1) // 6 if piece[0].isalnum() or piece[0] == "_" else 1
+    return tokens
+
+
+def truncate_to_tokens(text, max_tokens):
+    """
+    Cut a text to at most max_tokens estimated tokens, at a word boundary.
+
+    Returns:
+        str: The (possibly shortened) text
+    """
+    tokens = 0
+    for match in _TOKEN_PATTERN.finditer(text):
+        piece = match.group()
+        tokens += 1 + (len(piece) - 1) // 6 if piece[0].isalnum() or piece[0] == "_" else 1
+        if tokens > max_tokens:
+            return text[:match.start()].rstrip()
+    return text
+
+
+def compress_to_tokens(text, max_tokens):
+    """
+    Shrink transcript text to at most max_tokens estimated tokens.
+
+    With compression enabled, the most central and least repetitive sentences
+    are kept; otherwise the text is truncated.
+
+    Returns:
+        str: The (possibly shortened) text
+    """
+    if not compression_config["enabled"]:
+        return truncate_to_tokens(text, max_tokens)
+    # Text without a full sentence that fits is truncated instead
+    compressed = compress_text(text, max_tokens, count=count_tokens, novelty=compression_config["novelty"])
+    return compressed or truncate_to_tokens(text, max_tokens)
+
+
+def compact_json(value):
+    """Serialize a value for a prompt without indentation (json.dumps(indent=2) roughly doubles its tokens)."""
+    return json.dumps(value, ensure_ascii=False, separators=(", ", ": "))
+
+
+class PromptBuilder:
+    """Builds a budgeted prompt from stable sections followed by variable sections."""
+
+    def __init__(self, stage, platform=None, budget=None):
+        """
+        Args:
+            stage (str): Pipeline stage the prompt is for
+            platform (str): Target platform, for generation and editing prompts
+            budget (int): Input token budget (defaults to prompt_budget_config)
+        """
+        self.stage = stage
+        self.platform = platform
+        self.budget = budget if budget is not None else get_prompt_budget(stage, platform)
+        self.stable = []
+        self.variable = []
+        self.dropped_pieces = 0
+        self.compressed_pieces = 0
+
+    def add_stable(self, name, text):
+        """Add a section that is identical across calls in this stage (cacheable prefix)."""
+        self.stable.append((name, _clean(text), None))
+        return self
+
+    def add_variable(self, name, text):
+        """Add a section that changes from call to call."""
+        self.variable.append((name, _clean(text), None))
+        return self
+
+    def add_context(self, name, pieces, header=None):
+        """
+        Add a variable section assembled from optional pieces.
+
+        The pieces are packed in the given order (most important first) into
+        the budget left by all other sections when the prompt is built. A piece
+        that no longer fits is compressed into the space left (see
+        compress_to_tokens) if at least MIN_PIECE_TOKENS remain, and dropped
+        otherwise.
+
+        Args:
+            name (str): Section name for the token report
+            pieces (list): Context strings, highest priority first
+            header (str): Optional line placed before the pieces
+        """
+        pieces = [_clean(piece) for piece in pieces if piece and piece.strip()]
+        self.variable.append((name, _clean(header) if header else "", pieces))
+        return self
+
+    def sections(self):
+        """All sections in prompt order as (name, text) pairs, with context packed into the budget."""
+        sections = self.stable + self.variable
+        fixed = [text for _, text, pieces in sections if pieces is None and text]
+        headers = [text for _, text, pieces in sections if pieces is not None and text]
+        # Every section and context piece is joined with a blank line (about one token)
+        available = self.budget - sum(count_tokens(text) + 1 for text in fixed + headers)
+
+        self.dropped_pieces = 0
+        self.compressed_pieces = 0
+        packed = []
+        for name, text, pieces in sections:
+            if pieces is None:
+                packed.append((name, text))
+                continue
+            kept = []
+            for piece in pieces:
+                tokens = count_tokens(piece) + 1
+                if tokens <= available:
+                    kept.append(piece)
+                    available -= tokens
+                elif available >= MIN_PIECE_TOKENS and (not kept or compression_config["enabled"]):
+                    shortened = compress_to_tokens(piece, available - 1)
+                    kept.append(shortened)
+                    available -= count_tokens(shortened) + 1
+                    self.compressed_pieces += 1
+                else:
+                    self.dropped_pieces += 1
+            body = "\n\n".join(kept)
+            packed.append((name, f"{text}\n{body}" if text and body else text or body))
+        return packed
+
+    def build(self):
+        """Return the assembled prompt and record its token report."""
+        sections = self.sections()
+        prompt = "\n\n".join(text for _, text in sections if text)
+
+        report = self._report(sections)
+        if report["tokens"] > self.budget:
+            logging.warning(
+                f"{self.stage} prompt is ~{report['tokens']} tokens, over its budget of {self.budget}: {report['sections']}"
+            )
+        prompt_stats.record(report)
+        run = get_current_run()
+        if run:
+            run.prompt_stats.record(report)
+        return prompt
+
+    def report(self):
+        """Estimated tokens per section for the prompt as it would be built now."""
+        return self._report(self.sections())
+
+    def _report(self, sections):
+        section_tokens = {name: count_tokens(text) for name, text in sections if text}
+        return {
+            "stage": self.stage if not self.platform else f"{self.stage}:{self.platform}",
+            "budget": self.budget,
+            "tokens": sum(section_tokens.values()) + max(len(section_tokens) - 1, 0),
+            "sections": section_tokens,
+            "dropped_pieces": self.dropped_pieces,
+            "compressed_pieces": self.compressed_pieces
+        }
+
+
+def _clean(text):
+    """Remove indentation, trailing spaces and runs of blank lines left over from triple-quoted strings."""
+    text = textwrap.dedent(text)
+    text = re.sub(r"[ \t]+\n", "\n", text)
+    text = re.sub(r"\n{3,}", "\n\n", text)
+    return text.strip()
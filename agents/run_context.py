@@ -0,0 +1,191 @@
+"""
+Per-run state for the Content Repurposer pipeline.
+
+A RunContext holds everything that belongs to one pass through
+process_youtube_url, so a single RepurposerAgentSystem (and its agents and
+clients) can serve many videos concurrently from threads or asyncio tasks.
+
+The active run is also published through a context variable so low-level
+helpers (such as call_deepseek_with_retry) can see its deadline, and emit
+progress events, without every tool function having to pass it along.
+
+Progress events are plain dicts with a "type" plus run_id, time and elapsed:
+
+    run_started, run_finished (success, error, result)
+    stage_started, stage_finished (stage, seconds, error)
+    chunk_progress (stage, chunk, total)
+    post_completed (platform, index, post, edited, reused)
+    retry, throttled (stage, attempt, wait_seconds, error)
+    degraded (action, reason, ...)
+"""
+
+import time
+import uuid
+import logging
+import contextvars
+from contextlib import contextmanager
+from utils.llm_stats import UsageStats, PromptSectionStats
+
+_current_run = contextvars.ContextVar("current_run", default=None)
+
+
+def get_current_run():
+    """Return the RunContext active in this thread/task, or None."""
+    return _current_run.get()
+
+
+def emit_event(event_type, **data):
+    """Emit a progress event on the current run, if there is one."""
+    run = _current_run.get()
+    if run:
+        run.emit(event_type, **data)
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a run has no time left for another LLM call."""
+
+
+class RunBudget:
+    """
+    Wall-clock budget for one run.
+
+    Tracks an overall deadline plus per-stage caps (TOOL_CONFIGS["timeouts"])
+    and records every degradation applied to stay inside them.
+    """
+
+    def __init__(self, total_seconds=None, stage_timeouts=None):
+        """
+        Args:
+            total_seconds (float): Overall run budget, or None for no deadline
+            stage_timeouts (dict): Maximum seconds per stage name
+        """
+        self.started_at = time.time()
+        self.deadline = self.started_at + total_seconds if total_seconds else None
+        self.stage_timeouts = stage_timeouts or {}
+        self.degradations = []
+        self.on_degrade = None
+
+    def remaining(self):
+        """Seconds left before the run deadline (infinite if there is none)."""
+        if self.deadline is None:
+            return float("inf")
+        return self.deadline - time.time()
+
+    def stage_deadline(self, stage, reserve=0):
+        """
+        Absolute deadline for a stage starting now.
+
+        Args:
+            stage (str): Stage name, looked up in stage_timeouts
+            reserve (float): Seconds to hold back for the stages after this one
+
+        Returns:
+            float: The earlier of the stage cap and the run deadline minus the reserve,
+                or None if neither applies
+        """
+        candidates = []
+        if stage in self.stage_timeouts:
+            candidates.append(time.time() + self.stage_timeouts[stage])
+        if self.deadline is not None:
+            candidates.append(self.deadline - reserve)
+        return min(candidates) if candidates else None
+
+    def has_time_for(self, seconds):
+        """Whether at least `seconds` remain before the run deadline."""
+        return self.remaining() >= seconds
+
+    def degrade(self, action, reason, **details):
+        """Record a degradation applied to stay within the budget."""
+        entry = {"action": action, "reason": reason, "elapsed": round(time.time() - self.started_at, 1)}
+        entry.update(details)
+        self.degradations.append(entry)
+        logging.warning(f"Degrading run ({action}): {reason}")
+        if self.on_degrade:
+            self.on_degrade(entry)
+
+
+class RunContext:
+    """State for a single pipeline run."""
+
+    def __init__(self, video_url=None, budget=None, profiler=None, on_event=None):
+        """
+        Initialize the run context.
+
+        Args:
+            video_url (str): The source URL being processed
+            budget (RunBudget): Time budget for the run (unbounded if omitted)
+            profiler (RunProfiler): Profiles each stage when set
+            on_event (callable): Called with every progress event dict
+        """
+        self.run_id = uuid.uuid4().hex
+        self.started_at = time.time()
+        self.budget = budget or RunBudget()
+        self.budget.on_degrade = lambda entry: self.emit("degraded", **entry)
+        self.profiler = profiler
+        self.segments = None  # SegmentedTranscript once the transcript is extracted
+        self.refiner = None  # LazyRefiner when refinement_mode is "lazy"
+        self.listeners = [on_event] if on_event else []
+        self.stage_seconds = {}  # Wall-clock seconds per finished stage
+        self.usage = UsageStats()
+        self.prompt_stats = PromptSectionStats()
+        self.content_data = {
+            "video_url": video_url,
+            "video_info": None,
+            "transcript": None,
+            "refined_transcript": None,
+            "topics": None,
+            "blog_posts": [],
+            "linkedin_posts": [],
+            "twitter_posts": [],
+            "degradations": self.budget.degradations,
+            "artifacts": {"reused": [], "computed": []}
+        }
+
+    def elapsed(self):
+        """Seconds since the run started."""
+        return time.time() - self.started_at
+
+    def emit(self, event_type, **data):
+        """
+        Send a progress event to every listener.
+
+        Listener errors are logged and never interrupt the pipeline.
+        """
+        if not self.listeners:
+            return
+        event = {"type": event_type, "run_id": self.run_id, "time": time.time(), "elapsed": round(self.elapsed(), 3)}
+        event.update(data)
+        for listener in list(self.listeners):
+            try:
+                listener(event)
+            except Exception as e:
+                logging.warning(f"Event listener failed on {event_type}: {str(e)}")
+
+    @contextmanager
+    def stage(self, name):
+        """Mark the enclosed block as one pipeline stage (profiled if profiling is on)."""
+        self.emit("stage_started", stage=name)
+        start = time.time()
+        error = None
+        try:
+            if self.profiler:
+                with self.profiler.stage(name):
+                    yield
+            else:
+                yield
+        except Exception as e:
+            error = str(e)
+            raise
+        finally:
+            seconds = round(time.time() - start, 3)
+            self.stage_seconds[name] = seconds
+            self.emit("stage_finished", stage=name, seconds=seconds, error=error)
+
+    @contextmanager
+    def activate(self):
+        """Make this the current run for the duration of the block."""
+        token = _current_run.set(self)
+        try:
+            yield self
+        finally:
+            _current_run.reset(token)
@@ -0,0 +1,359 @@
+"""
+Dry-run planner: predicts LLM calls, tokens, cost and wall time before a run.
+
+The number of calls per video follows from the pipeline's structure:
+refinement chunks scale with transcript length, topic chunks are capped at
+three, and every topic produces one post per platform (blogs also need a
+summary call, and drafts that fail the quality gate an edit call). The
+transcript length comes from a local caption file or a cached transcript
+artifact; unknown videos are assumed to be as long as recent runs.
+
+Per-call input/output tokens, prompt-cache hit ratios, call latencies, edit
+rates and extraction times are calibrated on the run history written by
+RepurposerAgentSystem, falling back to the prompt budgets, stage max_tokens
+and configured defaults until enough runs have been recorded.
+
+Wall time assumes each video runs its calls in sequence (as the pipeline
+does) and videos are spread over `concurrency` workers; provider-side rate
+limits are not modelled.
+"""
+
+import os
+import math
+import heapq
+import logging
+from .agent_config import (
+    artifact_config,
+    planner_config,
+    pricing_config,
+    content_config,
+    quality_gate_config,
+    compression_config,
+    get_stage_llm_config,
+    get_prompt_budget
+)
+from .agent_tools import (
+    REFINE_INSTRUCTIONS,
+    TOPIC_INSTRUCTIONS,
+    REFINE_CHUNK_SIZE,
+    REFINE_CHUNK_OVERLAP,
+    TOPIC_CHUNK_SIZE,
+    TOPIC_CHUNK_OVERLAP,
+    MAX_TOPIC_CHUNKS,
+    topic_prefix_chars,
+    validate_youtube_url,
+    estimate_call_seconds
+)
+from .prompt_builder import count_tokens
+from utils.artifact_store import ArtifactStore
+from utils.run_history import RunHistory
+from tools.caption_files import is_caption_file, find_caption_files, open_caption_file, caption_video_id
+from tools.transcript_store import SegmentedTranscript
+
+PLATFORMS = ("blog", "linkedin", "twitter")
+
+
+def _chunk_count(length, size, overlap):
+    """Number of chunks refine_transcript/generate_content_topics split a text into."""
+    if length <= 0:
+        return 0
+    return len(range(0, length, size - overlap))
+
+
+class Calibration:
+    """Per-call averages from recent runs, with defaults where the history has no data."""
+
+    def __init__(self, records):
+        """
+        Args:
+            records (list): RunHistory records, oldest first
+        """
+        self.runs = len(records)
+        self.usage = {}
+        for record in records:
+            for key, totals in (record.get("usage") or {}).items():
+                merged = self.usage.setdefault(key, dict.fromkeys(
+                    ("calls", "seconds", "prompt_tokens", "completion_tokens",
+                     "prompt_cache_hit_tokens", "prompt_cache_miss_tokens"), 0
+                ))
+                for field in merged:
+                    merged[field] += totals.get(field) or 0
+
+        extractions = [
+            record["stage_seconds"]["extraction"] for record in records
+            if "extraction" in record.get("stage_seconds", {})
+            and not record.get("transcript_reused") and not record.get("local_captions")
+        ]
+        self.extraction_seconds = (
+            sum(extractions) / len(extractions) if extractions else planner_config["default_extraction_seconds"]
+        )
+
+        lengths = sorted(record["transcript_chars"] for record in records if record.get("transcript_chars"))
+        self.transcript_chars = lengths[len(lengths) // 2] if lengths else planner_config["default_transcript_chars"]
+
+        # Every platform writes one post per selected topic
+        topic_counts = sorted(record["topics"] for record in records if record.get("topics"))
+        self.topics = (
+            topic_counts[len(topic_counts) // 2] if topic_counts
+            else sum(content_config["posts_per_platform"].values())
+        )
+
+        ratios = [
+            record["refined_chars"] / record["transcript_chars"] for record in records
+            if record.get("transcript_chars") and record.get("refined_chars")
+        ]
+        self.refined_ratio = sum(ratios) / len(ratios) if ratios else 1.0
+
+    def _average(self, key, field):
+        totals = self.usage.get(key)
+        if not totals or not totals["calls"] or (field == "seconds" and not totals["seconds"]):
+            return None
+        return totals[field] / totals["calls"]
+
+    def latency(self, key):
+        """Seconds per call for a usage key."""
+        seconds = self._average(key, "seconds")
+        return seconds if seconds is not None else estimate_call_seconds()
+
+    def prompt_tokens(self, key, default):
+        tokens = self._average(key, "prompt_tokens")
+        return tokens if tokens is not None else default
+
+    def completion_tokens(self, key, default):
+        tokens = self._average(key, "completion_tokens")
+        return tokens if tokens is not None else default
+
+    def cache_hit_ratio(self, key):
+        totals = self.usage.get(key)
+        if not totals:
+            return 0.0
+        seen = totals["prompt_cache_hit_tokens"] + totals["prompt_cache_miss_tokens"]
+        return totals["prompt_cache_hit_tokens"] / seen if seen else 0.0
+
+    def edit_rate(self, platform):
+        """Share of drafts that went through the LLM editor."""
+        if not quality_gate_config["enabled"]:
+            return 1.0
+        drafts = (self.usage.get(f"generation:{platform}") or {}).get("calls", 0)
+        edits = (self.usage.get(f"editing:{platform}") or {}).get("calls", 0)
+        return min(edits / drafts, 1.0) if drafts else 1.0
+
+
+def _load_transcript(source, artifact_store):
+    """
+    Find a source's video ID and transcript, without any network calls.
+
+    Returns:
+        dict: {"video_id", "transcript" (or None if unknown), "extraction"} or {"error"}
+    """
+    if os.path.isfile(source) and is_caption_file(source):
+        captions, metadata = open_caption_file(source)
+        text = SegmentedTranscript.from_captions(captions).text
+        return {"video_id": caption_video_id(source, metadata), "transcript": text, "extraction": "local"}
+
+    validation = validate_youtube_url(source)
+    if not validation["valid"]:
+        return {"error": validation["error"]}
+
+    cached = None
+    if artifact_store:
+        cached = artifact_store.get(validation["video_id"], "transcript", {"video_id": validation["video_id"]})
+    if cached:
+        return {"video_id": validation["video_id"], "transcript": cached["transcript"], "extraction": "cached"}
+    return {"video_id": validation["video_id"], "transcript": None, "extraction": "apify"}
+
+
+def estimate_video(source, calibration, artifact_store=None):
+    """
+    Estimate one video's LLM calls, tokens, cost and sequential wall time.
+
+    Args:
+        source (str): YouTube URL or caption file
+        calibration (Calibration): Per-call averages from recent runs
+        artifact_store (ArtifactStore): Where cached transcripts are looked up
+
+    Returns:
+        dict: The per-video estimate, or {"source", "error"} if the source is invalid
+    """
+    found = _load_transcript(source, artifact_store)
+    if "error" in found:
+        return {"source": source, "error": found["error"]}
+
+    transcript = found["transcript"]
+    chars = len(transcript) if transcript is not None else calibration.transcript_chars
+    # Token density of this transcript when known, else a typical ~4.5 characters per token
+    tokens_per_char = count_tokens(transcript[:20000]) / min(len(transcript), 20000) if transcript else 0.22
+    refined_chars = int(chars * calibration.refined_ratio)
+    posts = calibration.topics
+
+    if content_config["refinement_mode"] == "lazy":
+        # The topic prefix, then at most one span per section a generator uses
+        # (three blog sections plus one LinkedIn and one Twitter section per topic)
+        span_chars = content_config["lazy_span_chars"]
+        refine_chunks = min(
+            math.ceil(chars / span_chars),
+            math.ceil(topic_prefix_chars(MAX_TOPIC_CHUNKS) / span_chars) + posts * 5
+        )
+        refine_chunk_tokens = min(chars, span_chars) * tokens_per_char
+    else:
+        # Refinement stops at the chunk that reaches the end of the transcript
+        refine_chunks = 1 if chars <= REFINE_CHUNK_SIZE else _chunk_count(chars - REFINE_CHUNK_SIZE, REFINE_CHUNK_SIZE, REFINE_CHUNK_OVERLAP) + 1
+        refine_chunk_tokens = min(chars, REFINE_CHUNK_SIZE) * tokens_per_char
+    topic_chunk_tokens = min(refined_chars, TOPIC_CHUNK_SIZE) * tokens_per_char
+    if compression_config["enabled"]:
+        topic_chunk_tokens = min(topic_chunk_tokens, compression_config["topic_tokens"])
+    topic_calls = {
+        "llm": min(MAX_TOPIC_CHUNKS, _chunk_count(refined_chars, TOPIC_CHUNK_SIZE, TOPIC_CHUNK_OVERLAP)),
+        "seeded": 1,
+        "fast": 0
+    }[content_config["topic_mode"]]
+
+    # (usage key, calls, default prompt tokens per call, default completion tokens per call)
+    output_ratio = planner_config["default_output_ratio"]
+    stages = [
+        ("refinement", refine_chunks, count_tokens(REFINE_INSTRUCTIONS) + refine_chunk_tokens, refine_chunk_tokens),
+        ("topics", topic_calls,
+         count_tokens(TOPIC_INSTRUCTIONS) + topic_chunk_tokens, get_stage_llm_config("topics")["max_tokens"] * output_ratio),
+        ("summary", posts, get_prompt_budget("summary"), get_stage_llm_config("summary")["max_tokens"] * output_ratio)
+    ]
+    for platform in PLATFORMS:
+        stages.append((f"generation:{platform}", posts, get_prompt_budget("generation", platform),
+                       get_stage_llm_config("generation", platform)["max_tokens"] * output_ratio))
+    for platform in PLATFORMS:
+        stages.append((f"editing:{platform}", posts * calibration.edit_rate(platform),
+                       get_prompt_budget("editing", platform),
+                       get_stage_llm_config("editing", platform)["max_tokens"] * output_ratio))
+
+    estimate = {
+        "source": source,
+        "video_id": found["video_id"],
+        "transcript_chars": chars,
+        "transcript_known": transcript is not None,
+        "extraction": found["extraction"],
+        "stages": {},
+        "llm_calls": 0,
+        "input_tokens": 0,
+        "output_tokens": 0,
+        "cost_usd": 0.0,
+        "wall_seconds": calibration.extraction_seconds if found["extraction"] == "apify" else 0.0
+    }
+    for key, calls, default_input, default_output in stages:
+        if not calls:
+            continue
+        input_tokens = calls * calibration.prompt_tokens(key, default_input)
+        output_tokens = calls * calibration.completion_tokens(key, default_output)
+        hit_ratio = calibration.cache_hit_ratio(key)
+        cost = (
+            input_tokens * hit_ratio * pricing_config["input_cache_hit"]
+            + input_tokens * (1 - hit_ratio) * pricing_config["input_cache_miss"]
+            + output_tokens * pricing_config["output"]
+        ) / 1_000_000
+        seconds = calls * calibration.latency(key)
+        estimate["stages"][key] = {
+            "calls": round(calls, 1),
+            "input_tokens": round(input_tokens),
+            "output_tokens": round(output_tokens),
+            "cost_usd": round(cost, 5),
+            "seconds": round(seconds, 1)
+        }
+        estimate["llm_calls"] += calls
+        estimate["input_tokens"] += input_tokens
+        estimate["output_tokens"] += output_tokens
+        estimate["cost_usd"] += cost
+        estimate["wall_seconds"] += seconds
+
+    estimate["llm_calls"] = round(estimate["llm_calls"], 1)
+    estimate["input_tokens"] = round(estimate["input_tokens"])
+    estimate["output_tokens"] = round(estimate["output_tokens"])
+    estimate["cost_usd"] = round(estimate["cost_usd"], 4)
+    estimate["wall_seconds"] = round(estimate["wall_seconds"], 1)
+    return estimate
+
+
+def _makespan(durations, workers):
+    """Finish time of the last video when each goes to the first free worker (longest first)."""
+    finish_times = [0.0] * max(1, workers)
+    for duration in sorted(durations, reverse=True):
+        heapq.heappush(finish_times, heapq.heappop(finish_times) + duration)
+    return max(finish_times)
+
+
+def plan_run(sources, concurrency=1, history=None, artifact_store=None):
+    """
+    Estimate a batch before running it.
+
+    Args:
+        sources (list): YouTube URLs, caption files or directories of caption files
+        concurrency (int): Videos processed at once
+        history (RunHistory): Past runs to calibrate on (defaults to planner_config["history_path"])
+        artifact_store (ArtifactStore): Where cached transcripts are looked up
+            (defaults to artifact_config["root"] when artifacts are enabled)
+
+    Returns:
+        dict: {"videos": [...], "total": {...}, "concurrency": int, "calibration": {...}}
+    """
+    history = history or RunHistory(planner_config["history_path"])
+    if artifact_store is None and artifact_config["enabled"]:
+        artifact_store = ArtifactStore(artifact_config["root"])
+    calibration = Calibration(history.recent(planner_config["history_runs"]))
+
+    expanded = []
+    for source in sources:
+        expanded.extend(find_caption_files(source) if os.path.isdir(source) else [source])
+
+    videos = []
+    for source in expanded:
+        try:
+            videos.append(estimate_video(source, calibration, artifact_store))
+        except Exception as e:
+            logging.warning(f"Could not plan {source}: {str(e)}")
+            videos.append({"source": source, "error": str(e)})
+
+    planned = [video for video in videos if "error" not in video]
+    total = {
+        "videos": len(planned),
+        "invalid": len(videos) - len(planned),
+        "llm_calls": round(sum(video["llm_calls"] for video in planned), 1),
+        "input_tokens": sum(video["input_tokens"] for video in planned),
+        "output_tokens": sum(video["output_tokens"] for video in planned),
+        "cost_usd": round(sum(video["cost_usd"] for video in planned), 4),
+        "serial_seconds": round(sum(video["wall_seconds"] for video in planned), 1),
+        "wall_seconds": round(_makespan([video["wall_seconds"] for video in planned], concurrency), 1)
+    }
+    return {
+        "videos": videos,
+        "total": total,
+        "concurrency": concurrency,
+        "calibration": {
+            "runs": calibration.runs,
+            "latency_seconds": {key: round(calibration.latency(key), 2) for key in sorted(calibration.usage)},
+            "extraction_seconds": round(calibration.extraction_seconds, 1),
+            "topics_per_video": calibration.topics,
+            "assumed_transcript_chars": calibration.transcript_chars
+        }
+    }
+
+
+def format_plan(plan):
+    """Render a plan as a plain-text table."""
+    lines = [f"{'video':<24} {'chars':>8} {'calls':>6} {'in tok':>9} {'out tok':>8} {'cost $':>8} {'wall':>8}"]
+    for video in plan["videos"]:
+        if "error" in video:
+            lines.append(f"{video['source'][:24]:<24} error: {video['error']}")
+            continue
+        chars = f"{video['transcript_chars']}" + ("" if video["transcript_known"] else "?")
+        lines.append(
+            f"{video['video_id'][:24]:<24} {chars:>8} {video['llm_calls']:>6g} {video['input_tokens']:>9} "
+            f"{video['output_tokens']:>8} {video['cost_usd']:>8.4f} {video['wall_seconds'] / 60:>7.1f}m"
+        )
+    total = plan["total"]
+    lines.append(
+        f"{'TOTAL':<24} {'':>8} {total['llm_calls']:>6g} {total['input_tokens']:>9} "
+        f"{total['output_tokens']:>8} {total['cost_usd']:>8.4f} {total['wall_seconds'] / 60:>7.1f}m"
+    )
+    calibration = plan["calibration"]
+    lines.append(
+        f"Wall time at concurrency {plan['concurrency']} ({total['serial_seconds'] / 60:.1f}m if run one at a time); "
+        f"calibrated on {calibration['runs']} previous runs. '?' marks assumed transcript lengths."
+    )
+    return "\n".join(lines)
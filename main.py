@@ -1,7 +1,11 @@
 import os
 import logging
+import argparse
 from dotenv import load_dotenv
 from agents.agent_setup import RepurposerAgentSystem
+from agents.agent_config import output_config, server_config
+from agents.run_planner import plan_run, format_plan
+from tools.caption_files import find_caption_files
 
 # Load environment variables from .env file
 load_dotenv()
@@ -9,36 +13,129 @@ load_dotenv()
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def run_content_repurposer():
-    """Main function to run the content repurposing pipeline."""
+def run_caption_directory(directory, profile=False, agent_system=None):
+    """
+    Run the pipeline for every caption file in a directory.
+    
+    Each file is treated as one video and saved to its own output file.
+    
+    Args:
+        directory (str): Directory of VTT/SRT/JSON caption files
+        profile (bool): Profile each pipeline stage and write the reports
+        agent_system (RepurposerAgentSystem): System to reuse (built if omitted)
+    """
+    caption_files = find_caption_files(directory)
+    if not caption_files:
+        logging.error(f"No caption files found in {directory}. Exiting.")
+        return
+    
+    logging.info(f"Processing {len(caption_files)} caption files from {directory}")
+    agent_system = agent_system or RepurposerAgentSystem()
+    failed = 0
+    for path in caption_files:
+        name = os.path.splitext(os.path.basename(path))[0]
+        output_file = os.path.join(output_config["output_dir"], f"{name}.txt")
+        try:
+            result = agent_system.process_youtube_url(path, output_file=output_file, profile=profile)
+        except Exception as e:
+            logging.exception(f"Unexpected error while processing {path}: {str(e)}")
+            result = {"success": False, "error": str(e)}
+        if result.get("success"):
+            logging.info(f"{path} -> {result.get('output_file', output_file)}")
+        else:
+            failed += 1
+            logging.error(f"{path} failed: {result.get('error', 'Unknown error')}")
+    logging.info(f"--- Processed {len(caption_files) - failed}/{len(caption_files)} caption files ---")
+
+def print_plan(sources, concurrency):
+    """
+    Print a dry-run estimate of LLM calls, tokens, cost and wall time, without running anything.
+    
+    Args:
+        sources (list): YouTube URLs, caption files or directories (one URL per line in a .txt file also works)
+        concurrency (int): Videos processed at once
+    """
+    expanded = []
+    for source in sources:
+        if source.endswith(".txt") and os.path.isfile(source):
+            with open(source, encoding="utf-8") as f:
+                expanded.extend(line.strip() for line in f if line.strip() and not line.startswith("#"))
+        else:
+            expanded.append(source)
+    if not expanded:
+        logging.error("No URLs or caption files to plan. Exiting.")
+        return
+    print(format_plan(plan_run(expanded, concurrency=concurrency)))
+
+def run_content_repurposer(youtube_url=None, profile=False, agent_system=None):
+    """
+    Main function to run the content repurposing pipeline.
+    
+    Args:
+        youtube_url (str): URL or caption file/directory to process (prompted for if omitted)
+        profile (bool): Profile each pipeline stage and write the reports
+        agent_system (RepurposerAgentSystem): System to reuse across calls (built if omitted)
+    """
     logging.info("--- Starting Content Repurposer Tool ---")
     
     # Get YouTube URL from user
-    youtube_url = input("Please enter the YouTube URL you want to process: ")
+    if not youtube_url:
+        youtube_url = input("Please enter the YouTube URL you want to process: ")
     
     if not youtube_url:
         logging.error("No YouTube URL provided. Exiting.")
         return
 
+    if os.path.isdir(youtube_url):
+        run_caption_directory(youtube_url, profile=profile, agent_system=agent_system)
+        return
+
     logging.info(f"Processing URL: {youtube_url}")
 
     try:
-        # Initialize the agent system
-        agent_system = RepurposerAgentSystem()
+        # Initialize the agent system unless the caller shares one across videos
+        agent_system = agent_system or RepurposerAgentSystem()
         
         # Process the URL
-        result = agent_system.process_youtube_url(youtube_url)
+        result = agent_system.process_youtube_url(youtube_url, profile=profile)
         
         # Output the results
         if result.get("success"):
             logging.info("--- Content Repurposing Complete ---")
-            logging.info(f"Final output saved to: {result.get('output_path', 'N/A')}")
+            logging.info(f"Final output saved to: {result.get('output_file', 'N/A')}")
         else:
             logging.error("--- Content Repurposing Failed ---")
             logging.error(f"Error: {result.get('error', 'Unknown error')}")
+        
+        if result.get("profile"):
+            logging.info("--- Stage Profile ---")
+            for stage in result["profile"]["stages"]:
+                logging.info(
+                    f"{stage['stage']}: wall {stage['wall_seconds']:.2f}s, cpu {stage['cpu_seconds']:.2f}s, "
+                    f"waiting {stage['wait_seconds']:.2f}s"
+                )
+            logging.info(f"Reports: {result['profile']['output_dir']} (flame graph: {result['profile']['flamegraph']})")
             
     except Exception as e:
         logging.exception(f"An unexpected error occurred during the repurposing process: {str(e)}")
 
 if __name__ == "__main__":
-    run_content_repurposer()
+    parser = argparse.ArgumentParser(description="Repurpose a YouTube video into blog, LinkedIn and Twitter posts.")
+    parser.add_argument("url", nargs="*",
+                        help="YouTube URL, or a local VTT/SRT/JSON caption file or directory of them (prompted for if omitted)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile CPU, wall-clock time and allocations per pipeline stage")
+    parser.add_argument("--plan", action="store_true",
+                        help="Only estimate LLM calls, tokens, cost and wall time for the given URLs/files (or .txt lists of URLs)")
+    parser.add_argument("--concurrency", type=int, default=server_config["workers"],
+                        help="Videos processed at once, for --plan wall time estimates")
+    args = parser.parse_args()
+    if args.plan:
+        print_plan(args.url, args.concurrency)
+    elif len(args.url) > 1:
+        # One system for every video: agents, artifact store and corpus index are built once
+        agent_system = RepurposerAgentSystem()
+        for url in args.url:
+            run_content_repurposer(url, profile=args.profile, agent_system=agent_system)
+    else:
+        run_content_repurposer(args.url[0] if args.url else None, profile=args.profile)
@@ -0,0 +1,404 @@
+"""
+HTTP service mode for the Content Repurposer.
+
+Runs a long-lived process that accepts video jobs over HTTP, queues them for a
+pool of worker threads and lets clients poll or stream job status and results.
+
+Endpoints:
+    POST /jobs              {"url": "<youtube url>"} -> job (202, or 200 if de-duplicated)
+    GET  /jobs              list known jobs (finished jobs are kept per server_config["job_retention"])
+    GET  /jobs/<id>         job status, plus the result once finished
+    GET  /jobs/<id>/events  Server-Sent Events stream of status updates and pipeline
+                            progress (stage, chunk, post_completed, retry, ... events)
+    GET  /health            queue, worker and LLM provider statistics
+    GET  /corpus/search     ?q=<text> search transcripts and posts of processed videos
+"""
+
+import os
+import json
+import uuid
+import time
+import queue
+import logging
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+from agents.agent_setup import RepurposerAgentSystem
+from agents.agent_tools import validate_youtube_url, llm_router, llm_usage
+from agents.prompt_builder import prompt_stats
+from agents.agent_config import server_config, output_config
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+TERMINAL_STATUSES = ("succeeded", "failed")
+
+
+class Job:
+    """A single video processing request tracked by the service."""
+
+    def __init__(self, url, video_id):
+        self.id = uuid.uuid4().hex
+        self.url = url
+        self.video_id = video_id
+        self.status = "queued"
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        # Pipeline progress events, in order (see agents/run_context.py); dropped
+        # once the job finishes, with events_dropped counting how many were
+        self.events = []
+        self.events_dropped = 0
+        # Bumped on every status change or event so streaming clients can wait for updates
+        self.version = 0
+
+    def to_dict(self, include_result=True):
+        """Serialize the job for JSON responses."""
+        data = {
+            "id": self.id,
+            "url": self.url,
+            "video_id": self.video_id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error
+        }
+        if include_result and self.status in TERMINAL_STATUSES:
+            data["result"] = self.result
+        return data
+
+
+class JobManager:
+    """In-process job queue with a fixed pool of pipeline workers."""
+
+    def __init__(self, workers=None, max_queue_size=None, output_dir=None):
+        self.workers = workers or server_config["workers"]
+        self.output_dir = output_dir or output_config["output_dir"]
+        self.jobs = {}
+        self.in_flight = {}  # video_id -> job id, for de-duplication
+        self.queue = queue.Queue(maxsize=max_queue_size or server_config["max_queue_size"])
+        self.condition = threading.Condition()
+        self.threads = []
+        self.agent_system = None
+
+        os.makedirs(self.output_dir, exist_ok=True)
+
+    def start(self):
+        """Build the shared agent system and start the worker threads."""
+        # One system serves every worker: run state lives in a per-run context,
+        # so agent setup and client connections are paid once per process
+        self.agent_system = RepurposerAgentSystem()
+
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker_loop, name=f"repurposer-worker-{i + 1}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        logging.info(f"Started {self.workers} pipeline workers")
+
+    def submit(self, url):
+        """
+        Queue a job for the given URL.
+
+        Args:
+            url (str): The YouTube URL to process
+
+        Returns:
+            tuple: (job, deduplicated) - the job handling this video and whether
+                an in-flight job was reused
+
+        Raises:
+            ValueError: If the URL is not a valid YouTube URL
+            queue.Full: If the queue is at capacity
+        """
+        validation = validate_youtube_url(url)
+        if not validation["valid"]:
+            raise ValueError(validation["error"])
+
+        video_id = validation["video_id"]
+        with self.condition:
+            self._evict_finished()
+            existing_id = self.in_flight.get(video_id)
+            if existing_id:
+                return self.jobs[existing_id], True
+
+            job = Job(url, video_id)
+            self.queue.put_nowait(job)
+            self.jobs[job.id] = job
+            self.in_flight[video_id] = job.id
+
+        logging.info(f"Queued job {job.id} for video {video_id}")
+        return job, False
+
+    def get(self, job_id):
+        """Return the job with the given ID, or None."""
+        with self.condition:
+            return self.jobs.get(job_id)
+
+    def list_jobs(self):
+        """Return all jobs, newest first."""
+        with self.condition:
+            return sorted(self.jobs.values(), key=lambda job: job.created_at, reverse=True)
+
+    def wait_for_update(self, job, last_version, timeout=15):
+        """Block until the job changes past last_version or the timeout expires."""
+        with self.condition:
+            self.condition.wait_for(lambda: job.version != last_version, timeout=timeout)
+            return job.version
+
+    def stats(self):
+        """Return queue, worker and LLM provider statistics."""
+        with self.condition:
+            counts = {}
+            for job in self.jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+        return {
+            "workers": self.workers,
+            "queue_depth": self.queue.qsize(),
+            "jobs": counts,
+            "providers": llm_router.snapshot(),
+            "llm_usage": llm_usage.snapshot(),
+            "prompt_tokens": prompt_stats.snapshot()
+        }
+
+    def _update(self, job, **changes):
+        """Apply changes to a job and wake any waiting stream clients."""
+        with self.condition:
+            for key, value in changes.items():
+                setattr(job, key, value)
+            job.version += 1
+            if job.status in TERMINAL_STATUSES:
+                self.in_flight.pop(job.video_id, None)
+                # The final status carries the result; progress events are no longer needed
+                job.events_dropped += len(job.events)
+                job.events = []
+                self._evict_finished()
+            self.condition.notify_all()
+
+    def _evict_finished(self):
+        """Forget finished jobs past the retention TTL or count (caller holds the lock)."""
+        retention = server_config["job_retention"]
+        finished = sorted(
+            (job for job in self.jobs.values() if job.status in TERMINAL_STATUSES),
+            key=lambda job: job.finished_at or job.created_at
+        )
+        cutoff = time.time() - retention["ttl_seconds"]
+        excess = len(finished) - retention["max_finished"]
+        for index, job in enumerate(finished):
+            if index < excess or (job.finished_at or job.created_at) < cutoff:
+                del self.jobs[job.id]
+
+    def _add_event(self, job, event):
+        """Record a pipeline progress event and wake any waiting stream clients."""
+        # The full result is delivered with the final status update instead
+        event = {key: value for key, value in event.items() if key != "result"}
+        with self.condition:
+            job.events.append(event)
+            job.version += 1
+            self.condition.notify_all()
+
+    def _worker_loop(self):
+        """Pull jobs off the queue and run them through the pipeline."""
+        while True:
+            job = self.queue.get()
+            self._update(job, status="running", started_at=time.time())
+            logging.info(f"Worker {threading.current_thread().name} processing job {job.id}")
+
+            try:
+                output_file = os.path.join(self.output_dir, f"{job.video_id}.txt")
+                result = self.agent_system.process_youtube_url(
+                    job.url,
+                    output_file=output_file,
+                    on_event=lambda event, job=job: self._add_event(job, event)
+                )
+                if result.get("success"):
+                    self._update(job, status="succeeded", result=result, finished_at=time.time())
+                else:
+                    self._update(job, status="failed", result=result,
+                                 error=result.get("error", "Unknown error"), finished_at=time.time())
+            except Exception as e:
+                logging.exception(f"Unexpected error while processing job {job.id}: {str(e)}")
+                self._update(job, status="failed", error=f"Processing error: {str(e)}", finished_at=time.time())
+            finally:
+                self.queue.task_done()
+
+
+class RepurposerRequestHandler(BaseHTTPRequestHandler):
+    """Routes HTTP requests to the shared JobManager."""
+
+    manager = None  # Set by create_server
+
+    def do_GET(self):
+        parts = [part for part in self.path.split("?")[0].split("/") if part]
+
+        if parts == ["health"]:
+            self._send_json(200, self.manager.stats())
+        elif parts == ["corpus", "search"]:
+            self._search_corpus()
+        elif parts == ["jobs"]:
+            self._send_json(200, {"jobs": [job.to_dict(include_result=False) for job in self.manager.list_jobs()]})
+        elif len(parts) == 2 and parts[0] == "jobs":
+            job = self.manager.get(parts[1])
+            if not job:
+                self._send_json(404, {"error": "Job not found"})
+            else:
+                self._send_json(200, job.to_dict())
+        elif len(parts) == 3 and parts[0] == "jobs" and parts[2] == "events":
+            job = self.manager.get(parts[1])
+            if not job:
+                self._send_json(404, {"error": "Job not found"})
+            else:
+                self._stream_events(job)
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+    def do_POST(self):
+        if self.path.split("?")[0].rstrip("/") != "/jobs":
+            self._send_json(404, {"error": "Not found"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except (ValueError, json.JSONDecodeError):
+            self._send_json(400, {"error": "Request body must be valid JSON"})
+            return
+
+        url = payload.get("url") if isinstance(payload, dict) else None
+        if not url:
+            self._send_json(400, {"error": "Missing 'url' in request body"})
+            return
+
+        try:
+            job, deduplicated = self.manager.submit(url)
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+            return
+        except queue.Full:
+            self._send_json(503, {"error": "Job queue is full. Try again later."})
+            return
+
+        response = job.to_dict(include_result=False)
+        response["deduplicated"] = deduplicated
+        self._send_json(200 if deduplicated else 202, response)
+
+    def _search_corpus(self):
+        """Search the cross-video index: ?q=<text>[&kind=transcript|post][&platform=...][&limit=N]."""
+        corpus_index = self.manager.agent_system.corpus_index
+        if not corpus_index:
+            self._send_json(404, {"error": "Corpus index is disabled"})
+            return
+
+        params = parse_qs(urlparse(self.path).query)
+        query = params.get("q", [""])[0]
+        if not query:
+            self._send_json(400, {"error": "Missing 'q' query parameter"})
+            return
+
+        try:
+            limit = min(int(params.get("limit", ["5"])[0]), 50)
+        except ValueError:
+            self._send_json(400, {"error": "'limit' must be an integer"})
+            return
+
+        results = corpus_index.search(
+            query,
+            kind=params.get("kind", [None])[0],
+            platform=params.get("platform", [None])[0],
+            limit=limit
+        )
+        self._send_json(200, {"query": query, "results": results})
+
+    def _stream_events(self, job):
+        """Stream job status changes and pipeline events as Server-Sent Events until the job finishes."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+
+        version = None
+        status = None
+        sent_events = 0
+        try:
+            while True:
+                current = job.version
+                if current != version:
+                    version = current
+                    for event in job.events[max(sent_events - job.events_dropped, 0):]:
+                        self._write_event(event["type"], event)
+                        sent_events += 1
+                    if job.status != status or job.status in TERMINAL_STATUSES:
+                        status = job.status
+                        self._write_event("status", job.to_dict())
+                    if job.status in TERMINAL_STATUSES:
+                        break
+                else:
+                    # Keep idle connections alive through proxies
+                    self.wfile.write(b": keep-alive\n\n")
+                    self.wfile.flush()
+                self.manager.wait_for_update(job, version)
+        except (BrokenPipeError, ConnectionResetError):
+            logging.info(f"Event stream for job {job.id} closed by client")
+
+    def _write_event(self, event, data):
+        self.wfile.write(f"event: {event}\ndata: {json.dumps(data)}\n\n".encode("utf-8"))
+        self.wfile.flush()
+
+    def _send_json(self, status, data):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logging.info(f"{self.address_string()} - {format % args}")
+
+
+def create_server(host=None, port=None, workers=None):
+    """
+    Build the HTTP server and start its worker pool.
+
+    Args:
+        host (str): Interface to bind (defaults to server_config["host"])
+        port (int): Port to bind (defaults to server_config["port"])
+        workers (int): Number of pipeline workers (defaults to server_config["workers"])
+
+    Returns:
+        ThreadingHTTPServer: The server, ready for serve_forever()
+    """
+    manager = JobManager(workers=workers)
+    manager.start()
+
+    handler = type("BoundRequestHandler", (RepurposerRequestHandler,), {"manager": manager})
+    return ThreadingHTTPServer((host or server_config["host"], port or server_config["port"]), handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Content Repurposer as an HTTP service.")
+    parser.add_argument("--host", default=server_config["host"], help="Interface to bind")
+    parser.add_argument("--port", type=int, default=server_config["port"], help="Port to bind")
+    parser.add_argument("--workers", type=int, default=server_config["workers"], help="Number of pipeline workers")
+    args = parser.parse_args()
+
+    server = create_server(args.host, args.port, args.workers)
+    logging.info(f"--- Content Repurposer service listening on http://{args.host}:{args.port} ---")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logging.info("Shutting down Content Repurposer service")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
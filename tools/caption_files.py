@@ -0,0 +1,288 @@
+"""
+Streaming parsers for local caption files.
+
+For our own uploads the caption files already exist, so there is no need to
+scrape them through Apify. These parsers read WebVTT, SRT and JSON captions
+(youtube-transcript-api / Apify caption lists, JSON Lines, and YouTube's
+json3 format) into the caption dicts SegmentedTranscript.from_captions
+accepts, without loading the whole file first:
+
+    {"text": "...", "start": "00:01:02.500", "end": "00:01:05.000"}
+
+VTT/SRT files are read line by line and top-level JSON arrays element by
+element, so a multi-hour transcript never exists as both a file buffer and
+a parsed document at once.
+"""
+
+import os
+import re
+import json
+import itertools
+import hashlib
+import datetime
+
+CAPTION_EXTENSIONS = (".vtt", ".srt", ".json", ".jsonl")
+
+_TIMING = re.compile(r"^\s*(\d[\d:.,]*)\s*-->\s*(\d[\d:.,]*)")
+_TAGS = re.compile(r"<[^>]*>")
+_WHITESPACE = re.compile(r"\s+")
+# yt-dlp names files "<title> [<video id>].<lang>.vtt"
+_YTDLP_ID = re.compile(r"\[([A-Za-z0-9_-]{11})\]")
+_JSON_ITEM_END = re.compile(r"\s*(,|\])")
+_JSON_SKIP = re.compile(r"\s*")
+
+
+def is_caption_file(path):
+    """Whether path is an existing caption file (or a directory to scan for them)."""
+    return os.path.isdir(path) or (os.path.isfile(path) and path.lower().endswith(CAPTION_EXTENSIONS))
+
+
+def find_caption_files(path):
+    """
+    List the caption files under a directory (or the file itself).
+
+    Args:
+        path (str): A caption file or a directory of them
+
+    Returns:
+        list: Caption file paths in sorted order
+    """
+    if os.path.isfile(path):
+        return [path]
+    found = []
+    for root, _, files in os.walk(path):
+        found.extend(os.path.join(root, name) for name in files if name.lower().endswith(CAPTION_EXTENSIONS))
+    return sorted(found)
+
+
+def caption_video_id(path, metadata=None):
+    """
+    A stable video ID for a caption file, used to key artifacts and the corpus.
+
+    The YouTube ID is used when the file or its metadata names one; otherwise
+    the ID is derived from the file name.
+    """
+    metadata = metadata or {}
+    video_id = metadata.get("id") or metadata.get("videoId")
+    if video_id:
+        return str(video_id)
+    name = os.path.basename(path)
+    match = _YTDLP_ID.search(name)
+    if match:
+        return match.group(1)
+    stem = name.split(".")[0]
+    slug = re.sub(r"[^A-Za-z0-9_-]+", "-", stem).strip("-")[:40]
+    digest = hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()[:8]
+    return f"local-{slug or 'captions'}-{digest}"
+
+
+def _clean_cue(text):
+    return _WHITESPACE.sub(" ", _TAGS.sub("", text)).strip()
+
+
+def iter_cue_captions(lines):
+    """
+    Parse WebVTT or SRT cues from an iterable of lines.
+
+    Blocks without a timing line (the WEBVTT header, NOTE/STYLE/REGION blocks)
+    are skipped, as are SRT cue numbers. Auto-generated YouTube VTT repeats
+    the previous caption line at the top of each cue; repeated lines are
+    dropped so the text is not duplicated.
+
+    Args:
+        lines (iterable): Lines of the caption file
+
+    Yields:
+        dict: {"text", "start", "end"}
+    """
+    timing = None
+    text_lines = []
+    previous = None
+
+    def flush():
+        nonlocal previous
+        new_lines = []
+        for line in text_lines:
+            cleaned = _clean_cue(line)
+            if cleaned and cleaned != previous:
+                new_lines.append(cleaned)
+                previous = cleaned
+        if new_lines:
+            return {"text": " ".join(new_lines), "start": timing[0], "end": timing[1]}
+        return None
+
+    for line in lines:
+        line = line.rstrip("\r\n")
+        match = _TIMING.match(line)
+        if match:
+            if timing:
+                cue = flush()
+                if cue:
+                    yield cue
+            timing = match.groups()
+            text_lines = []
+        elif not line.strip():
+            if timing:
+                cue = flush()
+                if cue:
+                    yield cue
+            timing = None
+            text_lines = []
+        elif timing:
+            text_lines.append(line)
+
+    if timing:
+        cue = flush()
+        if cue:
+            yield cue
+
+
+def _iter_json_array(f, chunk_size=65536):
+    """
+    Yield the elements of a top-level JSON array without parsing the whole file.
+
+    An element that fails to decode is retried with more of the file; once the
+    file is exhausted the error is reported as truncation only if it is at the
+    end of the data, and otherwise as the decoder's own error and offset.
+    """
+    decoder = json.JSONDecoder()
+    buffer = f.read(chunk_size)
+    offset = 0  # File position of buffer[0], in characters
+    position = _JSON_SKIP.match(buffer).end() + 1  # Past the opening "["
+    while True:
+        position = _JSON_SKIP.match(buffer, position).end()
+        if buffer.startswith("]", position):
+            return
+        try:
+            item, end = decoder.raw_decode(buffer, position)
+            separator = _JSON_ITEM_END.match(buffer, end)
+            if not separator:
+                raise json.JSONDecodeError("Expecting ',' delimiter", buffer, _JSON_SKIP.match(buffer, end).end())
+        except json.JSONDecodeError as e:
+            more = f.read(chunk_size)
+            if more:
+                offset += position
+                buffer = buffer[position:] + more
+                position = 0
+                continue
+            name = getattr(f, "name", "caption file")
+            if e.pos >= len(buffer.rstrip()) or e.msg.startswith("Unterminated"):
+                raise ValueError(f"Truncated JSON array in {name}") from e
+            raise ValueError(f"Invalid JSON in {name}: {e.msg} at character {offset + e.pos}") from e
+        yield item
+        if separator.group(1) == "]":
+            return
+        position = separator.end()
+
+
+def _json_caption(item):
+    """Normalize one JSON caption item to a caption dict (or plain string)."""
+    if isinstance(item, str):
+        return item
+    if "segs" in item:  # YouTube json3 event
+        text = "".join(seg.get("utf8", "") for seg in item.get("segs") or [])
+        return {"text": text, "start": item.get("tStartMs", 0) / 1000, "dur": item.get("dDurationMs", 0) / 1000}
+    if "tStartMs" in item:  # json3 event without text (window/style events)
+        return None
+    return item
+
+
+def _json_captions(items):
+    for item in items:
+        caption = _json_caption(item)
+        if caption:
+            yield caption
+
+
+def _iter_file(path):
+    with open(path, encoding="utf-8-sig") as f:
+        yield from iter_cue_captions(f)
+
+
+def _iter_jsonl(path):
+    with open(path, encoding="utf-8-sig") as f:
+        yield from _json_captions(json.loads(line) for line in f if line.strip())
+
+
+def _iter_json_list(path):
+    with open(path, encoding="utf-8-sig") as f:
+        yield from _iter_json_array(f)
+
+
+def _document_captions(document):
+    """Caption items of a JSON document (Apify dataset item or json3), or None if it has none."""
+    if not isinstance(document, dict):
+        return None
+    for key in ("captions", "events", "segments"):
+        if isinstance(document.get(key), list):
+            return document[key]
+    return None
+
+
+def _document_metadata(document, metadata):
+    """Update metadata with the title, channel, date and id of a JSON document."""
+    metadata.update({
+        "title": document.get("title") or metadata["title"],
+        "channel": document.get("channelName") or document.get("channel") or metadata["channel"],
+        "published_date": document.get("datePublished") or document.get("published_date") or metadata["published_date"]
+    })
+    for key in ("id", "videoId"):
+        if document.get(key):
+            metadata[key] = document[key]
+
+
+def open_caption_file(path):
+    """
+    Open a caption file for streaming.
+
+    Top-level JSON objects (an Apify dataset item with "captions", or json3
+    with "events") are loaded whole, since their metadata is needed up front;
+    every other format is parsed lazily as the captions are consumed. A JSON
+    array holding a single dataset item (an Apify dataset export of one video)
+    is read like the item itself; exports of several videos are rejected.
+
+    Args:
+        path (str): VTT, SRT, JSON or JSON Lines caption file
+
+    Returns:
+        tuple: (captions iterator, metadata dict with title/channel/published_date and optional id)
+
+    Raises:
+        ValueError: If the file is a dataset export of more than one video
+    """
+    extension = os.path.splitext(path)[1].lower()
+    modified = datetime.date.fromtimestamp(os.path.getmtime(path)).isoformat()
+    title = _YTDLP_ID.sub("", os.path.basename(path).split(".")[0]).strip() or os.path.basename(path)
+    metadata = {"title": title, "channel": "Local captions", "published_date": modified}
+
+    if extension in (".vtt", ".srt"):
+        return _iter_file(path), metadata
+    if extension == ".jsonl":
+        return _iter_jsonl(path), metadata
+
+    with open(path, encoding="utf-8-sig") as f:
+        first = f.read(1)
+        while first and first.isspace():
+            first = f.read(1)
+        if first == "[":
+            items = _iter_json_list(path)
+            head = next(items, None)
+            if _document_captions(head) is None:
+                return _json_captions(itertools.chain([head], items) if head is not None else []), metadata
+            # An Apify dataset export: an array of dataset items, one per video
+            second = next(items, None)
+            items.close()
+            if second is not None:
+                raise ValueError(
+                    f"{path} is a dataset export of several videos; "
+                    "save each item to its own file (one video per file) and process the directory"
+                )
+            _document_metadata(head, metadata)
+            return _json_captions(_document_captions(head)), metadata
+        f.seek(0)
+        document = json.load(f)
+
+    items = _document_captions(document) or []
+    if isinstance(document, dict):
+        _document_metadata(document, metadata)
+    return _json_captions(items), metadata
@@ -0,0 +1,65 @@
+"""
+Stitching of independently refined, overlapping transcript chunks.
+
+refine_transcript cuts the transcript into chunks that overlap by
+REFINE_CHUNK_OVERLAP characters so no sentence loses its context, and
+refines each chunk separately. Joined as they are, every overlap appears
+twice in the refined transcript. stitch_overlap aligns the head of a chunk
+with the tail of the previous one, word by word and ignoring case and
+punctuation (refinement changes both), and drops the head words the
+previous chunk already covers.
+
+Only the following chunk is trimmed. Text that has already been produced
+never changes, so the stitched transcript is still built by appending pieces.
+"""
+
+import re
+from difflib import SequenceMatcher
+
+_WORD = re.compile(r"\S+")
+_NON_WORD = re.compile(r"[^\w']+")
+
+
+def _words(text, offset=0):
+    """(start, end, normalised word) for each whitespace-separated word in text."""
+    return [
+        (match.start() + offset, match.end() + offset, _NON_WORD.sub("", match.group().lower()))
+        for match in _WORD.finditer(text)
+    ]
+
+
+def stitch_overlap(previous, following, window_chars=600, min_words=4):
+    """
+    Remove the start of `following` that repeats the end of `previous`.
+
+    The last `window_chars` characters of previous and the first
+    `window_chars` of following are aligned; the last run of at least
+    `min_words` matching words anchors the seam. Words of following up to
+    the point where previous ends are dropped.
+
+    Args:
+        previous (str): Text already produced
+        following (str): The next chunk, starting with a refined copy of the overlap
+        window_chars (int): How far from the seam to look for the overlap
+        min_words (int): Shortest word run accepted as an alignment
+
+    Returns:
+        tuple: (following without the repeated head, characters removed)
+    """
+    tail_start = max(0, len(previous) - window_chars)
+    tail = _words(previous[tail_start:], tail_start)
+    head = _words(following[:window_chars])
+    if len(tail) < min_words or len(head) < min_words:
+        return following, 0
+
+    matcher = SequenceMatcher(None, [word for _, _, word in tail], [word for _, _, word in head], autojunk=False)
+    blocks = [block for block in matcher.get_matching_blocks() if block.size >= min_words]
+    if not blocks:
+        return following, 0
+
+    tail_index, head_index, size = blocks[-1]
+    # Words previous still has after the anchor are assumed to cover as many words of following
+    skip = head_index + size + (len(tail) - tail_index - size)
+    cut = head[skip][0] if skip < len(head) else head[-1][1]
+    stitched = following[cut:].lstrip()
+    return stitched, len(following) - len(stitched)
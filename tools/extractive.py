@@ -0,0 +1,102 @@
+"""
+Extractive compression of transcript text to a token budget.
+
+Transcript slices sent as prompt context repeat themselves and carry filler,
+and input tokens cost both latency and money. compress_text keeps the most
+informative sentences of a slice, in their original order, until the budget
+is spent:
+
+    centrality  cosine similarity of a sentence's TF-IDF vector to the
+                slice's centroid (how typical of the slice the sentence is)
+    novelty     one minus its highest similarity to a sentence already kept,
+                so repeated points are kept once
+
+Sentences are picked greedily by a weighted mix of the two (maximal marginal
+relevance). Term statistics are computed on a NumPy TF-IDF matrix.
+"""
+
+import re
+from collections import Counter
+from .topic_dedup import STOPWORDS
+
+import numpy as np
+
+_SENTENCE = re.compile(r"[^.!?\n]+[.!?]*")
+_TERM = re.compile(r"[a-z0-9']+")
+
+MAX_SENTENCE_WORDS = 40  # Unpunctuated text is cut into pseudo-sentences of this many words
+MIN_SENTENCE_WORDS = 4   # Shorter sentences ("Yeah.", "Right, so.") are never kept
+REPEAT_SIMILARITY = 0.9  # Sentences this similar to a kept one are repeats and never kept
+
+
+def split_sentences(text):
+    """Sentences of a text, long unpunctuated runs cut into MAX_SENTENCE_WORDS-word pieces."""
+    sentences = []
+    for match in _SENTENCE.finditer(text):
+        words = match.group().split()
+        for index in range(0, len(words), MAX_SENTENCE_WORDS):
+            sentences.append(" ".join(words[index:index + MAX_SENTENCE_WORDS]))
+    return sentences
+
+
+def _terms(sentence):
+    return [term for term in _TERM.findall(sentence.lower()) if len(term) > 2 and term not in STOPWORDS]
+
+
+def _similarity(counts):
+    """Centrality of each sentence (vector) and the sentence-by-sentence cosine similarity matrix."""
+    vocabulary = {term: i for i, term in enumerate(sorted({term for count in counts for term in count}))}
+    matrix = np.zeros((len(counts), max(len(vocabulary), 1)))
+    for row, count in enumerate(counts):
+        for term, n in count.items():
+            matrix[row, vocabulary[term]] = n
+    document_frequency = (matrix > 0).sum(axis=0)
+    matrix *= np.log((1 + len(counts)) / (1 + document_frequency)) + 1
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    matrix = np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+    centroid = matrix.mean(axis=0)
+    centroid_norm = np.linalg.norm(centroid)
+    centrality = matrix @ centroid / centroid_norm if centroid_norm else np.zeros(len(counts))
+    return centrality, matrix @ matrix.T
+
+
+def compress_text(text, max_tokens, count=None, novelty=0.3):
+    """
+    Shrink a text to at most max_tokens by keeping its most informative sentences.
+
+    Args:
+        text (str): Transcript text
+        max_tokens (int): Token budget for the result
+        count (callable): Token counter (defaults to counting words)
+        novelty (float): Weight of the redundancy penalty (0 keeps the most central
+            sentences regardless of repetition)
+
+    Returns:
+        str: The kept sentences in their original order (text itself if it already fits)
+    """
+    count = count or (lambda value: len(value.split()))
+    if count(text) <= max_tokens:
+        return text
+    sentences = [sentence for sentence in split_sentences(text) if len(sentence.split()) >= MIN_SENTENCE_WORDS]
+    if not sentences:
+        return ""
+
+    counts = [Counter(_terms(sentence)) for sentence in sentences]
+    centrality, similarity = _similarity(counts)
+    sizes = np.array([count(sentence) + 1 for sentence in sentences])
+
+    kept = []
+    available = np.ones(len(sentences), dtype=bool)  # Not kept yet
+    redundancy = np.zeros(len(sentences))  # Highest similarity to any kept sentence
+    budget = max_tokens
+    while True:
+        candidates = available & (sizes <= budget) & (redundancy < REPEAT_SIMILARITY)
+        if not candidates.any():
+            break
+        score = np.where(candidates, (1 - novelty) * centrality - novelty * redundancy, -np.inf)
+        best = int(np.argmax(score))
+        kept.append(best)
+        available[best] = False
+        budget -= sizes[best]
+        redundancy = np.maximum(redundancy, similarity[best])
+    return " ".join(sentences[index] for index in sorted(kept))
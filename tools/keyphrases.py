@@ -0,0 +1,266 @@
+"""
+Local keyphrase extraction and topic skeletons.
+
+Keyphrases are ranked with TextRank: content words are nodes, words that
+occur within a few words of each other in the same sentence are linked, and
+PageRank over that graph scores each word by how central it is to the
+transcript. Candidate phrases are runs of up to three adjacent top-ranked
+words between stopwords and punctuation. A phrase scores the sum of its word
+ranks, scaled by how often it is mentioned.
+
+topic_skeletons turns the ranked phrases into topics shaped like the LLM
+topic output (title, description, key_points, target_audience, platform).
+The key points are phrases taken from the transcript itself, which is what
+the generators search the transcript for.
+
+Links are counted and ranked on NumPy arrays: the co-occurrence matrix is
+kept as its non-zero entries (pair indexes and weights) and the iteration
+uses bincount, so memory grows with the number of links rather than with
+the vocabulary squared.
+"""
+
+import re
+import math
+from collections import defaultdict
+from .topic_dedup import STOPWORDS
+
+import numpy as np
+
+# Function words missing from STOPWORDS and spoken-language words that carry no topic on their own
+FILLER_WORDS = frozenset("""
+was were been being has have had does did done doing there here where which who whom whose would could
+should might must may shall all any both each every few other another some such only own same too very
+just also again once because before after between during through above below over under off out while
+his her him she he i me my mine myself itself theirs ours yours not no nor yet ever never always
+actually basically going gonna got kind know like lot lots maybe mean okay one pretty really right said
+say says see something sort stuff thing things think want yeah yes well get gets getting make makes made
+need needs let lets look looking way ways much many now last next first even still back come came
+""".split())
+
+_SENTENCE = re.compile(r"[^.!?\n]+[.!?]*")
+_CLAUSE_BREAK = re.compile(r"[,;:()\"—]")
+_TOKEN = re.compile(r"[A-Za-z][A-Za-z'\-]*")
+
+MAX_PHRASE_WORDS = 3
+MAX_SENTENCE_WORDS = 40  # Unpunctuated text is cut into pseudo-sentences of this many words
+WINDOW = 4               # Words this close in a sentence are linked
+DAMPING = 0.85
+ITERATIONS = 40
+
+
+def _is_content(word):
+    return len(word) > 2 and word not in STOPWORDS and word not in FILLER_WORDS
+
+
+def _sentences(text):
+    """(start offset, text) of each sentence, long unpunctuated runs cut into pieces."""
+    sentences = []
+    for match in _SENTENCE.finditer(text):
+        words = list(re.finditer(r"\S+", match.group()))
+        for index in range(0, len(words), MAX_SENTENCE_WORDS):
+            piece = words[index:index + MAX_SENTENCE_WORDS]
+            start, end = piece[0].start(), piece[-1].end()
+            sentences.append((match.start() + start, match.group()[start:end]))
+    return sentences
+
+
+def _runs(sentence):
+    """Runs of adjacent content words (lower case) in one sentence, and all its content words."""
+    runs = []
+    content = []
+    for clause in _CLAUSE_BREAK.split(sentence):
+        run = []
+        for token in _TOKEN.findall(clause.lower()):
+            token = token.strip("'-")
+            if _is_content(token):
+                run.append(token)
+                content.append(token)
+            elif run:
+                runs.append(run)
+                run = []
+        if run:
+            runs.append(run)
+    return runs, content
+
+
+def _phrases(runs, keywords):
+    """
+    Phrases of one sentence: maximal stretches of keywords within a run, at
+    most MAX_PHRASE_WORDS long, each word kept once ("monitoring monitoring
+    learning" is "monitoring learning").
+    """
+    phrases = []
+    for run in runs:
+        stretch = []
+        for word in run + [None]:
+            if word in keywords:
+                stretch.append(word)
+                continue
+            phrases.extend(
+                tuple(dict.fromkeys(stretch[i:i + MAX_PHRASE_WORDS])) for i in range(0, len(stretch), MAX_PHRASE_WORDS)
+            )
+            stretch = []
+    return phrases
+
+
+def _cooccurrence(sentences_content):
+    """
+    Word links of the transcript as parallel arrays.
+
+    Returns:
+        tuple: (vocabulary, first word index, second word index, link weight),
+            one entry per linked pair (first < second), weight = times the pair
+            occurs within WINDOW words of each other
+    """
+    words = sorted({word for content in sentences_content for word in content})
+    index = {word: i for i, word in enumerate(words)}
+    firsts, seconds = [], []
+    for content in sentences_content:
+        ids = np.array([index[word] for word in content], dtype=np.int64)
+        for distance in range(1, WINDOW):
+            firsts.append(ids[:-distance])
+            seconds.append(ids[distance:])
+    if not firsts:
+        return [], None, None, None
+    first, second = np.concatenate(firsts), np.concatenate(seconds)
+    linked = first != second
+    low, high = np.minimum(first, second)[linked], np.maximum(first, second)[linked]
+    # Count each unordered pair once per co-occurrence, keyed as low * V + high
+    pairs, weight = np.unique(low * len(words) + high, return_counts=True)
+    low, high = np.divmod(pairs, len(words))
+    # Only words with at least one link are ranked
+    nodes = np.unique(np.concatenate([low, high]))
+    return [words[i] for i in nodes], np.searchsorted(nodes, low), np.searchsorted(nodes, high), weight.astype(float)
+
+
+def rank_words(sentences_content):
+    """
+    TextRank score of every content word.
+
+    Args:
+        sentences_content (list): Content words of each sentence, in order
+
+    Returns:
+        dict: word -> rank (ranks sum to about 1)
+    """
+    vocabulary, low, high, weight = _cooccurrence(sentences_content)
+    if not vocabulary:
+        return {}
+    size = len(vocabulary)
+    source, target = np.concatenate([low, high]), np.concatenate([high, low])
+    weight = np.concatenate([weight, weight])
+    strength = np.bincount(source, weights=weight, minlength=size)
+    share = weight / strength[source]
+    rank = np.full(size, 1.0 / size)
+    for _ in range(ITERATIONS):
+        rank = (1 - DAMPING) / size + DAMPING * np.bincount(target, weights=share * rank[source], minlength=size)
+    return dict(zip(vocabulary, rank.tolist()))
+
+
+def extract_keyphrases(text, limit=20):
+    """
+    Rank the key phrases of a text.
+
+    Args:
+        text (str): Transcript text
+        limit (int): Maximum phrases to return
+
+    Returns:
+        list: {"phrase", "score", "count", "offset", "sentences"} dicts, best first;
+            "sentences" holds (offset, text) of the sentences mentioning the phrase
+    """
+    sentences = _sentences(text)
+    parsed = [_runs(sentence) for _, sentence in sentences]
+    ranks = rank_words([content for _, content in parsed])
+    if not ranks:
+        return []
+
+    # As in TextRank, phrases are built only from the top third of the words
+    ordered = sorted(ranks, key=ranks.get, reverse=True)
+    keywords = set(ordered[:max(10, len(ordered) // 3)])
+    mentions = defaultdict(list)
+    for sentence_index, (runs, _) in enumerate(parsed):
+        for phrase in _phrases(runs, keywords):
+            mentions[phrase].append(sentence_index)
+
+    scored = []
+    for phrase, sentence_indexes in mentions.items():
+        score = sum(ranks.get(word, 0.0) for word in phrase) * (1 + math.log(len(sentence_indexes)))
+        scored.append((score, phrase, sentence_indexes))
+    scored.sort(key=lambda item: -item[0])
+
+    results = []
+    for score, phrase, sentence_indexes in scored:
+        if len(results) >= limit:
+            break
+        # A phrase whose words all belong to a better phrase adds nothing
+        if any(set(phrase) <= set(kept["words"]) for kept in results):
+            continue
+        unique = sorted(set(sentence_indexes))
+        results.append({
+            "phrase": " ".join(phrase),
+            "words": phrase,
+            "score": round(score, 5),
+            "count": len(sentence_indexes),
+            "offset": sentences[unique[0]][0],
+            "sentences": [sentences[i] for i in unique]
+        })
+    for result in results:
+        del result["words"]
+    return results
+
+
+def _description(phrase):
+    """The shortest sentence mentioning a phrase that still says something, trimmed."""
+    sentences = [sentence for _, sentence in phrase["sentences"]]
+    informative = [sentence for sentence in sentences if len(sentence.split()) >= 6] or sentences
+    sentence = min(informative, key=lambda s: abs(len(s.split()) - 20)).strip()
+    return sentence if len(sentence) <= 200 else sentence[:200].rsplit(" ", 1)[0] + "…"
+
+
+def _platform_cycle(quotas):
+    """Platforms in the order ranked phrases are dealt to them: one round per slot, so every quota fills evenly."""
+    order = []
+    for slot in range(max(quotas.values(), default=0)):
+        order.extend(platform for platform, quota in quotas.items() if quota > slot)
+    return order
+
+
+def topic_skeletons(text, quotas):
+    """
+    Build topic candidates from a transcript without an LLM.
+
+    Phrases are dealt to the platforms in rank order, each phrase to exactly
+    one platform, so every platform has about three candidates per slot and
+    select_distinct_topics only skips genuinely similar phrases.
+
+    Args:
+        text (str): The (refined) transcript
+        quotas (dict): platform -> topics wanted (content_config["posts_per_platform"])
+
+    Returns:
+        list: Topic dicts with title, description, key_points, target_audience, platform
+    """
+    wanted = sum(quotas.values())
+    phrases = extract_keyphrases(text, limit=wanted * 3)
+    platforms = _platform_cycle(quotas)
+    if not platforms:
+        return []
+
+    topics = []
+    for rank, phrase in enumerate(phrases):
+        own = {offset for offset, _ in phrase["sentences"]}
+        # Key points: the phrase and the best phrases mentioned in the same sentences
+        related = [
+            other["phrase"] for other in phrases
+            if other is not phrase and own & {offset for offset, _ in other["sentences"]}
+        ][:2]
+        topics.append({
+            "title": phrase["phrase"].title(),
+            "description": _description(phrase),
+            "key_points": [phrase["phrase"]] + related,
+            "target_audience": f"People interested in {phrase['phrase']}",
+            "platform": platforms[rank % len(platforms)],
+            "source": "keyphrases"
+        })
+    return topics
@@ -0,0 +1,128 @@
+"""
+Local, rule-based quality checks for generated drafts.
+
+The LLM edit pass costs a full round trip per post, and for short-form posts
+the draft is usually already fine. check_post runs cheap platform rules
+(length limits, hashtag count, heading structure, truncation artifacts,
+filler preambles) so that only failing drafts are sent to the editor, along
+with the specific problems to fix.
+"""
+
+import re
+
+HASHTAG_PATTERN = re.compile(r"(?<![\w#])#[A-Za-z][\w]*")
+
+# Chatty wrapper text models put around the content they were asked for
+PREAMBLE_PATTERN = re.compile(
+    r"^\s*(?:sure|certainly|of course|absolutely|okay|ok|great)\b[^\n]*\n"
+    r"|^\s*here(?:'s| is| are)\b[^\n]*:\s*\n"
+    r"|^\s*(?:edited|revised|improved|final)\s+(?:version|post|tweet|blog post)[^\n]*:\s*\n",
+    re.IGNORECASE
+)
+POSTAMBLE_PATTERN = re.compile(
+    r"\n\s*(?:let me know|i hope this|feel free to|this (?:version|edit|revision)|note:)[^\n]*\s*$",
+    re.IGNORECASE
+)
+TRUNCATION_PATTERN = re.compile(r"(?:\.\.\.|…)\s*$")
+
+
+def word_count(text):
+    return len(text.split())
+
+
+def strip_wrapper(text):
+    """Remove a leading filler preamble and trailing sign-off, if present."""
+    stripped = PREAMBLE_PATTERN.sub("", text, count=1)
+    stripped = POSTAMBLE_PATTERN.sub("", stripped)
+    return stripped.strip() or text.strip()
+
+
+def _ends_cleanly(text):
+    """Whether the text ends like finished prose (punctuation, hashtag, emoji, link or closing markup)."""
+    last_line = text.rstrip().splitlines()[-1] if text.strip() else ""
+    if HASHTAG_PATTERN.search(last_line) or "http" in last_line:
+        return True
+    last_char = last_line.rstrip("*_)\"'”’ ")[-1:]
+    return bool(last_char) and not last_char.isalnum()
+
+
+def check_post(platform, content, limits, rules):
+    """
+    Check a draft against the platform's rules.
+
+    Args:
+        platform (str): blog, linkedin or twitter
+        content (str): The draft text
+        limits (dict): TOOL_CONFIGS["content_limits"] (blog/linkedin in words, twitter in characters)
+        rules (dict): quality_gate_config["rules"]
+
+    Returns:
+        list: Human-readable failures; empty if the draft passes
+    """
+    failures = []
+    text = content.strip()
+    platform_rules = rules.get(platform, {})
+
+    if not text:
+        return ["Post is empty"]
+
+    # Length
+    if platform == "twitter":
+        if len(text) > limits["twitter"]:
+            failures.append(f"Too long: {len(text)} characters (limit {limits['twitter']})")
+    else:
+        words = word_count(text)
+        if words > limits[platform]:
+            failures.append(f"Too long: {words} words (limit {limits[platform]})")
+        if words < platform_rules.get("min_words", 0):
+            failures.append(f"Too short: {words} words (minimum {platform_rules['min_words']})")
+
+    # Hashtags
+    hashtags = len(HASHTAG_PATTERN.findall(text))
+    min_tags, max_tags = platform_rules.get("hashtags", (0, None))
+    if hashtags < min_tags:
+        failures.append(f"Only {hashtags} hashtags (need at least {min_tags})")
+    if max_tags is not None and hashtags > max_tags:
+        failures.append(f"{hashtags} hashtags (at most {max_tags})")
+
+    # Heading structure
+    if platform_rules.get("headings"):
+        headings = [line for line in text.splitlines() if line.startswith("#") and not HASHTAG_PATTERN.match(line)]
+        levels = [len(line) - len(line.lstrip("#")) for line in headings]
+        if not text.startswith("# "):
+            failures.append("Does not start with a '# Title' heading")
+        if levels.count(1) > 1:
+            failures.append("More than one top-level '# ' heading")
+        if not any(level == 2 for level in levels):
+            failures.append("No '## ' subheadings")
+        if any(later - earlier > 1 for earlier, later in zip(levels, levels[1:])):
+            failures.append("Heading levels skip (e.g. '#' followed by '###')")
+    elif re.search(r"^#{1,6} ", text, re.MULTILINE):
+        failures.append("Contains markdown headings, which this platform does not render")
+
+    # Truncation artifacts
+    if TRUNCATION_PATTERN.search(text):
+        failures.append("Ends with an ellipsis (looks truncated)")
+    elif not _ends_cleanly(text):
+        failures.append("Ends mid-sentence")
+    if text.count("**") % 2:
+        failures.append("Unbalanced '**' markup")
+
+    # Filler wrapper text
+    if PREAMBLE_PATTERN.match(text):
+        failures.append("Starts with a filler preamble instead of the content")
+    if POSTAMBLE_PATTERN.search(text):
+        failures.append("Ends with a filler sign-off instead of the content")
+    if platform == "twitter" and len(text) > 1 and text[0] == text[-1] == '"':
+        failures.append("Wrapped in quotation marks")
+
+    return failures
+
+
+def fit_tweet(text, limit=280):
+    """Shorten a tweet to the character limit at a word boundary (last resort when it can't be edited)."""
+    text = text.strip()
+    if len(text) <= limit:
+        return text
+    cut = text[:limit - 1].rsplit(" ", 1)[0].rstrip(" ,;:-")
+    return cut + "…"
@@ -0,0 +1,92 @@
+"""
+Find/replace edit operations against a text.
+
+Instead of rewriting a whole transcript chunk or post, the model can return
+only its changes as a JSON array:
+
+    [{"find": "exact text from the input", "replace": "new text"}]
+
+The operations are parsed and applied here, without another model call. A
+patch applies only if every "find" matches exactly one place in the input and
+no two matches overlap. Whitespace inside a "find" may differ from the input,
+since models often reflow it. Anything else is rejected and the caller falls
+back to a full rewrite.
+"""
+
+import re
+import json
+
+_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+
+def parse_edit_ops(response):
+    """
+    Parse a model response into edit operations.
+
+    Args:
+        response (str): Model output, expected to be a JSON array (optionally fenced)
+
+    Returns:
+        list: (find, replace) tuples, or None if the response is not a valid operation list
+    """
+    if not response:
+        return None
+    text = _FENCE.sub("", response.strip())
+    start, end = text.find("["), text.rfind("]")
+    if start == -1 or end < start:
+        return None
+    try:
+        items = json.loads(text[start:end + 1])
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(items, list):
+        return None
+
+    ops = []
+    for item in items:
+        if not isinstance(item, dict):
+            return None
+        find, replace = item.get("find"), item.get("replace", "")
+        if not isinstance(find, str) or not find.strip() or not isinstance(replace, str):
+            return None
+        ops.append((find, replace))
+    return ops
+
+
+def _pattern(find):
+    """Regex matching find with any run of whitespace in place of its whitespace."""
+    return re.compile(r"\s+".join(re.escape(word) for word in find.split()))
+
+
+def apply_edit_ops(text, ops):
+    """
+    Apply edit operations to a text.
+
+    Args:
+        text (str): The original text
+        ops (list): (find, replace) tuples from parse_edit_ops
+
+    Returns:
+        tuple: (patched text, None) on success, or (None, reason) if the patch does not apply
+    """
+    edits = []
+    for find, replace in ops:
+        matches = _pattern(find).finditer(text)
+        match = next(matches, None)
+        if match is None:
+            return None, f"not found: {find[:60]!r}"
+        if next(matches, None) is not None:
+            return None, f"ambiguous: {find[:60]!r}"
+        edits.append((match.start(), match.end(), replace))
+
+    edits.sort()
+    pieces = []
+    position = 0
+    for start, end, replace in edits:
+        if start < position:
+            return None, "overlapping operations"
+        pieces.append(text[position:start])
+        pieces.append(replace)
+        position = end
+    pieces.append(text[position:])
+    return "".join(pieces), None
@@ -0,0 +1,114 @@
+"""
+Near-duplicate topic elimination.
+
+Topics are generated per transcript chunk, and neighbouring chunks overlap, so
+the model regularly proposes the same idea twice with slightly different
+wording. Every selected topic is turned into posts and edits, so each
+duplicate costs several LLM calls. This module compares topics locally by
+word-shingle Jaccard similarity over their title, description and key points,
+and picks a distinct set that still fills each platform's quota from the
+remaining candidates.
+
+With at most a few dozen candidates per video, exact pairwise Jaccard is
+cheaper than MinHash signatures and has no estimation error.
+"""
+
+import re
+import logging
+
+_WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset("""
+a an and are as at be but by can do for from how in into is it its of on or our so that the their this
+to up us what when why with you your we will about more most than then they them these those not
+""".split())
+
+
+def _normalize(word):
+    """Crude stemming so 'engines'/'engine' and 'testing'/'tests' compare equal."""
+    for suffix in ("ing", "ies", "es", "s", "ed"):
+        if len(word) > len(suffix) + 3 and word.endswith(suffix):
+            return word[:-len(suffix)]
+    return word
+
+
+def topic_shingles(topic):
+    """
+    Build the shingle set for a topic: content words plus adjacent word pairs.
+
+    Args:
+        topic (dict): Topic with title, description and key_points
+
+    Returns:
+        frozenset: Unigram and bigram shingles
+    """
+    key_points = topic.get("key_points") or []
+    if isinstance(key_points, str):
+        key_points = [key_points]
+    text = " ".join([str(topic.get("title", "")), str(topic.get("description", ""))] + [str(p) for p in key_points])
+
+    words = [_normalize(w) for w in _WORD_PATTERN.findall(text.lower()) if w not in STOPWORDS]
+    shingles = set(words)
+    shingles.update(f"{a} {b}" for a, b in zip(words, words[1:]))
+    return frozenset(shingles)
+
+
+def jaccard(a, b):
+    """Jaccard similarity of two sets (0.0 when both are empty)."""
+    if not a and not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def select_distinct_topics(topics, quotas, threshold=0.45):
+    """
+    Choose up to quota topics per platform, skipping near-duplicates.
+
+    Candidates are considered in their original order within each platform,
+    and a candidate is skipped if it is too similar to any topic already
+    selected for any platform (every topic is later written up for every
+    platform, so cross-platform duplicates are just as wasteful). Skipped
+    slots are backfilled by the platform's next distinct candidate.
+
+    Args:
+        topics (list): Candidate topics, each with a "platform" field
+        quotas (dict): platform -> maximum topics to keep, in output order
+        threshold (float): Jaccard similarity at or above which two topics are duplicates
+
+    Returns:
+        tuple: (selected topics, list of {"title", "duplicate_of", "similarity"} for skipped ones)
+    """
+    selected = []
+    selected_shingles = []
+    duplicates = []
+
+    for platform, quota in quotas.items():
+        kept = 0
+        for topic in topics:
+            if kept >= quota:
+                break
+            if topic.get("platform") != platform:
+                continue
+
+            shingles = topic_shingles(topic)
+            best_index, best_score = None, 0.0
+            for index, other in enumerate(selected_shingles):
+                score = jaccard(shingles, other)
+                if score > best_score:
+                    best_index, best_score = index, score
+
+            if best_index is not None and best_score >= threshold:
+                duplicates.append({
+                    "title": topic.get("title"),
+                    "duplicate_of": selected[best_index].get("title"),
+                    "similarity": round(best_score, 3)
+                })
+                continue
+
+            selected.append(topic)
+            selected_shingles.append(shingles)
+            kept += 1
+
+    if duplicates:
+        logging.info(f"Collapsed {len(duplicates)} near-duplicate topics: {duplicates}")
+    return selected, duplicates
@@ -0,0 +1,86 @@
+"""
+Fast local estimate of how clean a transcript (or a region of one) already is.
+
+Manually authored captions arrive punctuated, cased and free of most verbal
+filler, so sending them through the LLM refiner costs calls without
+improving them. score_transcript combines four cheap signals:
+
+    punctuation   sentence-ending punctuation per word (auto captions have almost none)
+    casing        share of sentences starting upper-case, and no lower-case " i "
+    sentences     share of sentences with a plausible length (3-40 words)
+    fillers       rate of "um", "uh", "you know" and similar filler words
+
+Each signal is scaled to 0-1 and the weighted mean is the score. Text scoring
+at or above the configured threshold can skip refinement.
+"""
+
+import re
+
+FILLERS = ("um", "uh", "erm", "uhm", "hmm", "mm", "you know", "i mean", "sort of", "kind of", "like i said")
+
+WEIGHTS = {"punctuation": 0.35, "casing": 0.25, "sentences": 0.2, "fillers": 0.2}
+
+_WORD = re.compile(r"[A-Za-z']+")
+_SENTENCE_END = re.compile(r"[.!?]+(?:[\"')\]]*)(?=\s|$)")
+_FILLER = re.compile(r"\b(?:" + "|".join(re.escape(filler) for filler in FILLERS) + r")\b", re.IGNORECASE)
+_LOWER_I = re.compile(r"(?:^|\s)i(?:'m|'ve|'ll|'d)?(?=\s|$)")
+
+# Punctuation per word at which the punctuation signal saturates (about one sentence per 20 words)
+_FULL_PUNCTUATION = 0.05
+# Filler words per word at which the filler signal reaches zero
+_MAX_FILLER_RATE = 0.03
+
+
+def score_transcript(text):
+    """
+    Score how clean a transcript text is.
+
+    Args:
+        text (str): Transcript text (whole or a region)
+
+    Returns:
+        dict: {"score": 0-1, "signals": {name: 0-1}, "words": int}
+    """
+    words = _WORD.findall(text)
+    if len(words) < 20:
+        # Too little text to judge; treat as needing refinement
+        return {"score": 0.0, "signals": dict.fromkeys(WEIGHTS, 0.0), "words": len(words)}
+
+    ends = len(_SENTENCE_END.findall(text))
+    punctuation = min(ends / len(words) / _FULL_PUNCTUATION, 1.0)
+
+    sentences = [sentence.strip() for sentence in _SENTENCE_END.split(text) if sentence.strip()]
+    if ends:
+        capitalised = sum(1 for sentence in sentences if sentence.lstrip("\"'([")[:1].isupper())
+        casing = capitalised / len(sentences)
+    else:
+        casing = 0.0
+    if _LOWER_I.search(text):
+        casing *= 0.5
+
+    lengths = [len(_WORD.findall(sentence)) for sentence in sentences] if ends else []
+    plausible = sum(1 for length in lengths if 3 <= length <= 40)
+    sentence_score = plausible / len(lengths) if lengths else 0.0
+
+    filler_rate = len(_FILLER.findall(text)) / len(words)
+    fillers = max(0.0, 1.0 - filler_rate / _MAX_FILLER_RATE)
+
+    signals = {
+        "punctuation": round(punctuation, 3),
+        "casing": round(casing, 3),
+        "sentences": round(sentence_score, 3),
+        "fillers": round(fillers, 3)
+    }
+    score = sum(WEIGHTS[name] * value for name, value in signals.items())
+    return {"score": round(score, 3), "signals": signals, "words": len(words)}
+
+
+def is_clean(text, threshold):
+    """
+    Whether text is clean enough to skip refinement.
+
+    Returns:
+        tuple: (bool, score dict from score_transcript)
+    """
+    quality = score_transcript(text)
+    return quality["score"] >= threshold, quality
@@ -0,0 +1,241 @@
+"""
+Compact, timestamp-preserving transcript representation.
+
+Captions arrive as thousands of short segments. Joining them into one string
+(as the pipeline needs) loses the segment boundaries and with them every
+timestamp. SegmentedTranscript keeps the joined text as a single buffer and
+stores the segment boundaries in parallel typed arrays:
+
+    offsets[i]    character offset where segment i starts (plus an end sentinel)
+    starts[i]     segment start time in seconds
+    durations[i]  segment duration in seconds
+
+A multi-hour transcript costs a few bytes per segment instead of a Python
+object per caption. Character offsets map to timestamps by binary search,
+and slices are lightweight views over the shared buffer that only build a
+string when their text is read.
+"""
+
+import re
+import math
+import base64
+from array import array
+from bisect import bisect_right
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _clean_caption(text):
+    """Same cleanup the extractor has always applied to the joined transcript."""
+    return _WHITESPACE.sub(" ", str(text).replace("&#39;", "'")).strip()
+
+
+def _to_seconds(value):
+    """Parse seconds from a number, a numeric string or an hh:mm:ss(.mmm) / mm:ss,mmm timestamp."""
+    if value is None or value == "":
+        return math.nan
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).strip().replace(",", ".")
+    try:
+        seconds = 0.0
+        for part in text.split(":"):
+            seconds = seconds * 60 + float(part)
+        return seconds
+    except ValueError:
+        return math.nan
+
+
+def format_timestamp(seconds):
+    """Format seconds as h:mm:ss (or m:ss under an hour); empty string if unknown."""
+    if seconds is None or math.isnan(seconds):
+        return ""
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}" if hours else f"{minutes}:{secs:02d}"
+
+
+class TranscriptView:
+    """A zero-copy slice of a SegmentedTranscript (character range over its buffer)."""
+
+    __slots__ = ("transcript", "start", "end")
+
+    def __init__(self, transcript, start, end):
+        self.transcript = transcript
+        self.start = start
+        self.end = end
+
+    @property
+    def text(self):
+        """The slice's text (materialized on access)."""
+        return self.transcript.text[self.start:self.end]
+
+    @property
+    def start_time(self):
+        return self.transcript.time_at(self.start)
+
+    @property
+    def end_time(self):
+        segment = self.transcript.segment_at(max(self.end - 1, self.start))
+        return self.transcript.segment_end_time(segment)
+
+    def segment_range(self):
+        """(first, last + 1) indexes of the segments this slice touches."""
+        return self.transcript.segment_at(self.start), self.transcript.segment_at(max(self.end - 1, self.start)) + 1
+
+    def __len__(self):
+        return self.end - self.start
+
+    def __str__(self):
+        return self.text
+
+    def __repr__(self):
+        return f"TranscriptView({self.start}:{self.end}, {format_timestamp(self.start_time)})"
+
+
+class SegmentedTranscript:
+    """One transcript text buffer with per-segment offsets and timings in typed arrays."""
+
+    def __init__(self, text, offsets, starts, durations):
+        """
+        Args:
+            text (str): All segments joined with single spaces
+            offsets (array): 'q' array of segment start offsets, plus len(text) as a sentinel
+            starts (array): 'd' array of segment start times (NaN when unknown)
+            durations (array): 'd' array of segment durations (NaN when unknown)
+        """
+        self.text = text
+        self.offsets = offsets
+        self.starts = starts
+        self.durations = durations
+
+    @classmethod
+    def from_captions(cls, captions):
+        """
+        Build a transcript from caption items.
+
+        Items may be plain strings (no timing) or dicts with text plus
+        start/end/duration fields, as produced by the caption parsers and
+        timestamped scraper outputs ("start", "dur"/"duration", "end",
+        "startTime"/"endTime" and "offset" are recognised).
+
+        Args:
+            captions (iterable): Caption strings or dicts, in order
+
+        Returns:
+            SegmentedTranscript: The indexed transcript
+        """
+        parts = []
+        offsets = array("q")
+        starts = array("d")
+        durations = array("d")
+        position = 0
+
+        for item in captions:
+            if isinstance(item, dict):
+                text = _clean_caption(item.get("text", ""))
+                start = _to_seconds(item.get("start", item.get("startTime", item.get("offset"))))
+                duration = _to_seconds(item.get("dur", item.get("duration")))
+                if math.isnan(duration):
+                    end = _to_seconds(item.get("end", item.get("endTime")))
+                    duration = end - start if not math.isnan(end) else math.nan
+            else:
+                text = _clean_caption(item)
+                start = duration = math.nan
+            if not text:
+                continue
+
+            if parts:
+                position += 1  # Joining space
+            offsets.append(position)
+            starts.append(start)
+            durations.append(duration)
+            parts.append(text)
+            position += len(text)
+
+        offsets.append(position)
+        return cls(" ".join(parts), offsets, starts, durations)
+
+    def __len__(self):
+        """Number of segments."""
+        return len(self.starts)
+
+    @property
+    def has_timestamps(self):
+        return any(not math.isnan(start) for start in self.starts)
+
+    def segment_at(self, offset):
+        """Index of the segment containing a character offset (O(log n))."""
+        if not len(self):
+            return 0
+        index = bisect_right(self.offsets, offset, 0, len(self)) - 1
+        return min(max(index, 0), len(self) - 1)
+
+    def segment_end_time(self, index):
+        return self.starts[index] + self.durations[index] if len(self) else math.nan
+
+    def time_at(self, offset, interpolate=False):
+        """
+        Timestamp (seconds) of a character offset.
+
+        Args:
+            offset (int): Character offset into text
+            interpolate (bool): Estimate the position within the segment by its share of characters
+
+        Returns:
+            float: Seconds from the start of the video, or NaN if unknown
+        """
+        if not len(self):
+            return math.nan
+        index = self.segment_at(offset)
+        start = self.starts[index]
+        if not interpolate or math.isnan(self.durations[index]):
+            return start
+        seg_start, seg_end = self.offsets[index], self.offsets[index + 1]
+        fraction = (offset - seg_start) / (seg_end - seg_start) if seg_end > seg_start else 0.0
+        return start + min(max(fraction, 0.0), 1.0) * self.durations[index]
+
+    def time_at_fraction(self, fraction):
+        """
+        Timestamp at a relative position in the transcript.
+
+        Refinement rewrites the text but keeps its order and roughly its
+        length, so a position in the refined transcript maps to the original
+        by its fraction of the whole.
+        """
+        return self.time_at(int(min(max(fraction, 0.0), 1.0) * max(len(self.text) - 1, 0)), interpolate=True)
+
+    def slice(self, start, end):
+        """Zero-copy view of text[start:end]."""
+        return TranscriptView(self, max(start, 0), min(end, len(self.text)))
+
+    def segments(self, first, last):
+        """Zero-copy view of segments first..last-1."""
+        last = min(last, len(self))
+        return TranscriptView(self, self.offsets[first], self.offsets[last] if last < len(self) else len(self.text))
+
+    def locate(self, snippet):
+        """View of the first exact occurrence of snippet in the text, or None."""
+        position = self.text.find(snippet)
+        return self.slice(position, position + len(snippet)) if position >= 0 else None
+
+    def to_dict(self):
+        """JSON-serializable form; the arrays are stored as base64 of their raw bytes."""
+        return {
+            "text": self.text,
+            "offsets": base64.b64encode(self.offsets.tobytes()).decode("ascii"),
+            "starts": base64.b64encode(self.starts.tobytes()).decode("ascii"),
+            "durations": base64.b64encode(self.durations.tobytes()).decode("ascii")
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild a transcript saved with to_dict."""
+        offsets = array("q")
+        offsets.frombytes(base64.b64decode(data["offsets"]))
+        starts = array("d")
+        starts.frombytes(base64.b64decode(data["starts"]))
+        durations = array("d")
+        durations.frombytes(base64.b64decode(data["durations"]))
+        return cls(data["text"], offsets, starts, durations)
@@ -0,0 +1,105 @@
+"""
+Dependency-tracked store for pipeline stage outputs.
+
+Every artifact (transcript, refined transcript, topics, drafts, edits) is
+saved together with a fingerprint of everything it was computed from: its
+upstream artifacts, the prompt template and the stage's model/config
+settings. A later run looks the artifact up with the fingerprint of its
+current inputs and reuses it only if nothing changed, so editing one
+platform's prompt or limits recomputes only that platform's posts.
+
+Artifacts are stored as one JSON file each under <root>/<video_id>/ and
+written atomically, so concurrent workers never read a half-written file.
+"""
+
+import os
+import json
+import time
+import uuid
+import hashlib
+import logging
+
+
+def fingerprint(value):
+    """
+    Stable SHA-256 fingerprint of any JSON-serializable value.
+
+    Args:
+        value: Text, dict, list or other JSON-compatible data
+
+    Returns:
+        str: Hex digest
+    """
+    encoded = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class ArtifactStore:
+    """File-backed artifact store keyed by video ID and artifact name."""
+
+    def __init__(self, root):
+        """
+        Args:
+            root (str): Directory holding one sub-directory per video
+        """
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, video_id, name):
+        return os.path.join(self.root, video_id, f"{name}.json")
+
+    def get(self, video_id, name, inputs):
+        """
+        Return a stored artifact if it was computed from the same inputs.
+
+        Args:
+            video_id (str): YouTube video ID
+            name (str): Artifact name
+            inputs (dict): Everything the artifact depends on, by name
+
+        Returns:
+            The stored value, or None if it is missing or stale
+        """
+        path = self._path(video_id, name)
+        try:
+            with open(path, encoding="utf-8") as f:
+                record = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, json.JSONDecodeError) as e:
+            logging.warning(f"Ignoring unreadable artifact {path}: {str(e)}")
+            return None
+
+        if record.get("fingerprint") == fingerprint(inputs):
+            return record["value"]
+
+        input_fingerprints = {key: fingerprint(value) for key, value in inputs.items()}
+        changed = sorted(
+            key for key in set(input_fingerprints) | set(record.get("inputs", {}))
+            if input_fingerprints.get(key) != record.get("inputs", {}).get(key)
+        )
+        logging.info(f"Artifact {video_id}/{name} is stale (changed: {', '.join(changed) or 'unknown'})")
+        return None
+
+    def put(self, video_id, name, inputs, value):
+        """
+        Store an artifact with the fingerprint of its inputs.
+
+        Args:
+            video_id (str): YouTube video ID
+            name (str): Artifact name
+            inputs (dict): Everything the artifact depends on, by name
+            value: JSON-serializable stage output
+        """
+        path = self._path(video_id, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        record = {
+            "fingerprint": fingerprint(inputs),
+            "inputs": {key: fingerprint(value) for key, value in inputs.items()},
+            "created_at": time.time(),
+            "value": value
+        }
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(record, f, ensure_ascii=False)
+        os.replace(temp_path, path)
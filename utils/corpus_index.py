@@ -0,0 +1,242 @@
+"""
+Persistent full-text index over every processed video.
+
+Refined transcripts are split into overlapping chunks and stored with their
+video ID and character offsets, alongside every generated post. An SQLite
+FTS5 table holds the postings (porter-stemmed terms -> chunk rowids), and the
+database file is memory-mapped, so queries touch only the index pages they
+need instead of loading the corpus into RAM. Lookups across thousands of
+videos take milliseconds.
+
+Typical uses: find related segments from earlier videos for a new topic, and
+check which posts we have already published on a topic.
+"""
+
+import os
+import re
+import time
+import sqlite3
+import logging
+import threading
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS videos (
+    video_id TEXT PRIMARY KEY,
+    url TEXT,
+    title TEXT,
+    channel TEXT,
+    indexed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS chunks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    video_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    platform TEXT,
+    topic TEXT,
+    start_offset INTEGER,
+    end_offset INTEGER,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_chunks_video ON chunks (video_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5(
+    text, content='chunks', content_rowid='id', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS chunks_ai AFTER INSERT ON chunks BEGIN
+    INSERT INTO chunks_fts(rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS chunks_ad AFTER DELETE ON chunks BEGIN
+    INSERT INTO chunks_fts(chunks_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+"""
+
+# Chunk kinds
+TRANSCRIPT = "transcript"
+POST = "post"
+
+_QUERY_TERM_PATTERN = re.compile(r"\w+")
+
+
+def _match_expression(query):
+    """
+    Turn free text into an FTS5 MATCH expression.
+
+    Every word is quoted (so user text can't inject FTS syntax) and the terms
+    are OR-ed; bm25 ranking then favours chunks matching more of them.
+    """
+    terms = [term for term in _QUERY_TERM_PATTERN.findall(query.lower()) if len(term) > 2]
+    return " OR ".join(f'"{term}"' for term in dict.fromkeys(terms))
+
+
+class CorpusIndex:
+    """On-disk, memory-mapped full-text index of processed transcripts and posts."""
+
+    def __init__(self, db_path, chunk_size=1000, overlap=100, mmap_bytes=256 * 1024 * 1024):
+        """
+        Open (and if needed create) the index.
+
+        Args:
+            db_path (str): Path to the SQLite index file
+            chunk_size (int): Characters per transcript chunk
+            overlap (int): Characters shared by consecutive chunks
+            mmap_bytes (int): How much of the file SQLite may memory-map
+        """
+        self.db_path = db_path
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+        self.mmap_bytes = mmap_bytes
+        self.local = threading.local()
+
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn().executescript(SCHEMA)
+
+    def _conn(self):
+        # One connection per thread, reused so the memory map and page cache stay warm
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"PRAGMA mmap_size={int(self.mmap_bytes)}")
+            self.local.conn = conn
+        return conn
+
+    def chunk_text(self, text):
+        """
+        Split text into overlapping chunks.
+
+        Returns:
+            list: (start_offset, end_offset) pairs
+        """
+        spans = []
+        step = max(self.chunk_size - self.overlap, 1)
+        for start in range(0, len(text), step):
+            end = min(start + self.chunk_size, len(text))
+            spans.append((start, end))
+            if end == len(text):
+                break
+        return spans
+
+    def add_video(self, video_id, transcript, posts=None, video_info=None, url=None):
+        """
+        Index (or re-index) one video's refined transcript and generated posts.
+
+        Args:
+            video_id (str): YouTube video ID
+            transcript (str): The refined transcript
+            posts (list): (platform, topic title, post text) tuples
+            video_info (dict): Title and channel, as returned by extraction
+            url (str): The source URL
+
+        Returns:
+            int: Number of chunks stored
+        """
+        video_info = video_info or {}
+        rows = [
+            (video_id, TRANSCRIPT, None, None, start, end, transcript[start:end])
+            for start, end in self.chunk_text(transcript or "")
+        ]
+        rows.extend(
+            (video_id, POST, platform, topic, None, None, text)
+            for platform, topic, text in posts or [] if text
+        )
+
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM chunks WHERE video_id = ?", (video_id,))
+            conn.execute(
+                "INSERT OR REPLACE INTO videos (video_id, url, title, channel, indexed_at) VALUES (?, ?, ?, ?, ?)",
+                (video_id, url, video_info.get("title"), video_info.get("channel"), time.time())
+            )
+            conn.executemany(
+                "INSERT INTO chunks (video_id, kind, platform, topic, start_offset, end_offset, text) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+        return len(rows)
+
+    def search(self, query, kind=None, platform=None, exclude_video=None, limit=5):
+        """
+        Rank indexed chunks against free text.
+
+        Args:
+            query (str): Topic title, key points or any free text
+            kind (str): Restrict to TRANSCRIPT or POST chunks
+            platform (str): Restrict posts to one platform
+            exclude_video (str): Leave out chunks from this video
+            limit (int): Maximum results
+
+        Returns:
+            list: Dicts with video_id, kind, platform, topic, offsets, text and score
+                (lower bm25 scores are better matches)
+        """
+        expression = _match_expression(query)
+        if not expression:
+            return []
+
+        sql = (
+            "SELECT c.id, c.video_id, c.kind, c.platform, c.topic, c.start_offset, c.end_offset, c.text, "
+            "v.title AS video_title, bm25(chunks_fts) AS score "
+            "FROM chunks_fts JOIN chunks c ON c.id = chunks_fts.rowid "
+            "LEFT JOIN videos v ON v.video_id = c.video_id "
+            "WHERE chunks_fts MATCH ?"
+        )
+        params = [expression]
+        if kind:
+            sql += " AND c.kind = ?"
+            params.append(kind)
+        if platform:
+            sql += " AND c.platform = ?"
+            params.append(platform)
+        if exclude_video:
+            sql += " AND c.video_id != ?"
+            params.append(exclude_video)
+        sql += " ORDER BY score LIMIT ?"
+        params.append(limit)
+
+        return [dict(row) for row in self._conn().execute(sql, params).fetchall()]
+
+    def related_segments(self, query, exclude_video=None, limit=5):
+        """Transcript chunks from indexed videos that best match the query."""
+        return self.search(query, kind=TRANSCRIPT, exclude_video=exclude_video, limit=limit)
+
+    def posts_on_topic(self, query, platform=None, limit=5):
+        """Previously generated posts that best match the query."""
+        return self.search(query, kind=POST, platform=platform, limit=limit)
+
+    def stats(self):
+        """Return video and chunk counts."""
+        conn = self._conn()
+        videos = conn.execute("SELECT COUNT(*) FROM videos").fetchone()[0]
+        counts = conn.execute("SELECT kind, COUNT(*) AS count FROM chunks GROUP BY kind").fetchall()
+        return {"videos": videos, "chunks": {row["kind"]: row["count"] for row in counts}}
+
+
+def index_content(corpus_index, content_data, video_id):
+    """
+    Add a finished run's refined transcript and posts to the corpus index.
+
+    Args:
+        corpus_index (CorpusIndex): The index to update
+        content_data (dict): The pipeline's content_data
+        video_id (str): YouTube video ID
+
+    Returns:
+        int: Number of chunks stored
+    """
+    posts = []
+    for platform in ("blog", "linkedin", "twitter"):
+        for post in content_data.get(f"{platform}_posts") or []:
+            text = post.get("edited_content") or post.get("content")
+            posts.append((platform, post.get("topic"), text))
+
+    transcript = content_data.get("refined_transcript") or content_data.get("transcript") or ""
+    count = corpus_index.add_video(
+        video_id,
+        transcript,
+        posts=posts,
+        video_info=content_data.get("video_info"),
+        url=content_data.get("video_url")
+    )
+    logging.info(f"Indexed {count} chunks for video {video_id}")
+    return count
@@ -0,0 +1,146 @@
+"""
+Request hedging to cut tail latency on slow LLM calls.
+
+If a call has not returned by a percentile of recent latencies for the same
+kind of call (stage and platform), a duplicate request is sent and whichever
+finishes first wins. A shared budget bounds how
+many extra requests hedging may add. The losing request cannot be cancelled
+mid-flight, so it runs to completion in the background and its result is
+discarded.
+"""
+
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from .llm_stats import LatencyTracker
+
+
+class HedgeBudget:
+    """
+    Token bucket that limits hedges to a fraction of primary calls.
+
+    Every primary call earns `ratio` tokens (up to `burst`), and every hedge
+    spends one, so over time hedges never exceed ratio * calls + burst.
+    """
+
+    def __init__(self, ratio=0.1, burst=5):
+        self.ratio = ratio
+        self.burst = burst
+        self.tokens = burst
+        self.hedges_sent = 0
+        self.hedges_denied = 0
+        self.lock = threading.Lock()
+
+    def on_call(self):
+        """Credit the budget for a primary call."""
+        with self.lock:
+            self.tokens = min(self.burst, self.tokens + self.ratio)
+
+    def try_acquire(self):
+        """Spend one token for a hedge. Returns False if the budget is exhausted."""
+        with self.lock:
+            if self.tokens >= 1:
+                self.tokens -= 1
+                self.hedges_sent += 1
+                return True
+            self.hedges_denied += 1
+            return False
+
+
+class RequestHedger:
+    """Runs calls with an optional duplicate request after a latency-based delay."""
+
+    def __init__(self, percentile=95, min_samples=20, min_delay=1.0, budget_ratio=0.1,
+                 budget_burst=5, max_workers=16, window=200):
+        """
+        Args:
+            percentile (float): Latency percentile after which a hedge is sent
+            min_samples (int): Samples required before hedging starts
+            min_delay (float): Never hedge sooner than this many seconds
+            budget_ratio (float): Maximum hedges per primary call, long term
+            budget_burst (int): Hedges allowed in a burst
+            max_workers (int): Threads available for in-flight requests
+            window (int): Number of recent latencies per key to base the delay on
+        """
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.window = window
+        self.latencies = {}  # latency key -> LatencyTracker
+        self.lock = threading.Lock()
+        self.budget = HedgeBudget(budget_ratio, budget_burst)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge")
+
+    def _tracker(self, key):
+        with self.lock:
+            tracker = self.latencies.get(key)
+            if tracker is None:
+                tracker = self.latencies[key] = LatencyTracker(self.window)
+            return tracker
+
+    def hedge_delay(self, key=None):
+        """Seconds to wait before hedging calls of this key, or None while there is too little data."""
+        tracker = self._tracker(key)
+        if tracker.count() < self.min_samples:
+            return None
+        return max(self.min_delay, tracker.percentile(self.percentile))
+
+    def call(self, fn, *args, latency_key=None, **kwargs):
+        """
+        Call fn, hedging it if it runs past the hedge delay and budget allows.
+
+        If kwargs include a "timeout", the hedge gets what is left of it, so
+        it cannot outlast the primary request's deadline.
+
+        Args:
+            fn (callable): The request
+            latency_key (str): Kind of call (e.g. "editing:twitter"); delays
+                come from the latencies of earlier calls with the same key
+
+        Returns:
+            The result of whichever request succeeds first
+
+        Raises:
+            The primary request's exception if every request fails
+        """
+        self.budget.on_call()
+        delay = self.hedge_delay(latency_key)
+        started = time.time()
+        primary = self.executor.submit(self._timed, latency_key, fn, *args, **kwargs)
+
+        if delay is None:
+            return primary.result()
+
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+        hedge_kwargs = dict(kwargs)
+        if kwargs.get("timeout") is not None:
+            hedge_kwargs["timeout"] = kwargs["timeout"] - (time.time() - started)
+            if hedge_kwargs["timeout"] <= 0:
+                return primary.result()
+        if not self.budget.try_acquire():
+            return primary.result()
+
+        logging.info(f"{latency_key or 'Request'} exceeded p{self.percentile} latency ({delay:.1f}s); sending hedge")
+        hedge = self.executor.submit(self._timed, latency_key, fn, *args, **hedge_kwargs)
+        pending = {primary, hedge}
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        logging.info("Hedged request won")
+                    return future.result()
+
+        # Both failed: surface the primary error so retry logic sees the usual exception
+        return primary.result()
+
+    def _timed(self, latency_key, fn, *args, **kwargs):
+        start = time.time()
+        result = fn(*args, **kwargs)
+        self._tracker(latency_key).record(time.time() - start)
+        return result
@@ -0,0 +1,267 @@
+"""
+Durable, multi-process job queue backed by SQLite.
+
+Workers on any number of nodes share one database file (for example on a
+shared filesystem). Jobs are claimed under a time-limited lease that the
+worker keeps alive with heartbeats. If a worker dies, its lease expires and
+the job becomes claimable again. Each claim gets a fresh lease token, and
+completions from a worker whose lease was taken over are rejected, so a job
+is only ever recorded as done by one worker. Jobs that keep failing are moved
+to a dead-letter state after max_attempts.
+"""
+
+import os
+import time
+import uuid
+import sqlite3
+import logging
+from contextlib import contextmanager
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    video_id TEXT NOT NULL UNIQUE,
+    url TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    lease_owner TEXT,
+    lease_token TEXT,
+    lease_expires_at REAL,
+    heartbeat_at REAL,
+    available_at REAL NOT NULL,
+    last_error TEXT,
+    result_path TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs (status, available_at);
+"""
+
+# Job states
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+DEAD = "dead"
+
+
+class DurableJobQueue:
+    """SQLite-backed job queue with leases, heartbeats, retries and dead-lettering."""
+
+    def __init__(self, db_path, lease_seconds=120, max_attempts=3, retry_backoff=60):
+        """
+        Open (and if needed create) the queue database.
+
+        Args:
+            db_path (str): Path to the SQLite database file
+            lease_seconds (int): How long a claim stays valid without a heartbeat
+            max_attempts (int): Claims allowed per job before it is dead-lettered
+            retry_backoff (int): Base delay in seconds before a failed job is retried
+        """
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+
+        conn = self._connect()
+        try:
+            conn.executescript(SCHEMA)
+        finally:
+            conn.close()
+
+    def _connect(self):
+        # A connection per operation keeps the queue safe to use from many threads.
+        # isolation_level=None lets us issue BEGIN IMMEDIATE ourselves.
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        """Run a block under a write lock so claims are atomic across processes."""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            yield conn
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def enqueue(self, url, video_id, max_attempts=None):
+        """
+        Add a job unless one already exists for this video.
+
+        Args:
+            url (str): The YouTube URL to process
+            video_id (str): Video ID, used to de-duplicate jobs
+            max_attempts (int): Override the queue's default attempt limit
+
+        Returns:
+            bool: True if a new job was added
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO jobs (video_id, url, max_attempts, available_at, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (video_id, url, max_attempts or self.max_attempts, now, now, now)
+            )
+            return cursor.rowcount == 1
+
+    def claim(self, worker_id):
+        """
+        Lease the next available job to a worker.
+
+        Expired leases are reclaimed here: the job either goes to another
+        worker or, if it has used up its attempts, to the dead-letter state.
+
+        Args:
+            worker_id (str): Identifier of the claiming worker
+
+        Returns:
+            dict: The claimed job (including its lease_token), or None if idle
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            # Dead-letter jobs whose worker died on their final attempt
+            expired = conn.execute(
+                "SELECT id, lease_owner FROM jobs WHERE status = ? AND lease_expires_at < ? AND attempts >= max_attempts",
+                (LEASED, now)
+            ).fetchall()
+            for row in expired:
+                logging.warning(f"Job {row['id']} lease from {row['lease_owner']} expired on its final attempt; dead-lettering")
+                conn.execute(
+                    "UPDATE jobs SET status = ?, lease_owner = NULL, lease_token = NULL, "
+                    "last_error = 'Lease expired on final attempt', updated_at = ? WHERE id = ?",
+                    (DEAD, now, row["id"])
+                )
+
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE (status = ? AND available_at <= ?) "
+                "OR (status = ? AND lease_expires_at < ?) "
+                "ORDER BY available_at, id LIMIT 1",
+                (PENDING, now, LEASED, now)
+            ).fetchone()
+            if not row:
+                return None
+
+            if row["status"] == LEASED:
+                logging.warning(f"Reclaiming job {row['id']} from {row['lease_owner']} (lease expired)")
+
+            token = uuid.uuid4().hex
+            conn.execute(
+                "UPDATE jobs SET status = ?, attempts = attempts + 1, lease_owner = ?, lease_token = ?, "
+                "lease_expires_at = ?, heartbeat_at = ?, updated_at = ? WHERE id = ?",
+                (LEASED, worker_id, token, now + self.lease_seconds, now, now, row["id"])
+            )
+
+        job = dict(row)
+        job.update({
+            "status": LEASED,
+            "attempts": row["attempts"] + 1,
+            "lease_owner": worker_id,
+            "lease_token": token
+        })
+        return job
+
+    def heartbeat(self, job_id, lease_token):
+        """
+        Extend a lease.
+
+        Returns:
+            bool: False if the lease has been lost (expired and reclaimed)
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET lease_expires_at = ?, heartbeat_at = ?, updated_at = ? "
+                "WHERE id = ? AND status = ? AND lease_token = ?",
+                (now + self.lease_seconds, now, now, job_id, LEASED, lease_token)
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, job_id, lease_token, result_path=None):
+        """
+        Mark a leased job as done.
+
+        Returns:
+            bool: False if the lease was lost, in which case the result must be discarded
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, result_path = ?, lease_owner = NULL, lease_token = NULL, "
+                "lease_expires_at = NULL, last_error = NULL, updated_at = ? "
+                "WHERE id = ? AND status = ? AND lease_token = ?",
+                (DONE, result_path, now, job_id, LEASED, lease_token)
+            )
+            return cursor.rowcount == 1
+
+    def fail(self, job_id, lease_token, error):
+        """
+        Record a failed attempt, scheduling a retry or dead-lettering the job.
+
+        Returns:
+            str: The job's new status, or None if the lease was lost
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT attempts, max_attempts FROM jobs WHERE id = ? AND status = ? AND lease_token = ?",
+                (job_id, LEASED, lease_token)
+            ).fetchone()
+            if not row:
+                return None
+
+            if row["attempts"] >= row["max_attempts"]:
+                status, available_at = DEAD, now
+            else:
+                # Exponential backoff between attempts
+                status = PENDING
+                available_at = now + self.retry_backoff * (2 ** (row["attempts"] - 1))
+
+            conn.execute(
+                "UPDATE jobs SET status = ?, available_at = ?, last_error = ?, lease_owner = NULL, "
+                "lease_token = NULL, lease_expires_at = NULL, updated_at = ? WHERE id = ?",
+                (status, available_at, str(error), now, job_id)
+            )
+            return status
+
+    def requeue_dead(self):
+        """
+        Move every dead-lettered job back to pending with a fresh attempt budget.
+
+        Returns:
+            int: Number of jobs requeued
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, attempts = 0, available_at = ?, updated_at = ? WHERE status = ?",
+                (PENDING, now, now, DEAD)
+            )
+            return cursor.rowcount
+
+    def dead_letters(self):
+        """Return all dead-lettered jobs."""
+        conn = self._connect()
+        try:
+            rows = conn.execute("SELECT * FROM jobs WHERE status = ? ORDER BY updated_at", (DEAD,)).fetchall()
+            return [dict(row) for row in rows]
+        finally:
+            conn.close()
+
+    def stats(self):
+        """Return job counts by status."""
+        conn = self._connect()
+        try:
+            rows = conn.execute("SELECT status, COUNT(*) AS count FROM jobs GROUP BY status").fetchall()
+            return {row["status"]: row["count"] for row in rows}
+        finally:
+            conn.close()
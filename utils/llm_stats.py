@@ -0,0 +1,121 @@
+"""
+In-process statistics about LLM calls.
+"""
+
+import threading
+from collections import deque
+
+
+class LatencyTracker:
+    """Thread-safe rolling window of recent call latencies."""
+
+    def __init__(self, window=200):
+        """
+        Args:
+            window (int): Number of most recent samples to keep
+        """
+        self.samples = deque(maxlen=window)
+        self.lock = threading.Lock()
+
+    def record(self, seconds):
+        """Add a latency sample in seconds."""
+        with self.lock:
+            self.samples.append(seconds)
+
+    def count(self):
+        """Number of samples currently in the window."""
+        with self.lock:
+            return len(self.samples)
+
+    def percentile(self, pct):
+        """
+        Return the given percentile (0-100) of recent latencies, or None if empty.
+        """
+        with self.lock:
+            ordered = sorted(self.samples)
+        if not ordered:
+            return None
+        index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+        return ordered[index]
+
+
+class UsageStats:
+    """Thread-safe token usage and prompt-cache counters per pipeline stage."""
+
+    FIELDS = ("prompt_tokens", "completion_tokens", "prompt_cache_hit_tokens", "prompt_cache_miss_tokens")
+
+    def __init__(self):
+        self.stages = {}
+        self.lock = threading.Lock()
+
+    def record(self, stage, usage, seconds=None):
+        """
+        Add one call's usage (as returned by the LLM router) to a stage's totals.
+        
+        Args:
+            stage (str): Stage key ("generation:blog" style for per-platform stages)
+            usage (dict): Token counts for the call
+            seconds (float): How long the call took, if measured
+        """
+        stage = stage or "default"
+        with self.lock:
+            totals = self.stages.setdefault(stage, dict.fromkeys(("calls", "seconds") + self.FIELDS, 0))
+            totals["calls"] += 1
+            totals["seconds"] += seconds or 0
+            for field in self.FIELDS:
+                totals[field] += usage.get(field) or 0
+
+    def cache_hit_ratio(self, stage):
+        """Share of prompt tokens served from the provider's prefix cache, or None if unknown."""
+        with self.lock:
+            totals = self.stages.get(stage)
+            if not totals:
+                return None
+            seen = totals["prompt_cache_hit_tokens"] + totals["prompt_cache_miss_tokens"]
+            return totals["prompt_cache_hit_tokens"] / seen if seen else None
+
+    def snapshot(self):
+        """Per-stage totals including the cache hit ratio."""
+        with self.lock:
+            stages = {stage: dict(totals) for stage, totals in self.stages.items()}
+        for stage, totals in stages.items():
+            seen = totals["prompt_cache_hit_tokens"] + totals["prompt_cache_miss_tokens"]
+            totals["cache_hit_ratio"] = round(totals["prompt_cache_hit_tokens"] / seen, 3) if seen else None
+            totals["seconds"] = round(totals["seconds"], 3)
+        return stages
+
+
+class PromptSectionStats:
+    """Thread-safe estimated prompt tokens per stage and prompt section."""
+
+    def __init__(self):
+        self.stages = {}
+        self.lock = threading.Lock()
+
+    def record(self, report):
+        """
+        Add one built prompt's report (see PromptBuilder.report) to the totals.
+        """
+        with self.lock:
+            totals = self.stages.setdefault(report["stage"], {
+                "prompts": 0, "tokens": 0, "over_budget": 0, "dropped_pieces": 0, "compressed_pieces": 0, "sections": {}
+            })
+            totals["prompts"] += 1
+            totals["tokens"] += report["tokens"]
+            totals["dropped_pieces"] += report["dropped_pieces"]
+            totals["compressed_pieces"] += report.get("compressed_pieces", 0)
+            if report["budget"] is not None and report["tokens"] > report["budget"]:
+                totals["over_budget"] += 1
+            for name, tokens in report["sections"].items():
+                totals["sections"][name] = totals["sections"].get(name, 0) + tokens
+
+    def snapshot(self):
+        """Per-stage totals with the average prompt size."""
+        with self.lock:
+            stages = {
+                stage: dict(totals, sections=dict(totals["sections"]))
+                for stage, totals in self.stages.items()
+            }
+        for totals in stages.values():
+            totals["avg_tokens"] = round(totals["tokens"] / totals["prompts"]) if totals["prompts"] else 0
+        return stages
@@ -0,0 +1,199 @@
+"""
+Per-stage profiling for pipeline runs.
+
+Enabled with `python main.py --profile` (or process_youtube_url(profile=True)).
+Each pipeline stage is wrapped with:
+
+- wall-clock and CPU timers, so network/LLM wait (wall minus CPU) is
+  separated from Python work;
+- cProfile, for deterministic per-function CPU hot spots;
+- tracemalloc, for peak memory and the allocation sites that grew most;
+- a stack sampler on the pipeline thread, which also catches time spent
+  blocked in I/O that cProfile attributes poorly.
+
+Reports are written to one directory per run: a .prof (pstats) and .txt file
+per stage, summary.json, and profile.collapsed, which holds every stage's
+samples in the collapsed-stack format read by flamegraph.pl and speedscope.
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import pstats
+import cProfile
+import logging
+import threading
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+
+# Only one cProfile profiler can be active per process on Python 3.12+, so
+# concurrent profiled runs fall back to timers, memory and samples only
+_cprofile_lock = threading.Lock()
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class _StackSampler:
+    """Samples one thread's Python stack at a fixed interval into collapsed-stack counts."""
+
+    def __init__(self, thread_id, prefix, interval, counts):
+        self.thread_id = thread_id
+        self.prefix = prefix
+        self.interval = interval
+        self.counts = counts
+        self.samples = 0
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+
+    def _run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            stack.append(self.prefix)
+            self.counts[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+
+class RunProfiler:
+    """Collects CPU, wall-clock and allocation profiles for each stage of one run."""
+
+    def __init__(self, output_dir, cpu=True, memory=True, sample_interval=0.005, top=25):
+        """
+        Args:
+            output_dir (str): Directory for this run's reports
+            cpu (bool): Collect cProfile data per stage
+            memory (bool): Trace allocations per stage with tracemalloc
+            sample_interval (float): Seconds between stack samples (0 disables sampling)
+            top (int): Entries to include in each stage's text report
+        """
+        self.output_dir = output_dir
+        self.cpu = cpu
+        self.memory = memory
+        self.sample_interval = sample_interval
+        self.top = top
+        self.stages = []
+        self.collapsed = Counter()
+        self.started_tracemalloc = False
+        os.makedirs(output_dir, exist_ok=True)
+
+    @contextmanager
+    def stage(self, name):
+        """Profile the enclosed block as one stage."""
+        index = len(self.stages) + 1
+        file_base = os.path.join(self.output_dir, f"{index:02d}-{name.replace(':', '-')}")
+
+        sampler = None
+        if self.sample_interval:
+            sampler = _StackSampler(threading.get_ident(), name, self.sample_interval, self.collapsed)
+            sampler.start()
+
+        profile = None
+        if self.cpu and _cprofile_lock.acquire(blocking=False):
+            profile = cProfile.Profile()
+            profile.enable()
+        elif self.cpu:
+            logging.info(f"cProfile is busy in another run; profiling stage {name} without it")
+
+        before = None
+        if self.memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(10)
+                self.started_tracemalloc = True
+            tracemalloc.reset_peak()
+            before = tracemalloc.take_snapshot()
+            memory_before = tracemalloc.get_traced_memory()[0]
+
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        process_start = time.process_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = time.thread_time() - cpu_start
+            process_cpu = time.process_time() - process_start
+
+            if profile:
+                profile.disable()
+                _cprofile_lock.release()
+            if sampler:
+                sampler.stop()
+
+            entry = {
+                "stage": name,
+                "wall_seconds": round(wall, 4),
+                "cpu_seconds": round(cpu, 4),
+                "process_cpu_seconds": round(process_cpu, 4),
+                "wait_seconds": round(max(wall - cpu, 0), 4),
+                "samples": sampler.samples if sampler else 0
+            }
+
+            report = [f"Stage {name}: wall {wall:.3f}s, cpu {cpu:.3f}s (process {process_cpu:.3f}s), "
+                      f"waiting {max(wall - cpu, 0):.3f}s"]
+
+            if profile:
+                profile.dump_stats(file_base + ".prof")
+                buffer = io.StringIO()
+                pstats.Stats(profile, stream=buffer).sort_stats("cumulative").print_stats(self.top)
+                report += ["", "Top functions by cumulative time:", buffer.getvalue()]
+                entry["cprofile"] = file_base + ".prof"
+
+            if before is not None:
+                memory_after, peak = tracemalloc.get_traced_memory()
+                growth = tracemalloc.take_snapshot().compare_to(before, "lineno")[:self.top]
+                entry["memory_peak_bytes"] = peak
+                entry["memory_net_bytes"] = memory_after - memory_before
+                report += ["", f"Memory: peak {peak / 1024:.1f} KiB, net {(memory_after - memory_before) / 1024:+.1f} KiB",
+                           "Top allocation sites by growth:"]
+                report += [str(stat) for stat in growth]
+
+            with open(file_base + ".txt", "w", encoding="utf-8") as f:
+                f.write("\n".join(report) + "\n")
+            entry["report"] = file_base + ".txt"
+            self.stages.append(entry)
+
+    def finish(self):
+        """
+        Write the combined reports and stop tracing.
+
+        Returns:
+            dict: Per-stage timings and the paths of every report
+        """
+        if self.started_tracemalloc:
+            tracemalloc.stop()
+            self.started_tracemalloc = False
+
+        collapsed_path = os.path.join(self.output_dir, "profile.collapsed")
+        with open(collapsed_path, "w", encoding="utf-8") as f:
+            for stack, count in sorted(self.collapsed.items()):
+                f.write(f"{stack} {count}\n")
+
+        summary = {
+            "output_dir": self.output_dir,
+            "flamegraph": collapsed_path,
+            "sample_interval": self.sample_interval,
+            "wall_seconds": round(sum(stage["wall_seconds"] for stage in self.stages), 4),
+            "cpu_seconds": round(sum(stage["cpu_seconds"] for stage in self.stages), 4),
+            "stages": self.stages
+        }
+        with open(os.path.join(self.output_dir, "summary.json"), "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        return summary
@@ -0,0 +1,59 @@
+"""
+Append-only history of finished runs.
+
+Each successful run appends one JSON line with its transcript size, per-stage
+wall-clock time and per-stage LLM usage (calls, tokens, cache hits and the
+seconds spent waiting on the provider). The dry-run planner reads the most
+recent entries to calibrate its call, token and latency estimates.
+"""
+
+import os
+import json
+import logging
+import threading
+from collections import deque
+
+
+class RunHistory:
+    """JSON Lines file of per-run statistics, safe to share between threads."""
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): History file (created on first append)
+        """
+        self.path = path
+        self.lock = threading.Lock()
+
+    def append(self, record):
+        """Add one run's record."""
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self.lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # One write per line; O_APPEND keeps lines from concurrent processes intact
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    def recent(self, limit=50):
+        """
+        Return the most recent records, oldest first.
+
+        Args:
+            limit (int): Maximum records to return
+
+        Returns:
+            list: Parsed records (unreadable lines are skipped)
+        """
+        records = deque(maxlen=limit)
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        logging.warning(f"Skipping unreadable line in {self.path}")
+        except FileNotFoundError:
+            pass
+        return list(records)
@@ -0,0 +1,69 @@
+"""
+Hand-off buffer between a stage that produces text piece by piece and
+stages that only need a prefix of it.
+
+Refinement produces the refined transcript chunk by chunk, joined with
+spaces, and chunks are only ever appended. The text available at any point
+is therefore a prefix of the final text. A consumer that needs only the
+first N characters (topic generation) can wait for them and start while the
+producer is still working, and sees exactly the characters it would have
+read from the finished text.
+"""
+
+import threading
+
+
+class TextPrefixStream:
+    """Text assembled from pieces in order, readable from other threads as it grows."""
+
+    def __init__(self, separator=" "):
+        """
+        Args:
+            separator (str): Joined between pieces (must match how the producer joins its final text)
+        """
+        self.separator = separator
+        self.pieces = []
+        self.length = 0
+        self.finished = False
+        self.aborted = False
+        self.condition = threading.Condition()
+
+    def append(self, piece):
+        """Publish the next piece."""
+        with self.condition:
+            if self.pieces:
+                self.length += len(self.separator)
+            self.pieces.append(piece)
+            self.length += len(piece)
+            self.condition.notify_all()
+
+    def finish(self):
+        """Mark the text complete; waiting consumers get whatever exists."""
+        with self.condition:
+            self.finished = True
+            self.condition.notify_all()
+
+    def abort(self):
+        """Mark the producer as failed; waiting consumers get None."""
+        with self.condition:
+            self.finished = True
+            self.aborted = True
+            self.condition.notify_all()
+
+    def wait_for(self, chars, timeout=None):
+        """
+        Block until at least `chars` characters exist or the stream is finished.
+
+        Args:
+            chars (int): Prefix length needed
+            timeout (float): Seconds to wait at most (None waits indefinitely)
+
+        Returns:
+            str: All text published so far (at least `chars` long unless the
+                stream finished first), or None if the producer failed or the wait timed out
+        """
+        with self.condition:
+            ready = self.condition.wait_for(lambda: self.length >= chars or self.finished, timeout)
+            if not ready or self.aborted:
+                return None
+            return self.separator.join(self.pieces)
@@ -0,0 +1,200 @@
+"""
+Durable queue workers for large backfills.
+
+Any number of worker processes, on any number of nodes, can point at the same
+queue database and output directory:
+
+    python worker.py enqueue URL [URL ...]   # or --file urls.txt
+    python worker.py run --concurrency 4
+    python worker.py stats
+    python worker.py requeue-dead
+"""
+
+import os
+import json
+import socket
+import logging
+import argparse
+import threading
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+from utils.job_queue import DurableJobQueue
+from agents.agent_config import queue_config, output_config
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def open_queue(db_path=None):
+    """Open the shared job queue using queue_config defaults."""
+    return DurableJobQueue(
+        db_path or queue_config["db_path"],
+        lease_seconds=queue_config["lease_seconds"],
+        max_attempts=queue_config["max_attempts"],
+        retry_backoff=queue_config["retry_backoff"]
+    )
+
+
+def enqueue_urls(job_queue, urls):
+    """Validate and enqueue URLs, skipping invalid ones and videos already queued."""
+    from agents.agent_tools import validate_youtube_url
+
+    added = 0
+    for url in urls:
+        validation = validate_youtube_url(url)
+        if not validation["valid"]:
+            logging.warning(f"Skipping invalid URL: {url}")
+            continue
+        if job_queue.enqueue(url, validation["video_id"]):
+            added += 1
+        else:
+            logging.info(f"Video {validation['video_id']} is already queued")
+    logging.info(f"Enqueued {added} of {len(urls)} URLs")
+    return added
+
+
+class QueueWorker:
+    """Claims jobs from the durable queue and runs them through the pipeline."""
+
+    def __init__(self, job_queue, agent_system, output_dir, worker_id):
+        self.job_queue = job_queue
+        self.agent_system = agent_system
+        self.output_dir = output_dir
+        self.worker_id = worker_id
+
+    def run(self, stop_event, exit_when_idle=False):
+        """Process jobs until stop_event is set (or the queue drains, if exit_when_idle)."""
+        while not stop_event.is_set():
+            job = self.job_queue.claim(self.worker_id)
+            if not job:
+                if exit_when_idle:
+                    return
+                stop_event.wait(queue_config["poll_interval"])
+                continue
+            self.process(job)
+
+    def process(self, job):
+        """Run one leased job, keeping its lease alive until it finishes."""
+        logging.info(f"{self.worker_id} processing job {job['id']} ({job['video_id']}), attempt {job['attempts']}")
+
+        lease_lost = threading.Event()
+        done = threading.Event()
+
+        def keep_alive():
+            while not done.wait(queue_config["heartbeat_interval"]):
+                if not self.job_queue.heartbeat(job["id"], job["lease_token"]):
+                    logging.warning(f"Lost lease on job {job['id']}; its result will be discarded")
+                    lease_lost.set()
+                    return
+
+        heartbeat_thread = threading.Thread(target=keep_alive, daemon=True)
+        heartbeat_thread.start()
+
+        # Write to lease-specific temp files so a zombie worker can never clobber
+        # the output of the worker that took its job over
+        final_base = os.path.join(self.output_dir, job["video_id"])
+        temp_base = f"{final_base}.{job['lease_token']}.tmp"
+
+        try:
+            result = self.agent_system.process_youtube_url(job["url"], output_file=temp_base + ".txt")
+        except Exception as e:
+            result = {"success": False, "error": f"Processing error: {str(e)}"}
+        finally:
+            done.set()
+            heartbeat_thread.join()
+
+        if lease_lost.is_set() or not self.job_queue.heartbeat(job["id"], job["lease_token"]):
+            self._discard(temp_base)
+            return
+
+        if not result.get("success"):
+            self._discard(temp_base)
+            status = self.job_queue.fail(job["id"], job["lease_token"], result.get("error", "Unknown error"))
+            logging.error(f"Job {job['id']} failed ({status}): {result.get('error', 'Unknown error')}")
+            return
+
+        with open(temp_base + ".json", "w", encoding="utf-8") as f:
+            json.dump(result["content_data"], f, indent=2)
+        os.replace(temp_base + ".json", final_base + ".json")
+        os.replace(temp_base + ".txt", final_base + ".txt")
+
+        if self.job_queue.complete(job["id"], job["lease_token"], final_base + ".txt"):
+            logging.info(f"Job {job['id']} completed: {final_base}.txt")
+        else:
+            logging.warning(f"Job {job['id']} was reclaimed before completion was recorded")
+
+    @staticmethod
+    def _discard(temp_base):
+        for suffix in (".txt", ".json"):
+            if os.path.exists(temp_base + suffix):
+                os.remove(temp_base + suffix)
+
+
+def run_workers(job_queue, output_dir, concurrency, exit_when_idle=False):
+    """Run a pool of queue workers in this process sharing one agent system."""
+    from agents.agent_setup import RepurposerAgentSystem
+
+    os.makedirs(output_dir, exist_ok=True)
+    agent_system = RepurposerAgentSystem()
+    stop_event = threading.Event()
+    host = f"{socket.gethostname()}:{os.getpid()}"
+
+    threads = []
+    for i in range(concurrency):
+        worker = QueueWorker(job_queue, agent_system, output_dir, f"{host}:{i + 1}")
+        thread = threading.Thread(target=worker.run, args=(stop_event, exit_when_idle), daemon=True)
+        thread.start()
+        threads.append(thread)
+    logging.info(f"Started {concurrency} queue workers on {host}")
+
+    try:
+        for thread in threads:
+            while thread.is_alive():
+                thread.join(timeout=1)
+    except KeyboardInterrupt:
+        # In-flight jobs are not completed; their leases expire and another worker picks them up
+        logging.info("Stopping queue workers")
+        stop_event.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Durable multi-node job queue for the Content Repurposer.")
+    parser.add_argument("--db", default=queue_config["db_path"], help="Path to the shared queue database")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    enqueue_parser = subparsers.add_parser("enqueue", help="Add YouTube URLs to the queue")
+    enqueue_parser.add_argument("urls", nargs="*", help="YouTube URLs")
+    enqueue_parser.add_argument("--file", help="File with one URL per line")
+
+    run_parser = subparsers.add_parser("run", help="Process jobs from the queue")
+    run_parser.add_argument("--output-dir", default=output_config["output_dir"], help="Shared output directory")
+    run_parser.add_argument("--concurrency", type=int, default=1, help="Pipelines to run in this process")
+    run_parser.add_argument("--exit-when-idle", action="store_true", help="Exit once no jobs are available")
+
+    subparsers.add_parser("stats", help="Show job counts by status")
+    subparsers.add_parser("requeue-dead", help="Retry all dead-lettered jobs")
+
+    args = parser.parse_args()
+    job_queue = open_queue(args.db)
+
+    if args.command == "enqueue":
+        urls = list(args.urls)
+        if args.file:
+            with open(args.file, encoding="utf-8") as f:
+                urls.extend(line.strip() for line in f if line.strip())
+        enqueue_urls(job_queue, urls)
+    elif args.command == "run":
+        run_workers(job_queue, args.output_dir, args.concurrency, args.exit_when_idle)
+    elif args.command == "stats":
+        print(json.dumps(job_queue.stats(), indent=2))
+        for job in job_queue.dead_letters():
+            print(f"dead: {job['video_id']} after {job['attempts']} attempts - {job['last_error']}")
+    elif args.command == "requeue-dead":
+        logging.info(f"Requeued {job_queue.requeue_dead()} dead-lettered jobs")
+
+
+if __name__ == "__main__":
+    main()